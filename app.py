@@ -1,23 +1,25 @@
+import os
+from collections import OrderedDict
 import streamlit as st
 import pandas as pd
 import re
 from streamlit_option_menu import option_menu
-from modules.drive_access import get_files_from_drive_folder
-from modules.data_processor import process_spreadsheet
-from modules.calculations import calcular_pagamento_semanal, calcular_pagamento_individual
-from modules.config import FORMAS_PAGAMENTO_VALIDAS, INVALID_CLIENTS
+from googleapiclient.errors import HttpError
+from modules.drive_access import stream_drive_folder, get_mirror_dir
+from modules.data_processor import process_spreadsheets, list_week_sheets, notify, collect_messages
+from modules.frame_schema import normalize_schema, log_memory_report
+from modules.ingestion import get_dataset_dir, read_manifest, load_dataset
+from modules.service_cube import build_service_cube, cube_slice
+from modules.filter_index import build_filter_index, apply_filters
+from modules.derived_results import summarize_financials, cached_result
+from modules.config import INVALID_CLIENTS
 from modules.pdf_generator import (
     create_pdf,
     create_tech_payment_receipt,
     create_technician_of_the_week_receipt,
 )
-from modules.visualization import (
-    plot_weekly_evolution,
-    plot_weekly_payments,
-    plot_payment_methods_total,
-    plot_payment_methods_usage
-)
-from modules.utils import format_currency
+from modules.money import MONEY_COLUMNS, format_cents, to_dollars
+from modules.pdf_cache import cached_pdf, lazy_pdf
 from modules.payroll_module import payroll_page
 from modules.verificacao_zip_codes import zip_code_page
 from modules.limpeza_numeros import limpeza_numeros_page
@@ -43,8 +45,123 @@ def extract_folder_id(url_or_id):
     return url_or_id
 
 
-def financial_analysis_page(data):
-    """Conteúdo da página de Análises Financeiras."""
+def load_drive_folder(folder_id):
+    """
+    Sincroniza uma pasta do Google Drive com o espelho local em disco, com
+    uma barra de progresso à medida que as planilhas ficam prontas. Só
+    descarrega: as semanas selecionadas são processadas a seguir (ver
+    load_selected_weeks) e as já processadas noutra seleção vêm do cache de
+    parsing. A sessão guarda apenas os caminhos, para os reruns seguintes.
+    """
+    loaded_folders = st.session_state.setdefault('drive_files', {})
+    # Os ficheiros podem ter sido removidos do espelho (limite de tamanho) por outra pasta
+    if folder_id in loaded_folders and all(os.path.exists(path) for path in loaded_folders[folder_id]):
+        return loaded_folders[folder_id]
+
+    try:
+        stream = stream_drive_folder(folder_id, get_mirror_dir())
+        if stream is None:
+            return []
+
+        files = [None] * len(stream.names)
+        progress = st.progress(0.0, text="A descarregar as planilhas do Google Drive...")
+        for done, (index, file) in enumerate(stream.files, 1):
+            files[index] = file
+            progress.progress(done / len(files), text=f"{done} de {len(files)} planilha(s) pronta(s): {stream.names[index]}")
+        progress.empty()
+
+        st.caption(f"{len(files)} planilha(s): {len(stream.downloads)} descarregada(s), "
+                   f"{len(files) - len(stream.downloads)} sem alterações, {len(stream.removed)} removida(s); "
+                   f"{stream.crawl.api_calls} pedido(s) de listagem à API do Drive.")
+    except HttpError as e:
+        if e.resp.status == 404:
+            st.error("ID da pasta não encontrado ou inválido. Por favor, verifique o ID e as permissões de acesso da conta de serviço.")
+        else:
+            st.error(f"Ocorreu um erro ao aceder à API do Google Drive: {e}")
+        return []
+
+    loaded_folders[folder_id] = files
+    return files
+
+
+def dataset_key(files_data, dataset_dir, manifest, weeks):
+    """
+    Identifica o conjunto de dados a carregar pelas fontes (caminho, data de
+    modificação e tamanho de cada planilha, ficheiros carregados ou conjunto
+    pré-processado) e pelas semanas selecionadas, sem ler os dados.
+    """
+    if files_data:
+        sources = []
+        for file in files_data:
+            if isinstance(file, (str, os.PathLike)):
+                stat = os.stat(file)
+                sources.append((os.fspath(file), stat.st_mtime_ns, stat.st_size))
+            else:
+                sources.append((file.name, getattr(file, 'file_id', None), file.size))
+    else:
+        sources = [(dataset_dir, manifest['created'])]
+    return tuple(sources), tuple(weeks)
+
+
+def load_selected_weeks(files_data, dataset_dir, manifest, weeks):
+    """
+    Processa as semanas selecionadas e constrói o índice dos filtros da
+    barra lateral (ver modules/filter_index.py). Retorna (chave, data,
+    índice), com a chave de dataset_key, ou data e índice a None sem dados.
+
+    O resultado fica na sessão enquanto as fontes e as semanas não mudarem
+    (ver dataset_key), pelo que as interações seguintes não voltam a
+    processar as planilhas nem a construir o índice; as mensagens do
+    processamento são mostradas de novo em cada execução.
+    """
+    key = dataset_key(files_data, dataset_dir, manifest, weeks)
+    loaded = st.session_state.get('loaded_dataset')
+    if loaded is None or loaded[0] != key:
+        all_dataframes = []
+        with collect_messages() as diagnostics:
+            if files_data:
+                with st.spinner('A processar as planilhas...'):
+                    all_dataframes = process_spreadsheets(files_data, weeks=weeks or None)
+            else:
+                dataset = load_dataset(dataset_dir, weeks=weeks or None)
+                all_dataframes = [dataset] if not dataset.empty else []
+
+        data = filter_index = None
+        if all_dataframes:
+            raw_data = pd.concat(all_dataframes, ignore_index=True)
+            data = normalize_schema(raw_data)
+            log_memory_report(raw_data, data)
+            del raw_data
+            filter_index = build_filter_index(data)
+
+        loaded = (key, data, filter_index, list(diagnostics))
+        st.session_state.loaded_dataset = loaded
+
+    _, data, filter_index, diagnostics = loaded
+    for diagnostic in diagnostics:
+        notify(*diagnostic)
+    return key, data, filter_index
+
+
+def services_csv(data):
+    """CSV dos atendimentos para download, com os valores em dólares."""
+    return data.assign(**{column: to_dollars(data[column]) for column in MONEY_COLUMNS}).to_csv(index=False).encode('utf-8')
+
+
+def receipt_pdf(create, summary, tech_name, week):
+    """Bytes do recibo create (ver modules/pdf_generator.py) de um técnico numa semana, do cache se já foi gerado."""
+    completed_services = summary.completed_services
+    tech_data = completed_services[(completed_services['Nome'] == tech_name) & (completed_services['Semana'] == week)]
+    return cached_pdf(create, tech_data, tech_name, week, cube_slice(summary.cube, Nome=tech_name, Semana=week))
+
+
+def financial_analysis_page(data, summary=None):
+    """
+    Conteúdo da página de Análises Financeiras. Os totais, gráficos e PDFs
+    são agregados a partir do cubo de atendimentos (ver
+    modules/service_cube.py); summary tem os resultados já calculados para
+    data (ver modules/derived_results.py) e é calculado se não for dado.
+    """
 
     # Título principal do dashboard
     st.markdown(
@@ -60,52 +177,27 @@ def financial_analysis_page(data):
     st.markdown("---")
 
     # Processamento dos dados
-    completed_services = data[data['Realizado']]
-    not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
-
-    if 'Pets' in completed_services.columns:
-        quantidade_pets = completed_services['Pets'].sum()
-    else:
-        quantidade_pets = 0
-
-    dias_trabalhados = completed_services.groupby(['Nome', 'Semana', 'Data']).size().reset_index()
-    dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana']).size().reset_index(name='Dias Trabalhados')
-
-    weekly_totals = completed_services.groupby(['Nome', 'Semana', 'Categoria']).agg({
-        'Serviço': 'sum',
-        'Gorjeta': 'sum',
-        'Dia': 'count'
-    }).reset_index()
-
-    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
-
-    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = weekly_totals.apply(
-        calcular_pagamento_semanal, axis=1, result_type='expand'
-    )
-
-    completed_services[['Pagamento Tecnico', 'Lucro Empresa']] = completed_services.apply(
-        lambda x: calcular_pagamento_individual(x, weekly_totals), axis=1, result_type='expand'
-    )
+    if summary is None:
+        summary = summarize_financials(data, build_service_cube(data))
+    cube = summary.cube
 
     # 📊 Cartões de Métricas - Layout mais compacto
-    total_lucro = completed_services['Lucro Empresa'].sum()
-
     with st.container():
         st.markdown('<h3 style="margin-bottom: 0;">Métricas Gerais</h3>', unsafe_allow_html=True)
         col1, col2, col3, col4, col5, col6 = st.columns(6)
 
         with col1:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Realizados</p><p class="metric-value-compact">{0}</p></div>'.format(len(completed_services)), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Realizados</p><p class="metric-value-compact">{0}</p></div>'.format(cube['Atendimentos'].sum()), unsafe_allow_html=True)
         with col2:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Pets</p><p class="metric-value-compact">{0}</p></div>'.format(quantidade_pets), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Pets</p><p class="metric-value-compact">{0}</p></div>'.format(summary.quantidade_pets), unsafe_allow_html=True)
         with col3:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Não Realizados</p><p class="metric-value-compact">{0}</p></div>'.format(len(not_completed)), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Não Realizados</p><p class="metric-value-compact">{0}</p></div>'.format(len(summary.not_completed)), unsafe_allow_html=True)
         with col4:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Serviços</p><p class="metric-value-compact">{0}</p></div>'.format(format_currency(completed_services["Serviço"].sum())), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Serviços</p><p class="metric-value-compact">{0}</p></div>'.format(format_cents(cube["Serviço"].sum())), unsafe_allow_html=True)
         with col5:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Gorjetas</p><p class="metric-value-compact">{0}</p></div>'.format(format_currency(completed_services["Gorjeta"].sum())), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Total Gorjetas</p><p class="metric-value-compact">{0}</p></div>'.format(format_cents(cube["Gorjeta"].sum())), unsafe_allow_html=True)
         with col6:
-            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Lucro Empresa</p><p class="metric-value-compact">{0}</p></div>'.format(format_currency(total_lucro)), unsafe_allow_html=True)
+            st.markdown('<div class="metric-card-compact"><p class="metric-title-compact">Lucro Empresa</p><p class="metric-value-compact">{0}</p></div>'.format(format_cents(summary.total_lucro)), unsafe_allow_html=True)
 
     st.markdown("---")
 
@@ -113,86 +205,52 @@ def financial_analysis_page(data):
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### Evolução e Pagamentos")
-        st.plotly_chart(plot_weekly_evolution(weekly_totals), use_container_width=True)
+        st.plotly_chart(summary.evolution_chart, use_container_width=True)
 
-        st.plotly_chart(plot_weekly_payments(weekly_totals), use_container_width=True)
+        st.plotly_chart(summary.payments_chart, use_container_width=True)
 
     with col2:
         st.markdown("### Resumo por Técnico")
-        tech_summary = weekly_totals.groupby(['Nome', 'Categoria']).agg({
-            'Serviço': 'sum',
-            'Gorjeta': 'sum',
-            'Pagamento Tecnico': 'sum',
-            'Lucro Empresa': 'sum',
-            'Dia': 'sum',
-            'Dias Trabalhados': 'sum'
-        }).reset_index()
-
-        tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços',
-                                'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa',
-                                'Atendimentos', 'Dias Trabalhados']
-
-        tech_summary['Média Atendimento'] = tech_summary['Total Serviços'] / tech_summary['Atendimentos']
-        tech_summary['Gorjeta Média'] = tech_summary['Total Gorjetas'] / tech_summary['Atendimentos']
-
-        for col in ['Total Serviços', 'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa',
-                    'Média Atendimento', 'Gorjeta Média']:
-            tech_summary[col] = tech_summary[col].apply(format_currency)
-
-        st.dataframe(tech_summary.sort_values('Atendimentos', ascending=False), hide_index=True)
+        st.dataframe(summary.tech_summary, hide_index=True)
 
         st.markdown("### Atendimentos Não Realizados")
-        if not not_completed.empty:
-            st.warning(f"{len(not_completed)} atendimentos não realizados.")
-            st.dataframe(not_completed[['Nome', 'Dia', 'Data', 'Cliente']], hide_index=True)
+        if not summary.not_completed.empty:
+            st.warning(f"{len(summary.not_completed)} atendimentos não realizados.")
+            st.dataframe(summary.not_completed[['Nome', 'Dia', 'Data', 'Cliente']], hide_index=True)
         else:
             st.success("Todos os agendamentos foram realizados!")
 
     # 💳 Resumo de Pagamento
     st.markdown("---")
     st.markdown("### Resumo de Pagamento")
-    valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
-
-    if not valid_payments.empty:
-        payment_summary = valid_payments.groupby('Pagamento').agg({
-            'Serviço': 'sum',
-            'Gorjeta': 'sum',
-            'Cliente': 'count'
-        }).reset_index().rename(columns={'Cliente': 'Qtd Usos'})
-
-        payment_summary['Total'] = payment_summary['Serviço'] + payment_summary['Gorjeta']
-        payment_summary['Percentual Uso'] = (payment_summary['Qtd Usos'] / payment_summary['Qtd Usos'].sum() * 100).round(2)
-
-        st.dataframe(payment_summary, hide_index=True)
+    if summary.payment_summary is not None:
+        st.dataframe(summary.payment_summary, hide_index=True)
 
         col1, col2 = st.columns(2)
         with col1:
-            st.plotly_chart(plot_payment_methods_total(payment_summary), use_container_width=True)
+            st.plotly_chart(summary.payment_total_chart, use_container_width=True)
         with col2:
-            st.plotly_chart(plot_payment_methods_usage(payment_summary), use_container_width=True)
+            st.plotly_chart(summary.payment_usage_chart, use_container_width=True)
 
     st.markdown("---")
 
     # 📤 Exportar Dados
+    # Os ficheiros são gerados só quando o download é pedido (ver modules/pdf_cache.py)
     st.markdown("### Exportar Dados")
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        csv = data.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📁 Baixar CSV",
-            data=csv,
+            data=lambda: services_csv(data),
             file_name="servicos_tecnicos.csv",
             mime="text/csv"
         )
 
     with col2:
-        pdf = create_pdf(completed_services)
-        pdf_output = pdf.output(dest='S').encode('latin-1')
-
         st.download_button(
             label="📥 Baixar Relatório PDF",
-            data=pdf_output,
+            data=lazy_pdf(create_pdf, cube),
             file_name="relatorio_geral.pdf",
             mime="application/pdf"
         )
@@ -201,16 +259,10 @@ def financial_analysis_page(data):
         if len(st.session_state.selected_techs) == 1 and len(st.session_state.selected_weeks) == 1:
             tech_name = st.session_state.selected_techs[0]
             week = st.session_state.selected_weeks[0]
-            tech_data = completed_services[
-                (completed_services['Nome'] == tech_name) & (completed_services['Semana'] == week)
-            ]
-
-            pdf = create_tech_payment_receipt(tech_data, tech_name, week)
-            pdf_output = pdf.output(dest='S').encode('latin-1')
 
             st.download_button(
                 label=f"📥 Recibo {tech_name}",
-                data=pdf_output,
+                data=lambda: receipt_pdf(create_tech_payment_receipt, summary, tech_name, week),
                 file_name=f"recibo_{tech_name}_{week}.pdf",
                 mime="application/pdf"
             )
@@ -221,16 +273,10 @@ def financial_analysis_page(data):
         if len(st.session_state.selected_techs) == 1 and len(st.session_state.selected_weeks) == 1:
             tech_name = st.session_state.selected_techs[0]
             week = st.session_state.selected_weeks[0]
-            tech_data = completed_services[
-                (completed_services['Nome'] == tech_name) & (completed_services['Semana'] == week)
-            ]
-
-            pdf = create_technician_of_the_week_receipt(tech_data, tech_name, week)
-            pdf_output = pdf.output(dest='S').encode('latin-1')
 
             st.download_button(
                 label=f"🏆 Recibo TECH of the WEEK {tech_name}",
-                data=pdf_output,
+                data=lambda: receipt_pdf(create_technician_of_the_week_receipt, summary, tech_name, week),
                 file_name=f"technician_of_the_week_{tech_name}_{week}.pdf",
                 mime="application/pdf"
             )
@@ -279,57 +325,73 @@ def main():
         drive_folder_input = st.sidebar.text_input("Cole o ID ou URL da pasta do Google Drive")
         drive_folder_id = extract_folder_id(drive_folder_input)
 
-        all_dataframes = []
+        files_data = []
 
         if drive_folder_id:
-            with st.spinner('Acedendo ao Google Drive e a processar as planilhas...'):
-                try:
-                    files_data = get_files_from_drive_folder(drive_folder_id)
-                    if files_data:
-                        for file_content in files_data:
-                            df = process_spreadsheet(file_content)
-                            if not df.empty:
-                                all_dataframes.append(df)
-                except Exception as e:
-                    st.error(f"Erro ao aceder ao Google Drive: {e}")
-                    st.stop()
+            try:
+                files_data = load_drive_folder(drive_folder_id)
+            except Exception as e:
+                st.error(f"Erro ao aceder ao Google Drive: {e}")
+                st.stop()
         else:
             uploaded_files = st.sidebar.file_uploader("Ou carregue uma ou mais planilhas Excel", type=['xlsx'], accept_multiple_files=True)
-            files_to_process = uploaded_files
-            for file in files_to_process:
-                df = process_spreadsheet(file)
-                if not df.empty:
-                    all_dataframes.append(df)
+            files_data = uploaded_files or []
 
-        if not all_dataframes:
-            st.warning("⚠️ Nenhuma planilha carregada. Por favor, carregue uma planilha para iniciar.")
-            st.stop()
+        # Sem planilhas, usa o conjunto de dados pré-processado (python -m modules.ingestion)
+        dataset_dir = get_dataset_dir()
+        manifest = read_manifest(dataset_dir) if not files_data else None
+        if manifest:
+            st.sidebar.caption(f"A usar os dados pré-processados em {manifest['created']}.")
 
-        data = pd.concat(all_dataframes, ignore_index=True)
+        # Primeira fase: só os nomes das folhas WEEK, para preencher o seletor
+        if files_data:
+            week_options = list_week_sheets(files_data)
+        else:
+            week_options = manifest['weeks'] if manifest else []
 
         # Filtros que serão aplicados a ambas as páginas
         st.sidebar.header("Filtrar por:")
-        st.session_state.selected_weeks = st.sidebar.multiselect("Selecione as semanas para análise", options=data['Semana'].unique())
+        # Sem semanas selecionadas são carregadas todas
+        st.session_state.selected_weeks = st.sidebar.multiselect("Selecione as semanas para análise", options=week_options)
+
+        # Segunda fase: só as semanas selecionadas são processadas
+        data = None
+        if files_data or manifest:
+            dataset_id, data, filter_index = load_selected_weeks(files_data, dataset_dir, manifest, st.session_state.selected_weeks)
+
+        if data is None:
+            st.warning("⚠️ Nenhuma planilha carregada. Por favor, carregue uma planilha para iniciar.")
+            st.stop()
+
         st.session_state.selected_techs = st.sidebar.multiselect("Selecione os técnicos:", options=data['Nome'].unique(), default=list(data['Nome'].unique()))
         st.session_state.selected_categories = st.sidebar.multiselect("Selecione as categorias:", options=data['Categoria'].unique(), default=list(data['Categoria'].unique()))
 
-        filtered_data = data.copy()
-        if st.session_state.selected_weeks:
-            filtered_data = filtered_data[filtered_data['Semana'].isin(st.session_state.selected_weeks)]
-        if st.session_state.selected_techs:
-            filtered_data = filtered_data[filtered_data['Nome'].isin(st.session_state.selected_techs)]
-        if st.session_state.selected_categories:
-            filtered_data = filtered_data[filtered_data['Categoria'].isin(st.session_state.selected_categories)]
+        selections = {
+            'Semana': st.session_state.selected_weeks,
+            'Nome': st.session_state.selected_techs,
+            'Categoria': st.session_state.selected_categories,
+        }
+        filtered_data = apply_filters(data, filter_index, selections)
 
         if filtered_data.empty:
             st.warning("Nenhum dado encontrado com os filtros selecionados.")
             st.stop()
             
+        # Resultados derivados guardados na sessão por conjunto de dados e seleção
+        # dos filtros: mudar de página ou descarregar um ficheiro não os recalcula
+        selection_key = (dataset_id, tuple((column, tuple(values)) for column, values in selections.items()))
+        derived_results = st.session_state.setdefault('derived_results', OrderedDict())
+
+        # Agregação única partilhada pelas duas páginas
+        cube = cached_result(derived_results, ('cubo', selection_key), lambda: build_service_cube(filtered_data))
+
     # Exibição da página selecionada
     if st.session_state.selected_page == "Análises Financeiras":
-        financial_analysis_page(filtered_data)
+        summary = cached_result(derived_results, ('financeiro', selection_key),
+                                lambda: summarize_financials(filtered_data, cube))
+        financial_analysis_page(filtered_data, summary)
     elif st.session_state.selected_page == "Payroll dos Técnicos":
-        payroll_page(filtered_data)
+        payroll_page(filtered_data, cube)
     elif st.session_state.selected_page == "Franchises":
         franchises_page()
     elif st.session_state.selected_page == "Zip Codes":
@@ -0,0 +1,58 @@
+"""
+Mede o que a página de Análises Financeiras calculava em cada execução do
+script (cubo, totais semanais, repartição dos pagamentos, resumos e
+gráficos) contra o mesmo pedido servido pelo cache de resultados derivados
+de modules/derived_results.py, como numa interação que não muda os filtros
+(mudar de página, clicar num botão de download).
+
+Uso: python -m benchmarks.bench_derived_results [--technicians 40] [--weeks 8] [--reruns 5]
+"""
+import time
+import argparse
+from collections import OrderedDict
+import pandas as pd
+from modules.service_cube import build_service_cube
+from modules.derived_results import summarize_financials, cached_result
+from benchmarks.bench_service_cube import build_data
+
+
+def compute(data):
+    return summarize_financials(data, build_service_cube(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--reruns', type=int, default=5)
+    args = parser.parse_args()
+
+    data = build_data(args.technicians, args.weeks)
+    key = ('financeiro', (tuple(data['Semana'].unique()), (), ()))
+
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        expected = compute(data)
+    uncached_time = (time.perf_counter() - start) / args.reruns
+
+    store = OrderedDict()
+    start = time.perf_counter()
+    first = cached_result(store, key, lambda: compute(data))
+    first_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        summary = cached_result(store, key, lambda: compute(data))
+    cached_time = (time.perf_counter() - start) / args.reruns
+
+    assert summary is first
+    pd.testing.assert_frame_equal(expected.weekly_totals, summary.weekly_totals)
+    pd.testing.assert_frame_equal(expected.tech_summary, summary.tech_summary)
+
+    print(f"{len(data)} atendimentos")
+    print(f"Sem cache:             {uncached_time * 1000:10.3f} ms por execução")
+    print(f"Primeira execução:     {first_time * 1000:10.3f} ms")
+    print(f"Execuções seguintes:   {cached_time * 1000:10.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compara os downloads sequenciais e em paralelo de uma pasta do Google Drive,
+usando o servidor local de benchmarks/fake_drive.py com latência por pedido e
+falhas temporárias em alguns ficheiros. Verifica que a ordem e o conteúdo dos
+ficheiros são os mesmos nos dois modos.
+
+Uso: python -m benchmarks.bench_drive_download [--files 50] [--latency 0.05] [--workers 8]
+"""
+import time
+import argparse
+from modules.drive_access import fetch_drive_folder
+from modules.drive_transport import build_drive_service
+from benchmarks.fake_drive import FakeDrive, FakeDriveServer
+
+
+def build_drive(n_files, latency, failing_every):
+    """Pasta raiz com uma subpasta; cada failing_every-ésimo ficheiro falha uma vez com 503."""
+    drive = FakeDrive(latency=latency)
+    subfolder = drive.add_folder('Franquia')
+    for i in range(n_files):
+        parent = subfolder if i % 2 else 'root'
+        failures = 1 if failing_every and i % failing_every == 0 else 0
+        drive.add_file(f"Planilha {i:03d}.xlsx", f"conteudo {i}".encode() * 1000, parent=parent,
+                       google_sheet=(i % 5 == 0), failures=failures)
+    return drive
+
+
+def time_fetch(args, workers, pooled=False):
+    """Com pooled, todas as threads usam um único cliente sobre o transporte partilhado."""
+    drive = build_drive(args.files, args.latency, args.failing_every)
+    with FakeDriveServer(drive) as server:
+        service_factory = server.service_factory
+        if pooled:
+            shared_service = build_drive_service(api_endpoint=server.url, pool_maxsize=workers)
+            service_factory = lambda: shared_service
+        start = time.perf_counter()
+        folder = fetch_drive_folder('root', service_factory=service_factory, max_workers=workers)
+        elapsed = time.perf_counter() - start
+    files = [(name, content.getvalue()) for name, content in folder.files]
+    connections = shared_service._http.connections() if pooled else None
+    return files, elapsed, len(drive.requests), folder.crawl, connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help="Segundos por pedido")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--failing-every', type=int, default=10, help="Um em cada N ficheiros falha uma vez (0 desativa)")
+    args = parser.parse_args()
+
+    sequential, sequential_time, sequential_requests, crawl, _ = time_fetch(args, workers=1)
+    parallel, parallel_time, parallel_requests, _, _ = time_fetch(args, workers=args.workers)
+    pooled, pooled_time, _, _, connections = time_fetch(args, workers=args.workers, pooled=True)
+    assert sequential == parallel == pooled, "Os downloads em paralelo devem manter a ordem e o conteúdo"
+
+    print(f"{args.files} ficheiros, latência {args.latency * 1000:.0f} ms por pedido")
+    print(f"Listagem:              {crawl.api_calls} pedidos para {crawl.folders} pastas")
+    print(f"Sequencial:            {sequential_time:8.2f} s ({sequential_requests} pedidos)")
+    print(f"Paralelo ({args.workers} threads):  {parallel_time:8.2f} s ({parallel_requests} pedidos)")
+    print(f"Ganho:                 {sequential_time / parallel_time:8.2f}x")
+    print(f"Cliente partilhado:    {pooled_time:8.2f} s ({connections} ligações abertas)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compara o carregamento de uma pasta do Google Drive em duas fases (descarregar
+todas as planilhas e só depois processá-las) com o pipeline que processa cada
+planilha assim que o seu download termina, usando o servidor local de
+benchmarks/fake_drive.py com latência por pedido. Verifica que os dois modos
+produzem os mesmos dados.
+
+O processamento corre no processo atual (max_workers=1), com um cache de
+parsing vazio e temporário em cada modo.
+
+Uso: python -m benchmarks.bench_drive_pipeline [--files 12] [--latency 1.0] [--weeks 4] [--workers 2]
+"""
+import time
+import tempfile
+import argparse
+from io import BytesIO
+import pandas as pd
+from modules import parse_cache
+from modules.data_processor import process_files, iter_processed_files, collect_messages
+from modules.drive_access import fetch_drive_folder, stream_drive_folder
+from benchmarks.fake_drive import FakeDrive, FakeDriveServer
+from benchmarks.synthetic_workbook import write_week_workbook
+
+
+def build_drive(args):
+    drive = FakeDrive(latency=args.latency)
+    for i in range(args.files):
+        buffer = BytesIO()
+        write_week_workbook(buffer, n_technicians=args.technicians, n_weeks=args.weeks, seed=i)
+        drive.add_file(f"Franquia {i:02d}.xlsx", buffer.getvalue())
+    return drive
+
+
+def load_in_two_phases(server, workers):
+    folder = fetch_drive_folder('root', service_factory=server.service_factory, max_workers=workers)
+    downloaded = time.perf_counter()
+    results = process_files([content for _, content in folder.files], max_workers=1)
+    return [data for data, _ in results], downloaded
+
+
+def load_pipelined(server, workers):
+    stream = stream_drive_folder('root', None, server.service_factory, workers)
+    frames = [None] * len(stream.names)
+    for index, data, _ in iter_processed_files(stream.files, max_workers=1):
+        frames[index] = data
+    return frames, None
+
+
+def time_mode(load, drive, workers):
+    original_cache_dir = parse_cache.PARSE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir, FakeDriveServer(drive) as server, collect_messages():
+        parse_cache.PARSE_CACHE_DIR = cache_dir
+        try:
+            start = time.perf_counter()
+            frames, downloaded = load(server, workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            parse_cache.PARSE_CACHE_DIR = original_cache_dir
+    return frames, elapsed, downloaded - start if downloaded else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=12)
+    parser.add_argument('--latency', type=float, default=1.0, help="Segundos por pedido")
+    parser.add_argument('--technicians', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2, help="Threads de download")
+    args = parser.parse_args()
+
+    drive = build_drive(args)
+    two_phase, two_phase_time, download_time = time_mode(load_in_two_phases, drive, args.workers)
+    pipelined, pipelined_time, _ = time_mode(load_pipelined, drive, args.workers)
+    for expected, data in zip(two_phase, pipelined):
+        pd.testing.assert_frame_equal(expected, data)
+
+    parse_time = two_phase_time - download_time
+    print(f"{args.files} planilhas, latência {args.latency * 1000:.0f} ms por pedido, {args.workers} threads de download")
+    print(f"Download:              {download_time:8.2f} s")
+    print(f"Processamento:         {parse_time:8.2f} s")
+    print(f"Em duas fases:         {two_phase_time:8.2f} s")
+    print(f"Pipeline:              {pipelined_time:8.2f} s (mínimo teórico {max(download_time, parse_time):.2f} s)")
+    print(f"Ganho:                 {two_phase_time / pipelined_time:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
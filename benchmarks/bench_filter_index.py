@@ -0,0 +1,86 @@
+"""
+Compara os filtros da barra lateral aplicados como antes (cópia do DataFrame
+e um isin por coluna) com o índice de modules/filter_index.py, na primeira
+vez que cada seleção é pedida e quando se repete (ex.: interações que não
+mudam os filtros), e verifica que as linhas selecionadas são as mesmas em
+seleções aleatórias de semanas, técnicos e categorias.
+
+Uso: python -m benchmarks.bench_filter_index [--technicians 40] [--weeks 52] [--selections 200]
+"""
+import time
+import random
+import argparse
+import pandas as pd
+from modules.filter_index import build_filter_index, filter_positions, apply_filters
+from benchmarks.bench_service_cube import build_data
+
+
+def filter_with_isin(data, selections):
+    filtered_data = data.copy()
+    for column, values in selections.items():
+        if values:
+            filtered_data = filtered_data[filtered_data[column].isin(values)]
+    return filtered_data
+
+
+def random_selections(data, n_selections, seed=0):
+    """Seleções como as da barra lateral: listas vazias, alguns valores ou todos."""
+    rng = random.Random(seed)
+    options = {column: list(data[column].unique()) for column in ['Semana', 'Nome', 'Categoria']}
+    selections = []
+    for _ in range(n_selections):
+        selection = {}
+        for column, values in options.items():
+            mode = rng.random()
+            if mode < 0.2:
+                selection[column] = []
+            elif mode < 0.4:
+                selection[column] = list(values)
+            else:
+                selection[column] = rng.sample(values, rng.randint(1, len(values)))
+        selections.append(selection)
+    return selections
+
+
+def time_filters(function, selections):
+    start = time.perf_counter()
+    results = [function(selection) for selection in selections]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--selections', type=int, default=200)
+    args = parser.parse_args()
+
+    data = build_data(args.technicians, args.weeks)
+    selections = random_selections(data, args.selections)
+
+    expected, isin_time = time_filters(lambda selection: filter_with_isin(data, selection), selections)
+
+    start = time.perf_counter()
+    index = build_filter_index(data)
+    build_time = time.perf_counter() - start
+    result, index_time = time_filters(lambda selection: apply_filters(data, index, selection), selections)
+    # Seleção repetida que exclui linhas (sem filtros é sempre o próprio data)
+    repeated = next(selection for selection in selections if filter_positions(index, selection) is not None)
+    _, repeat_time = time_filters(lambda selection: apply_filters(data, index, selection), [repeated] * len(selections))
+
+    # Os dois resultados são linhas de data: basta comparar quais
+    for expected_rows, rows in zip(expected, result):
+        pd.testing.assert_index_equal(expected_rows.index, rows.index)
+    pd.testing.assert_frame_equal(expected[0], result[0])
+
+    n = len(selections)
+    print(f"{len(data)} atendimentos, {n} seleções")
+    print(f"Cópia + isin:          {isin_time / n * 1000:8.3f} ms por seleção")
+    print(f"Índice (construção):   {build_time * 1000:8.3f} ms, uma vez por conjunto de dados")
+    print(f"Índice:                {index_time / n * 1000:8.3f} ms por seleção")
+    print(f"Índice, seleção igual: {repeat_time / n * 1000:8.3f} ms por seleção")
+    print(f"Ganho:                 {isin_time / index_time:8.2f}x ({isin_time / repeat_time:.1f}x com a seleção repetida)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Suite de benchmarks do processamento das planilhas: para cada escalão de
+tamanho e motor, mede o tempo de processamento, as linhas por segundo e o pico
+de memória, e compara-os com um baseline em JSON.
+
+Uso:
+  python -m benchmarks.bench_ingestion [--tiers small medium] [--engines vectorized]
+  python -m benchmarks.bench_ingestion --save-baseline      grava os resultados como baseline
+  python -m benchmarks.bench_ingestion --tolerance 0.2      regressão = 20% pior que o baseline
+
+Termina com código 1 quando algum resultado é uma regressão face ao baseline.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from io import BytesIO
+from modules.data_processor import parse_workbook, collect_messages, PARSER_ENGINES, STREAMING_ENGINE
+from modules.sheet_parser import PARSER_VERSION
+from benchmarks.synthetic_workbook import write_week_workbook
+
+# Escalões de tamanho: (técnicos, folhas WEEK)
+TIERS = {
+    'small': (10, 4),
+    'medium': (40, 13),
+    'large': (40, 52),
+}
+ENGINES = list(PARSER_ENGINES) + [STREAMING_ENGINE]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Métricas comparadas com o baseline e se um valor maior é pior
+METRICS = {'seconds': True, 'rows_per_second': False, 'peak_mb': True}
+
+
+def build_workbook(tier):
+    n_technicians, n_weeks = TIERS[tier]
+    buffer = BytesIO()
+    write_week_workbook(buffer, n_technicians=n_technicians, n_weeks=n_weeks)
+    return buffer.getvalue()
+
+
+def measure(content, engine, repeats):
+    """Melhor tempo de repeats execuções e pico de memória (tracemalloc, numa execução à parte)."""
+    with collect_messages():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            data = parse_workbook(BytesIO(content), engine=engine)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        parse_workbook(BytesIO(content), engine=engine)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        'rows': len(data),
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(len(data) / seconds, 1),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Lista de (resultado, métrica, atual, baseline) piores que o baseline além da tolerância."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric, higher_is_worse in METRICS.items():
+            current, previous = result[metric], reference.get(metric)
+            if not previous:
+                continue
+            if higher_is_worse and current > previous * (1 + tolerance):
+                regressions.append((name, metric, current, previous))
+            elif not higher_is_worse and current < previous * (1 - tolerance):
+                regressions.append((name, metric, current, previous))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tiers', nargs='+', default=list(TIERS), choices=list(TIERS))
+    parser.add_argument('--engines', nargs='+', default=['vectorized', STREAMING_ENGINE], choices=ENGINES)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    reference = baseline['results'] if baseline else {}
+
+    results = {}
+    for tier in args.tiers:
+        content = build_workbook(tier)
+        for engine in args.engines:
+            name = f"{tier}/{engine}"
+            results[name] = measure(content, engine, args.repeats)
+            result = results[name]
+            previous = reference.get(name, {}).get('seconds')
+            change = f"{(result['seconds'] / previous - 1) * 100:+6.1f}%" if previous else '      -'
+            print(f"{name:<22} {result['rows']:>8} linhas {result['seconds']:8.3f} s {change}  "
+                  f"{result['rows_per_second']:>10,.0f} linhas/s  pico {result['peak_mb']:7.1f} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'parser_version': PARSER_VERSION,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'results': {**reference, **results},
+            }, f, indent=2)
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"Sem baseline em {args.baseline}; use --save-baseline para o criar.")
+        return 0
+
+    regressions = find_regressions(results, reference, args.tolerance)
+    for name, metric, current, previous in regressions:
+        print(f"REGRESSÃO {name}: {metric} {current} (baseline {previous})")
+    if not regressions:
+        print(f"Sem regressões face ao baseline (tolerância {args.tolerance:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Compara os valores monetários em dólares (float) com os mesmos valores em
+cêntimos inteiros (modules/money.py): totais por técnico e semana e o total
+geral somados por ordens diferentes (pela ordem das linhas, pelo groupby e
+com as linhas baralhadas), a distância ao total exato e o tempo das somas e
+da formatação dos totais (format_currency linha a linha contra format_cents
+de uma vez).
+
+Uso: python -m benchmarks.bench_money_cents [--tech-weeks 5000] [--services 25] [--repeats 3]
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from modules.money import to_cents, to_dollars, format_cents
+from modules.utils import format_currency
+
+
+def build_services(n_tech_weeks, services_per_week, seed=0):
+    """Atendimentos sintéticos com valores ao cêntimo, como nas planilhas."""
+    rng = np.random.default_rng(seed)
+    n_services = n_tech_weeks * services_per_week
+    return pd.DataFrame({
+        'Técnico Semana': rng.integers(0, n_tech_weeks, n_services),
+        'Serviço': np.round(rng.uniform(40, 400, n_services), 2),
+    })
+
+
+def best_time(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tech-weeks', type=int, default=5000)
+    parser.add_argument('--services', type=int, default=25)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    dollars = build_services(args.tech_weeks, args.services)
+    cents = dollars.assign(Serviço=to_cents(dollars['Serviço']))
+    shuffled = np.random.default_rng(1).permutation(len(dollars))
+
+    # Total exato: soma dos cêntimos em inteiros do Python
+    exact_total = sum(int(value) for value in cents['Serviço'])
+    float_totals = {
+        'ordem das linhas': dollars['Serviço'].to_numpy().cumsum()[-1],
+        'Series.sum': dollars['Serviço'].sum(),
+        'linhas baralhadas': dollars['Serviço'].iloc[shuffled].to_numpy().cumsum()[-1],
+        'soma dos totais semanais': dollars.groupby('Técnico Semana')['Serviço'].sum().sum(),
+    }
+    cents_totals = {
+        'ordem das linhas': cents['Serviço'].to_numpy(dtype=np.int64).cumsum()[-1],
+        'Series.sum': cents['Serviço'].sum(),
+        'linhas baralhadas': cents['Serviço'].iloc[shuffled].to_numpy(dtype=np.int64).cumsum()[-1],
+        'soma dos totais semanais': cents.groupby('Técnico Semana')['Serviço'].sum().sum(),
+    }
+    assert all(total == exact_total for total in cents_totals.values())
+
+    float_weekly, float_time = best_time(lambda: dollars.groupby('Técnico Semana')['Serviço'].sum(), args.repeats)
+    cents_weekly, cents_time = best_time(lambda: cents.groupby('Técnico Semana')['Serviço'].sum(), args.repeats)
+    float_text, format_time = best_time(lambda: float_weekly.apply(format_currency), args.repeats)
+    cents_text, format_cents_time = best_time(lambda: format_cents(cents_weekly), args.repeats)
+
+    # Totais semanais em float que já não são o valor exato em cêntimos
+    drifted = (float_weekly * 100 != cents_weekly.astype(float)).sum()
+    assert (to_dollars(cents_weekly) - float_weekly).abs().max() < 0.005
+    formatted_differently = (float_text != cents_text).sum()
+
+    print(f"{len(dollars)} atendimentos, {args.tech_weeks} técnicos x semanas")
+    print(f"Total exato: {format_cents(exact_total)}")
+    for order, total in float_totals.items():
+        print(f"  float, {order + ':':26s} {total!r:>22}  ({(total * 100 - exact_total):+.6f} cêntimos)")
+    print(f"  cêntimos: igual ao exato em todas as ordens")
+    print(f"Totais semanais em float fora do valor exato: {drifted} de {len(float_weekly)} "
+          f"({formatted_differently} formatados de outra forma)")
+    print(f"Soma por técnico e semana, float:     {float_time * 1000:8.3f} ms")
+    print(f"Soma por técnico e semana, cêntimos:  {cents_time * 1000:8.3f} ms")
+    print(f"format_currency linha a linha:        {format_time * 1000:8.3f} ms")
+    print(f"format_cents de uma vez:              {format_cents_time * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Mede o que os botões de download da página de Análises Financeiras custavam
+em cada execução do script (relatório geral e os dois recibos gerados com o
+FPDF mesmo sem download) contra os PDFs gerados a pedido de
+modules/pdf_cache.py: nada numa execução normal, a geração no primeiro
+download e o hash dos dados nos downloads seguintes dos mesmos dados.
+Verifica que os PDFs são os mesmos (a menos da data de criação).
+
+Uso: python -m benchmarks.bench_pdf_downloads [--technicians 40] [--weeks 8] [--repeats 3]
+"""
+import re
+import time
+import argparse
+from modules.service_cube import build_service_cube, cube_slice
+from modules.derived_results import summarize_financials
+from modules.pdf_generator import create_pdf, create_tech_payment_receipt, create_technician_of_the_week_receipt
+from modules.pdf_cache import pdf_bytes, cached_pdf, lazy_pdf
+from benchmarks.bench_service_cube import build_data
+
+
+def receipts_args(summary, tech_name, week):
+    completed_services = summary.completed_services
+    tech_data = completed_services[(completed_services['Nome'] == tech_name) & (completed_services['Semana'] == week)]
+    return tech_data, tech_name, week, cube_slice(summary.cube, Nome=tech_name, Semana=week)
+
+
+def downloads(summary, tech_name, week):
+    """(função, argumentos) dos três PDFs da página com um técnico e uma semana selecionados."""
+    args = receipts_args(summary, tech_name, week)
+    return [
+        (create_pdf, (summary.cube,)),
+        (create_tech_payment_receipt, args),
+        (create_technician_of_the_week_receipt, args),
+    ]
+
+
+def best_time(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def without_creation_date(content):
+    return re.sub(rb'\(D:\d+[^)]*\)', b'', content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_data(args.technicians, args.weeks)
+    summary = summarize_financials(data, build_service_cube(data))
+    tech_name, week = data['Nome'].iloc[0], data['Semana'].iloc[0]
+    pdfs = downloads(summary, tech_name, week)
+
+    eager, eager_time = best_time(lambda: [pdf_bytes(create, *pdf_args) for create, pdf_args in pdfs], args.repeats)
+    _, lazy_time = best_time(lambda: [lazy_pdf(create, *pdf_args) for create, pdf_args in pdfs], args.repeats)
+
+    start = time.perf_counter()
+    first = [cached_pdf(create, *pdf_args) for create, pdf_args in pdfs]
+    first_time = time.perf_counter() - start
+    cached, cached_time = best_time(lambda: [cached_pdf(create, *pdf_args) for create, pdf_args in pdfs], args.repeats)
+
+    assert all(a is b for a, b in zip(first, cached))
+    assert [without_creation_date(content) for content in eager] == [without_creation_date(content) for content in first]
+
+    print(f"{len(data)} atendimentos, relatório geral e recibos de {tech_name} na {week}")
+    print(f"Sempre gerados (antes):   {eager_time * 1000:10.3f} ms por execução")
+    print(f"A pedido:                 {lazy_time * 1000:10.3f} ms por execução sem download")
+    print(f"Primeiro download:        {first_time * 1000:10.3f} ms (os três PDFs)")
+    print(f"Downloads seguintes:      {cached_time * 1000:10.3f} ms (os três PDFs, do cache)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Compara os resumos das páginas de Análises Financeiras e Payroll e do PDF
+geral calculados diretamente dos atendimentos (como antes) com os mesmos
+resumos agregados a partir do cubo de modules/service_cube.py, e verifica
+que os resultados são iguais. A exceção é a repartição dos pagamentos, que
+é arredondada ao cêntimo em cada célula em vez de em cada atendimento: por
+grupo difere no máximo um cêntimo por atendimento e os totais são iguais.
+
+O tempo do cubo inclui a sua construção e a repartição dos pagamentos
+pelas células. O ganho depende de quantos atendimentos cabem em cada
+célula: as planilhas sintéticas sorteiam a forma de pagamento de cada
+atendimento, pelo que ficam com quase uma célula por atendimento.
+
+Uso: python -m benchmarks.bench_service_cube [--technicians 40] [--weeks 52] [--repeats 3]
+"""
+import time
+import argparse
+from io import BytesIO
+import pandas as pd
+from modules.data_processor import parse_workbook, collect_messages
+from modules.frame_schema import normalize_schema
+from modules.calculations import calcular_pagamentos_semanais, calcular_pagamentos_individuais
+from modules.service_cube import build_service_cube, cube_weekly_totals
+from benchmarks.synthetic_workbook import write_week_workbook
+
+
+def build_data(n_technicians, n_weeks):
+    buffer = BytesIO()
+    write_week_workbook(buffer, n_technicians=n_technicians, n_weeks=n_weeks)
+    with collect_messages():
+        return normalize_schema(parse_workbook(BytesIO(buffer.getvalue())))
+
+
+def tech_summary(services, clients):
+    """Resumo por técnico do PDF geral."""
+    return services.groupby(['Nome', 'Categoria'], observed=True).agg(
+        Servico=('Serviço', 'sum'), Gorjeta=('Gorjeta', 'sum'),
+        Pagamento=('Pagamento Tecnico', 'sum'), Lucro=('Lucro Empresa', 'sum'),
+        Atendimentos=clients).reset_index()
+
+
+def rollups(services, weekly_totals, clients, count):
+    """Resumos por forma de pagamento, por dia e do Payroll, com as contagens indicadas."""
+    return {
+        'semanas': weekly_totals,
+        'pagamentos': services.groupby('Pagamento', observed=True).agg(
+            Servico=('Serviço', 'sum'), Usos=count, Gorjeta=('Gorjeta', 'sum'),
+            Lucro=('Lucro Empresa', 'sum')).reset_index(),
+        'dias': services.groupby('Dia', observed=True).agg(
+            Atendimentos=count, Servico=('Serviço', 'sum'), Gorjeta=('Gorjeta', 'sum'),
+            Lucro=('Lucro Empresa', 'sum')).reset_index(),
+        'payroll': services.groupby(['Nome', 'Categoria'], observed=True).agg(
+            Servico=('Serviço', 'sum'), Gorjeta=('Gorjeta', 'sum'), Pets=('Pets', 'sum'),
+            Atendimentos=clients).reset_index(),
+    }
+
+
+def from_rows(data):
+    """Como antes: cada página e o PDF agregam os atendimentos (o PDF repete o resumo por técnico)."""
+    completed_services = data[data['Realizado']]
+    dias_trabalhados = completed_services.groupby(['Nome', 'Semana', 'Data'], observed=True).size().reset_index()
+    dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana'], observed=True).size().reset_index(name='Dias Trabalhados')
+    weekly_totals = completed_services.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Dia': 'count'
+    }).reset_index()
+    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+
+    completed_services = completed_services.copy()
+    completed_services[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_individuais(completed_services, weekly_totals)
+    result = rollups(completed_services, weekly_totals, ('Cliente', 'count'), ('Serviço', 'count'))
+    # O PDF geral calculava o resumo por técnico duas vezes
+    tech_summary(completed_services, ('Cliente', 'count'))
+    result['tecnicos'] = tech_summary(completed_services, ('Cliente', 'count'))
+    return result
+
+
+def from_cube(data):
+    cube = build_service_cube(data)
+    weekly_totals = cube_weekly_totals(cube)
+    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+
+    cube = cube.copy()
+    cube[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_individuais(cube, weekly_totals)
+    result = rollups(cube, weekly_totals, ('Clientes', 'sum'), ('Serviços', 'sum'))
+    result['tecnicos'] = tech_summary(cube, ('Clientes', 'sum'))
+    return result
+
+
+# Colunas com a repartição dos pagamentos, contagem de atendimentos que
+# limita a diferença de cada grupo e se os grupos cobrem todos os atendimentos
+# (os atendimentos sem forma de pagamento válida ficam fora do resumo)
+ALLOCATED = {
+    'pagamentos': (['Lucro'], 'Usos', False),
+    'dias': (['Lucro'], 'Atendimentos', True),
+    'tecnicos': (['Pagamento', 'Lucro'], 'Atendimentos', True),
+}
+
+
+def assert_same_summaries(expected, result):
+    for name in expected:
+        allocated, count, complete = ALLOCATED.get(name, ([], None, False))
+        pd.testing.assert_frame_equal(expected[name].drop(columns=allocated), result[name].drop(columns=allocated),
+                                      check_dtype=False)
+        for column in allocated:
+            difference = (expected[name][column] - result[name][column]).abs()
+            assert (difference <= expected[name][count]).all(), (name, column)
+            assert not complete or expected[name][column].sum() == result[name][column].sum(), (name, column)
+
+
+def best_time(function, data, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(data)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_data(args.technicians, args.weeks)
+    expected, rows_time = best_time(from_rows, data, args.repeats)
+    result, cube_time = best_time(from_cube, data, args.repeats)
+
+    assert_same_summaries(expected, result)
+
+    cells = len(build_service_cube(data))
+    print(f"{len(data)} atendimentos, {cells} células no cubo")
+    print(f"A partir dos atendimentos: {rows_time:8.3f} s")
+    print(f"A partir do cubo:          {cube_time:8.3f} s")
+    print(f"Ganho:                     {rows_time / cube_time:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
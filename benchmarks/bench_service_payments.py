@@ -0,0 +1,102 @@
+"""
+Compara a repartição do pagamento semanal pelos atendimentos linha a linha
+(apply com calcular_pagamento_individual, que filtra os totais semanais em
+cada atendimento, em dólares) com a versão por join
+calcular_pagamentos_individuais, em cêntimos, e verifica que os resultados
+diferem menos de um cêntimo e que as partes de cada técnico e semana somam
+exatamente o pagamento semanal. Os dados sintéticos incluem técnicos com
+várias categorias na mesma semana, semanas sem serviços e atendimentos sem
+semana correspondente nos totais.
+
+Uso: python -m benchmarks.bench_service_payments [--services 20000] [--technicians 40] [--weeks 52]
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from modules.calculations import (
+    calcular_pagamento_individual,
+    calcular_pagamentos_individuais,
+    calcular_pagamentos_semanais,
+    totais_por_tecnico_semana,
+)
+from modules.money import to_cents, to_dollars
+from benchmarks.bench_weekly_payments import assert_close_in_cents
+
+CATEGORIES = ['Technician', 'Started', 'Training', 'Coordinator', 'Registering']
+
+
+def build_services(n_services, n_technicians, n_weeks, seed=0):
+    rng = np.random.default_rng(seed)
+    services = pd.DataFrame({
+        'Nome': pd.Categorical([f"Técnico {i}" for i in rng.integers(0, n_technicians, n_services)]),
+        'Semana': pd.Categorical([f"WEEK {i + 1}" for i in rng.integers(0, n_weeks, n_services)]),
+        'Categoria': pd.Categorical(rng.choice(CATEGORIES, n_services, p=[0.5, 0.1, 0.1, 0.2, 0.1])),
+        'Data': rng.integers(0, 7, n_services),
+        'Serviço': to_cents(np.round(rng.uniform(40, 400, n_services), 2) * rng.choice([1, 1 / 3], n_services)),
+        'Gorjeta': to_cents(np.round(rng.uniform(0, 50, n_services), 2)),
+    })
+    # Semanas em que todos os serviços de um técnico valem zero
+    zero_weeks = services['Semana'].isin(['WEEK 2', 'WEEK 3']) & services['Nome'].isin(['Técnico 1', 'Técnico 2'])
+    services.loc[zero_weeks, 'Serviço'] = 0
+    services['Dia'] = services['Data']
+    return services
+
+
+def build_weekly_totals(services):
+    """Totais semanais como na página de Análises Financeiras, sem uma das semanas."""
+    dias_trabalhados = services.groupby(['Nome', 'Semana', 'Data'], observed=True).size().reset_index()
+    dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana'], observed=True).size().reset_index(name='Dias Trabalhados')
+    weekly_totals = services.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Dia': 'count'
+    }).reset_index()
+    weekly_totals = pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+    # Atendimentos sem semana correspondente nos totais
+    return weekly_totals[weekly_totals['Semana'] != 'WEEK 1'].reset_index(drop=True)
+
+
+def in_dollars(data):
+    """Cópia de data com os valores em dólares, para a versão linha a linha."""
+    columns = ['Serviço', 'Gorjeta', 'Pagamento Tecnico', 'Lucro Empresa']
+    return data.assign(**{column: to_dollars(data[column]) for column in columns if column in data.columns})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', type=int, default=20_000)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    args = parser.parse_args()
+
+    services = build_services(args.services, args.technicians, args.weeks)
+    weekly_totals = build_weekly_totals(services)
+
+    services_dollars, weekly_totals_dollars = in_dollars(services), in_dollars(weekly_totals)
+    start = time.perf_counter()
+    expected = services_dollars.apply(lambda x: calcular_pagamento_individual(x, weekly_totals_dollars), axis=1,
+                                      result_type='expand')
+    apply_time = time.perf_counter() - start
+    expected.columns = ['Pagamento Tecnico', 'Lucro Empresa']
+
+    start = time.perf_counter()
+    result = calcular_pagamentos_individuais(services, weekly_totals)
+    join_time = time.perf_counter() - start
+
+    assert_close_in_cents(expected, result, 1)
+    # Cada técnico e semana com serviços recebe exatamente o pagamento semanal
+    pago = result['Pagamento Tecnico'].groupby([services['Nome'], services['Semana']], observed=True).sum()
+    totais = totais_por_tecnico_semana(weekly_totals).set_index(['Nome', 'Semana'])
+    totais = totais[totais['Total Serviço'] != 0]
+    assert (pago.reindex(totais.index) == totais['Pagamento Tecnico']).all()
+
+    print(f"{args.services} atendimentos, {len(weekly_totals)} linhas semanais")
+    print(f"apply linha a linha:  {apply_time:8.3f} s")
+    print(f"Join por semana:      {join_time:8.3f} s")
+    print(f"Ganho:                {apply_time / join_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
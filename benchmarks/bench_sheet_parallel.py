@@ -0,0 +1,47 @@
+"""
+Compara o tempo de processamento sequencial e paralelo das folhas WEEK de uma
+única planilha grande.
+
+Uso: python -m benchmarks.bench_sheet_parallel [--technicians 40] [--weeks 52] [--workers 4]
+"""
+import os
+import time
+import argparse
+from io import BytesIO
+import pandas as pd
+from modules.data_processor import parse_workbook, collect_messages
+from benchmarks.synthetic_workbook import write_week_workbook
+
+
+def time_parse(content, sheet_workers):
+    with collect_messages():
+        start = time.perf_counter()
+        data = parse_workbook(BytesIO(content), sheet_workers=sheet_workers)
+        elapsed = time.perf_counter() - start
+    return data, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    buffer = BytesIO()
+    write_week_workbook(buffer, n_technicians=args.technicians, n_weeks=args.weeks)
+    content = buffer.getvalue()
+    print(f"Planilha sintética: {args.weeks} folhas WEEK x {args.technicians} técnicos "
+          f"({len(content) / 1024 / 1024:.1f} MB)")
+
+    sequential, sequential_time = time_parse(content, sheet_workers=1)
+    parallel, parallel_time = time_parse(content, sheet_workers=args.workers)
+    pd.testing.assert_frame_equal(sequential, parallel)
+
+    print(f"Sequencial:             {sequential_time:8.2f} s ({len(sequential)} linhas)")
+    print(f"Paralelo ({args.workers} processos): {parallel_time:8.2f} s")
+    print(f"Ganho:                  {sequential_time / parallel_time:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
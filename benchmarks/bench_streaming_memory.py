@@ -0,0 +1,55 @@
+"""
+Compara o pico de memória do processamento de uma planilha grande entre os
+motores baseados em pd.read_excel ('loop', 'vectorized') e o motor 'streaming'.
+
+Uso: python -m benchmarks.bench_streaming_memory [--technicians 40] [--weeks 52]
+"""
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+import pandas as pd
+from modules.data_processor import parse_workbook, collect_messages
+from benchmarks.synthetic_workbook import write_week_workbook
+
+ENGINES = ['loop', 'vectorized', 'streaming']
+
+
+def measure(content, engine):
+    """Retorna o DataFrame, o tempo e o pico de memória alocada (tracemalloc) do motor."""
+    with collect_messages():
+        tracemalloc.start()
+        start = time.perf_counter()
+        data = parse_workbook(BytesIO(content), engine=engine)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return data, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    args = parser.parse_args()
+
+    buffer = BytesIO()
+    write_week_workbook(buffer, n_technicians=args.technicians, n_weeks=args.weeks)
+    content = buffer.getvalue()
+    print(f"Planilha sintética: {args.weeks} folhas WEEK x {args.technicians} técnicos "
+          f"({len(content) / 1024 / 1024:.1f} MB)")
+
+    reference = None
+    for engine in args.engines:
+        data, elapsed, peak = measure(content, engine)
+        if reference is None:
+            reference = data
+        else:
+            pd.testing.assert_frame_equal(reference, data)
+        print(f"{engine:<12} pico {peak / 1024 / 1024:8.1f} MB   tempo {elapsed:7.2f} s   "
+              f"({peak / len(content):.1f}x o ficheiro)")
+
+
+if __name__ == '__main__':
+    main()
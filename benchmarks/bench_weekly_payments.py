@@ -0,0 +1,80 @@
+"""
+Compara o cálculo do pagamento semanal linha a linha (apply com
+calcular_pagamento_semanal, em dólares) com a versão vetorizada
+calcular_pagamentos_semanais, em cêntimos, e verifica que os resultados
+diferem no máximo meio cêntimo (a comissão é arredondada ao cêntimo) e que
+pagamento e lucro somam exatamente o serviço e a gorjeta, em totais
+semanais sintéticos com todas as categorias (incluindo categorias
+desconhecidas e em falta).
+
+Uso: python -m benchmarks.bench_weekly_payments [--rows 100000]
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from modules.calculations import calcular_pagamento_semanal, calcular_pagamentos_semanais
+from modules.money import MONEY_COLUMNS, to_cents
+
+CATEGORIES = ['Technician', 'Started', 'Training', 'Coordinator', 'Registering', 'Outro', None]
+
+
+def build_weekly_totals(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    weekly_totals = pd.DataFrame({
+        'Nome': [f"Técnico {i % 500}" for i in range(n_rows)],
+        'Semana': [f"WEEK {i // 500 + 1}" for i in range(n_rows)],
+        'Categoria': pd.Categorical(rng.choice(np.array(CATEGORIES, dtype=object), n_rows)),
+        'Serviço': rng.integers(0, 400, n_rows) * 5.0,
+        'Gorjeta': np.round(rng.uniform(0, 60, n_rows), 2),
+        'Dia': rng.integers(1, 30, n_rows),
+        'Dias Trabalhados': rng.integers(1, 7, n_rows),
+    })
+    # Alguns totais em falta, como numa folha com células vazias
+    weekly_totals.loc[weekly_totals.sample(frac=0.01, random_state=seed).index, 'Gorjeta'] = np.nan
+    return weekly_totals
+
+
+def assert_close_in_cents(expected, result, tolerance):
+    """
+    Verifica que result (em cêntimos) difere de expected (em dólares) no
+    máximo tolerance cêntimos, mais o erro de arredondamento dos floats, e
+    que os valores em falta são os mesmos.
+    """
+    expected = expected.astype(float) * 100
+    result = result.astype('Float64').astype(float)
+    pd.testing.assert_frame_equal(expected.isna(), result.isna())
+    difference = (expected - result).abs().fillna(0)
+    assert (difference <= tolerance + 1e-6).all().all(), difference.max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    weekly_totals = build_weekly_totals(args.rows)
+
+    start = time.perf_counter()
+    expected = weekly_totals.apply(calcular_pagamento_semanal, axis=1, result_type='expand')
+    apply_time = time.perf_counter() - start
+    expected.columns = ['Pagamento Tecnico', 'Lucro Empresa']
+
+    weekly_totals_cents = weekly_totals.assign(**{column: to_cents(weekly_totals[column]) for column in MONEY_COLUMNS})
+    start = time.perf_counter()
+    result = calcular_pagamentos_semanais(weekly_totals_cents)
+    vectorized_time = time.perf_counter() - start
+
+    assert_close_in_cents(expected, result, 0.5)
+    complete = weekly_totals_cents['Gorjeta'].notna()
+    produzido = weekly_totals_cents['Serviço'] + weekly_totals_cents['Gorjeta']
+    assert (result['Pagamento Tecnico'] + result['Lucro Empresa'])[complete].equals(produzido[complete])
+
+    print(f"{args.rows} linhas semanais")
+    print(f"apply linha a linha:  {apply_time:8.3f} s")
+    print(f"Vetorizado:           {vectorized_time:8.3f} s")
+    print(f"Ganho:                {apply_time / vectorized_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Servidor HTTP local que imita os pedidos da API do Google Drive v3 usados por
+modules/drive_access (files.list, files.get alt=media e files.export), com
+latência configurável e falhas temporárias injetadas, para testar e medir os
+downloads sem rede nem credenciais.
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httplib2
+from googleapiclient.discovery import build
+from modules.drive_access import FOLDER_MIME_TYPE, GOOGLE_SHEET_MIME_TYPE, XLSX_MIME_TYPE
+
+SERVICE_PATH = '/drive/v3/'
+PARENT_QUERY = re.compile(r"'([^']+)' in parents")
+MIME_QUERY = re.compile(r"mimeType='([^']+)'")
+DEFAULT_PAGE_SIZE = 100
+
+
+class FakeDrive:
+    """
+    Árvore de pastas em memória. add_folder/add_file devolvem o id criado;
+    failures[id] é o número de pedidos de download desse ficheiro que ainda
+    vão falhar com failure_status (503 por omissão; 429 imita o limite de
+    pedidos da API). update_file e remove simulam edições e ficheiros
+    apagados, atualizando modifiedTime/md5Checksum/headRevisionId.
+    """
+
+    def __init__(self, latency=0.0, failure_status=503):
+        self.latency = latency
+        self.failure_status = failure_status
+        self.items = {}
+        self.contents = {}
+        self.failures = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def _add(self, name, mime_type, parent):
+        # Um contador, para que um id não se repita depois de remove
+        self._next_id = getattr(self, '_next_id', 0) + 1
+        item_id = f"id{self._next_id - 1}"
+        self.items[item_id] = {'id': item_id, 'name': name, 'mimeType': mime_type, 'parent': parent}
+        return item_id
+
+    def add_folder(self, name, parent='root'):
+        return self._add(name, FOLDER_MIME_TYPE, parent)
+
+    def add_file(self, name, content, parent='root', google_sheet=False, failures=0):
+        item_id = self._add(name, GOOGLE_SHEET_MIME_TYPE if google_sheet else XLSX_MIME_TYPE, parent)
+        self.failures[item_id] = failures
+        self.update_file(item_id, content)
+        return item_id
+
+    def update_file(self, item_id, content):
+        item = self.items[item_id]
+        self.contents[item_id] = content
+        self._revision = getattr(self, '_revision', 0) + 1
+        item['modifiedTime'] = datetime.fromtimestamp(1.7e9 + self._revision, timezone.utc).isoformat()
+        if item['mimeType'] != GOOGLE_SHEET_MIME_TYPE:
+            item['md5Checksum'] = hashlib.md5(content).hexdigest()
+            item['headRevisionId'] = f"rev{self._revision}"
+
+    def remove(self, item_id):
+        del self.items[item_id]
+        self.contents.pop(item_id, None)
+
+    def list_children(self, query):
+        """Filhos das pastas 'X' in parents da consulta, filtrados pelos mimeType pedidos."""
+        parents = set(PARENT_QUERY.findall(query))
+        mime_types = set(MIME_QUERY.findall(query))
+        return [
+            {**{key: value for key, value in item.items() if key != 'parent'}, 'parents': [item['parent']]}
+            for item in self.items.values()
+            if item['parent'] in parents and (not mime_types or item['mimeType'] in mime_types)
+        ]
+
+    def take_failure(self, item_id):
+        with self._lock:
+            if self.failures.get(item_id, 0) > 0:
+                self.failures[item_id] -= 1
+                return True
+        return False
+
+
+def _make_handler(drive):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_error(self, status, message):
+            self._send(status, json.dumps({'error': {'code': status, 'message': message}}).encode())
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            path = url.path[len(SERVICE_PATH):] if url.path.startswith(SERVICE_PATH) else url.path
+            with drive._lock:
+                drive.requests.append(path)
+            if drive.latency:
+                time.sleep(drive.latency)
+
+            if path == 'files':
+                files = drive.list_children(params.get('q', [''])[0])
+                page_size = int(params.get('pageSize', [DEFAULT_PAGE_SIZE])[0])
+                offset = int(params.get('pageToken', ['0'])[0])
+                page = {'files': files[offset:offset + page_size]}
+                if offset + page_size < len(files):
+                    page['nextPageToken'] = str(offset + page_size)
+                return self._send(200, json.dumps(page).encode())
+
+            match = re.fullmatch(r'files/([^/]+)(/export)?', path)
+            if not match or match.group(1) not in drive.contents:
+                return self._send_error(404, 'File not found')
+            item_id = match.group(1)
+            if drive.take_failure(item_id):
+                return self._send_error(drive.failure_status, 'Backend Error')
+            return self._send(200, drive.contents[item_id], XLSX_MIME_TYPE)
+
+    return Handler
+
+
+class FakeDriveServer:
+    """Servidor em segundo plano (with FakeDriveServer(drive) as server: ... server.url)."""
+
+    def __init__(self, drive):
+        self.drive = drive
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(drive))
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}{SERVICE_PATH}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def service_factory(self):
+        """Cria um cliente da API apontado para o servidor local, sem credenciais."""
+        return build('drive', 'v3', http=httplib2.Http(), static_discovery=True,
+                     client_options={'api_endpoint': self.url})
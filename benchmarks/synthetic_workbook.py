@@ -0,0 +1,106 @@
+"""
+Gerador de planilhas sintéticas com o layout das folhas WEEK, para testar e
+medir o processamento sem usar dados reais de clientes.
+
+Uso: python -m benchmarks.synthetic_workbook SAIDA.xlsx [--technicians 40] [--weeks 52] [--shift 0]
+"""
+import random
+import argparse
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from modules.config import FORMAS_PAGAMENTO_VALIDAS
+from modules.sheet_parser import DAY_COLUMNS
+
+CATEGORIAS = ['Technician', 'Started', 'Training', 'Coordinator', 'Registering']
+CIDADES = ['Orlando', 'Tampa', 'Miami', 'Jacksonville', 'Kissimmee']
+BAND_HEADER = ['CUSTOMER', 'DATE', 'SERVICE', 'TIP', 'PETS', 'PAYMENT', 'PAYMENT ID', 'VERIFIED', 'NOTES']
+SERVICE_PRICES = [180, 210, 240, 270, 10]
+
+
+def write_week_workbook(target, n_technicians=40, n_weeks=52, slots_per_day=6,
+                        fill_ratio=0.7, not_completed_ratio=0.1, seed=0,
+                        first_week=datetime(2024, 1, 7), column_shift=0):
+    """
+    Gera uma planilha sintética com o layout das folhas WEEK reais.
+
+    Cada folha tem, por técnico, a linha 'NAME:', o cabeçalho
+    'Schedule/DATE/SERVICE' e slots_per_day linhas com as sete faixas de dias,
+    terminando nas linhas de totais 'SERVICES IN:' / 'BNS PROFIT:' / 'Total'
+    (INVALID_CLIENTS). Inclui atendimentos não realizados e formas de
+    pagamento válidas e inválidas. column_shift desloca todas as colunas para
+    a direita, como numa folha com colunas extra à esquerda.
+    target pode ser um caminho ou um objeto de ficheiro (ex.: BytesIO).
+    """
+    rng = random.Random(seed)
+    n_cols = DAY_COLUMNS[-1][1] + 1
+    payments = FORMAS_PAGAMENTO_VALIDAS + [None, 'Venmo']
+
+    technicians = [
+        (f"Tech {i:03d}", rng.choice(CATEGORIAS), rng.choice(CIDADES))
+        for i in range(n_technicians)
+    ]
+
+    padding = [None] * column_shift
+    workbook = Workbook(write_only=True)
+    for week in range(n_weeks):
+        sheet = workbook.create_sheet(f"WEEK {week + 1}")
+        week_start = first_week + timedelta(weeks=week)
+        sheet.append(padding + ['BRIGHT N SHINE - SCHEDULE', None, week_start])
+
+        for name, categoria, cidade in technicians:
+            sheet.append(padding + ['NAME:', name, 'CATEGORY:', categoria, 'From:', cidade])
+            sheet.append(padding + ['Schedule'] + BAND_HEADER * len(DAY_COLUMNS))
+
+            for slot in range(slots_per_day):
+                row = [None] * n_cols
+                row[0] = f"{8 + slot}:00"
+                for day_idx, (start_col, _) in enumerate(DAY_COLUMNS):
+                    if rng.random() > fill_ratio:
+                        continue
+                    row[start_col] = f"Client {rng.randrange(100000):05d}"
+                    row[start_col + 1] = week_start + timedelta(days=day_idx)
+                    if rng.random() < not_completed_ratio:
+                        continue
+                    row[start_col + 2] = rng.choice(SERVICE_PRICES)
+                    row[start_col + 3] = rng.choice([None, 0, 10, 20, 25.5])
+                    row[start_col + 4] = rng.randint(1, 3)
+                    row[start_col + 5] = rng.choice(payments)
+                    row[start_col + 6] = f"PAY{rng.randrange(10 ** 6):06d}" if rng.random() < 0.5 else None
+                    row[start_col + 7] = rng.random() < 0.8
+                sheet.append(padding + row)
+
+            totals = [None] * n_cols
+            profit = [None] * n_cols
+            for start_col, _ in DAY_COLUMNS:
+                totals[start_col] = 'SERVICES IN:'
+                totals[start_col + 2] = rng.randrange(2000)
+                profit[start_col] = 'BNS PROFIT:'
+                profit[start_col + 2] = rng.randrange(1500)
+            grand_total = [None] * n_cols
+            grand_total[DAY_COLUMNS[-1][0]] = 'Total'
+            grand_total[DAY_COLUMNS[-1][0] + 2] = rng.randrange(10000)
+            sheet.append(padding + totals)
+            sheet.append(padding + profit)
+            sheet.append(padding + grand_total)
+            sheet.append([])
+
+    workbook.save(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output')
+    parser.add_argument('--technicians', type=int, default=40)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--slots', type=int, default=6, help="Linhas de horário por técnico")
+    parser.add_argument('--shift', type=int, default=0, help="Colunas vazias à esquerda")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_week_workbook(args.output, n_technicians=args.technicians, n_weeks=args.weeks,
+                        slots_per_day=args.slots, seed=args.seed, column_shift=args.shift)
+    print(f"{args.output}: {args.weeks} folhas WEEK x {args.technicians} técnicos")
+
+
+if __name__ == '__main__':
+    main()
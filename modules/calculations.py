@@ -1,7 +1,70 @@
+from collections import namedtuple
+import numpy as np
 import pandas as pd
+from .config import REGRAS_COMISSAO
+from .money import CENTS_DTYPE, round_cents
+
+# Regra das categorias que não estão em REGRAS_COMISSAO: sem pagamento
+REGRA_SEM_PAGAMENTO = {'comissao': 0, 'gorjeta': False, 'valor_dia': 0, 'pagamento_fixo': None}
+
+# Regras compiladas em arrays com uma posição por categoria (pela ordem de
+# categorias) e uma última posição para as categorias desconhecidas;
+# valor_dia e pagamento_fixo ficam em dólares, como na tabela de regras
+RegrasCompiladas = namedtuple(
+    'RegrasCompiladas', ['categorias', 'comissao', 'taxa', 'gorjeta', 'valor_dia', 'pagamento_fixo']
+)
+
+
+def regra_da_categoria(categoria, regras=REGRAS_COMISSAO):
+    """Regra de pagamento de uma categoria, com os valores por omissão de REGRA_SEM_PAGAMENTO."""
+    try:
+        return {**REGRA_SEM_PAGAMENTO, **regras.get(categoria, {})}
+    except TypeError:
+        return dict(REGRA_SEM_PAGAMENTO)
+
+
+def compilar_regras(regras=REGRAS_COMISSAO):
+    """Converte a tabela de regras em arrays para calcular os pagamentos de todas as linhas de uma vez."""
+    categorias = pd.Index(list(regras), dtype=object)
+    linhas = [regra_da_categoria(categoria, regras) for categoria in categorias] + [REGRA_SEM_PAGAMENTO]
+    return RegrasCompiladas(
+        categorias,
+        np.array([linha['comissao'] for linha in linhas], dtype=float),
+        np.array([linha['comissao'] / 100 for linha in linhas], dtype=float),
+        np.array([bool(linha['gorjeta']) for linha in linhas]),
+        np.array([linha['valor_dia'] for linha in linhas], dtype=float),
+        np.array([np.nan if linha['pagamento_fixo'] is None else linha['pagamento_fixo'] for linha in linhas],
+                 dtype=float),
+    )
+
+
+_REGRAS_COMPILADAS = compilar_regras()
+
+
+def _posicoes_das_regras(categoria, regras):
+    """Posição da regra de cada linha nos arrays compilados (a última para categorias desconhecidas)."""
+    posicoes = regras.categorias.get_indexer(pd.Series(categoria).astype(object))
+    posicoes[posicoes < 0] = len(regras.categorias)
+    return posicoes
+
+
+def regras_das_categorias(categoria, regras=None):
+    """
+    Regras de cada linha de uma coluna de categorias, num DataFrame com as
+    colunas 'comissao', 'gorjeta', 'valor_dia' e 'pagamento_fixo' (NaN sem
+    pagamento fixo) e o índice de categoria.
+    """
+    regras = regras or _REGRAS_COMPILADAS
+    posicoes = _posicoes_das_regras(categoria, regras)
+    return pd.DataFrame({
+        'comissao': regras.comissao[posicoes],
+        'gorjeta': regras.gorjeta[posicoes],
+        'valor_dia': regras.valor_dia[posicoes],
+        'pagamento_fixo': regras.pagamento_fixo[posicoes],
+    }, index=categoria.index)
 
 def calcular_pagamento_individual(row, weekly_data):
-    """Calcula o pagamento individual de cada atendimento"""
+    """Calcula o pagamento individual de cada atendimento (referência linha a linha, em dólares)"""
     tech_week_data = weekly_data[
         (weekly_data['Nome'] == row['Nome']) &
         (weekly_data['Semana'] == row['Semana'])
@@ -28,26 +91,124 @@ def calcular_pagamento_individual(row, weekly_data):
 
 
 def calcular_pagamento_semanal(row):
-    """Calcula o pagamento semanal baseado na categoria"""
-    categoria = row['Categoria']
+    """Calcula o pagamento semanal baseado na categoria (ver REGRAS_COMISSAO), em dólares"""
+    regra = regra_da_categoria(row['Categoria'])
     servico = row['Serviço']
     gorjeta = row['Gorjeta']
     dias_trabalhados = row['Dias Trabalhados']
 
-    if categoria == 'Registering':
-        pagamento = 0.00
-        lucro = servico + gorjeta
-    elif categoria in ['Technician', 'Started']:
-        pagamento = servico * 0.20 + gorjeta
-        lucro = servico * 0.80
-    elif categoria == 'Training':
-        pagamento = 80 * dias_trabalhados  # $80 por dia trabalhado
-        lucro = servico + gorjeta - pagamento
-    elif categoria == 'Coordinator':
-        pagamento = servico * 0.25 + gorjeta
-        lucro = servico * 0.75
-    else:
-        pagamento = 0
-        lucro = servico + gorjeta
+    # Cada parcela só entra quando a regra a usa, para que um valor em falta
+    # numa parcela não usada não torne o resultado NaN
+    parcela_servico = servico * (regra['comissao'] / 100) if regra['comissao'] else 0.0
+    parcela_dias = dias_trabalhados * regra['valor_dia'] if regra['valor_dia'] else 0.0
+    pagamento = parcela_servico + (gorjeta if regra['gorjeta'] else 0.0) + parcela_dias
+
+    lucro_servico = servico * ((100 - regra['comissao']) / 100) if regra['comissao'] else servico
+    lucro = lucro_servico + (0.0 if regra['gorjeta'] else gorjeta) - parcela_dias
 
     return pd.Series([pagamento, lucro])
+
+
+def calcular_pagamentos_semanais(weekly_totals, regras=None):
+    """
+    Versão vetorizada de calcular_pagamento_semanal: calcula o pagamento do
+    técnico e o lucro da empresa de todas as linhas de uma vez, com as regras
+    compiladas de REGRAS_COMISSAO (ou as regras indicadas, ver
+    compilar_regras). 'Serviço' e 'Gorjeta' estão em cêntimos (ver
+    modules/money.py); a comissão é arredondada ao cêntimo e o lucro do
+    serviço é o restante, pelo que pagamento e lucro somam exatamente o
+    serviço e a gorjeta. Retorna um DataFrame com as colunas
+    'Pagamento Tecnico' e 'Lucro Empresa' em cêntimos e o índice de
+    weekly_totals.
+    """
+    regras = regras or _REGRAS_COMPILADAS
+    posicoes = _posicoes_das_regras(weekly_totals['Categoria'], regras)
+    servico = weekly_totals['Serviço'].to_numpy(dtype=float, na_value=np.nan)
+    gorjeta = weekly_totals['Gorjeta'].to_numpy(dtype=float, na_value=np.nan)
+    dias_trabalhados = weekly_totals['Dias Trabalhados'].to_numpy(dtype=float, na_value=np.nan)
+
+    comissao = regras.comissao[posicoes] != 0
+    repassa_gorjeta = regras.gorjeta[posicoes]
+    valor_dia = regras.valor_dia[posicoes]
+
+    parcela_servico = np.where(comissao, round_cents(servico * regras.taxa[posicoes]), 0.0)
+    parcela_dias = np.where(valor_dia != 0, round_cents(dias_trabalhados * valor_dia * 100), 0.0)
+    pagamento = parcela_servico + np.where(repassa_gorjeta, gorjeta, 0.0) + parcela_dias
+
+    lucro_servico = servico - parcela_servico
+    lucro = lucro_servico + np.where(repassa_gorjeta, 0.0, gorjeta) - parcela_dias
+
+    return pd.DataFrame({'Pagamento Tecnico': pagamento, 'Lucro Empresa': lucro},
+                        index=weekly_totals.index).astype(CENTS_DTYPE)
+
+
+def totais_por_tecnico_semana(weekly_data):
+    """
+    Uma linha por técnico e semana de weekly_data, com o pagamento da
+    primeira linha do grupo ('Pagamento Tecnico') e a soma dos serviços de
+    todas as suas categorias ('Total Serviço'), como em
+    calcular_pagamento_individual. Os valores estão em cêntimos inteiros,
+    pelo que a soma é exata em qualquer ordem.
+    """
+    codigos = weekly_data.groupby(['Nome', 'Semana'], observed=True, sort=False).ngroup()
+    validos = codigos.notna().to_numpy()
+    codigos = codigos.to_numpy()[validos].astype(np.int64)
+    if len(codigos) == 0:
+        return pd.DataFrame(columns=['Nome', 'Semana', 'Pagamento Tecnico', 'Total Serviço'])
+
+    linhas = np.flatnonzero(validos)
+    _, primeiras = np.unique(codigos, return_index=True)
+    primeiras = linhas[primeiras]
+
+    servico = weekly_data['Serviço'].to_numpy(dtype=np.int64, na_value=0)[validos]
+    total_servico = np.zeros(codigos.max() + 1, dtype=np.int64)
+    np.add.at(total_servico, codigos, servico)
+
+    totais = weekly_data.iloc[primeiras][['Nome', 'Semana']].reset_index(drop=True)
+    if 'Pagamento Tecnico' in weekly_data.columns:
+        totais['Pagamento Tecnico'] = weekly_data['Pagamento Tecnico'].to_numpy(dtype=float, na_value=np.nan)[primeiras]
+    else:
+        totais['Pagamento Tecnico'] = 0.0
+    totais['Total Serviço'] = total_servico
+    return totais
+
+
+def calcular_pagamentos_individuais(services, weekly_data):
+    """
+    Versão vetorizada de calcular_pagamento_individual: reparte o pagamento
+    semanal de cada técnico pelos seus atendimentos, na proporção do valor
+    do serviço, com um único join por técnico e semana. Atendimentos sem
+    semana correspondente ou de semanas sem serviços ficam sem pagamento.
+
+    Os valores estão em cêntimos: cada atendimento recebe a diferença entre
+    as partes arredondadas do pagamento acumulado até si e até ao anterior
+    do mesmo técnico e semana, pelo que as partes somam exatamente o
+    pagamento semanal. Por isso não coincide exatamente com a referência
+    calcular_pagamento_individual, que dá a parte exata com frações de
+    cêntimo: cada atendimento fica a menos de um cêntimo dela (é a parte
+    exata arredondada para baixo ou para cima). Retorna um DataFrame com as
+    colunas 'Pagamento Tecnico' e 'Lucro Empresa' em cêntimos e o índice de
+    services.
+    """
+    totais = totais_por_tecnico_semana(weekly_data)
+    semana = services[['Nome', 'Semana']].merge(totais, on=['Nome', 'Semana'], how='left')
+
+    servico = services['Serviço'].to_numpy(dtype=float, na_value=np.nan)
+    gorjeta = services['Gorjeta'].to_numpy(dtype=float, na_value=np.nan)
+    total_servico = semana['Total Serviço'].to_numpy(dtype=float, na_value=np.nan)
+    total_pagamento = semana['Pagamento Tecnico'].to_numpy(dtype=float, na_value=np.nan)
+
+    # Serviço acumulado de cada técnico e semana, pela ordem dos atendimentos
+    grupos = services.groupby(['Nome', 'Semana'], observed=True, sort=False).ngroup().to_numpy()
+    acumulado = pd.Series(np.nan_to_num(servico)).groupby(grupos).cumsum().to_numpy()
+
+    com_servicos = ~np.isnan(total_servico) & (total_servico != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taxa = total_pagamento / total_servico
+        pagamento = round_cents(acumulado * taxa) - round_cents((acumulado - np.nan_to_num(servico)) * taxa)
+    pagamento = np.where(np.isnan(servico), np.nan, pagamento)
+    pagamento = np.where(com_servicos, pagamento, 0.0)
+    lucro = np.where(com_servicos, servico + gorjeta - pagamento, servico + gorjeta)
+
+    return pd.DataFrame({'Pagamento Tecnico': pagamento, 'Lucro Empresa': lucro},
+                        index=services.index).astype(CENTS_DTYPE)
@@ -3,4 +3,69 @@ FORMAS_PAGAMENTO_VALIDAS = [
     'Master Card', 'Visa', 'Zelle', 'Cash', 'Invoice'
 ]
 
-INVALID_CLIENTS = ['SERVICES IN:', 'BNS PROFIT:', 'Total']
\ No newline at end of file
+INVALID_CLIENTS = ['SERVICES IN:', 'BNS PROFIT:', 'Total']
+
+# Regras de pagamento por categoria (ver modules/calculations.py):
+# - comissao: percentagem do valor dos serviços paga ao técnico
+# - gorjeta: se as gorjetas são repassadas ao técnico
+# - valor_dia: valor pago por dia trabalhado
+# - pagamento_fixo: pagamento fixo sugerido por omissão no payroll
+# Categorias que não aparecem aqui não recebem pagamento: o valor dos
+# serviços e das gorjetas fica todo como lucro da empresa.
+REGRAS_COMISSAO = {
+    'Technician': {'comissao': 20, 'gorjeta': True, 'valor_dia': 0, 'pagamento_fixo': None},
+    'Started': {'comissao': 20, 'gorjeta': True, 'valor_dia': 0, 'pagamento_fixo': None},
+    'Training': {'comissao': 0, 'gorjeta': False, 'valor_dia': 80, 'pagamento_fixo': None},
+    'Coordinator': {'comissao': 25, 'gorjeta': True, 'valor_dia': 0, 'pagamento_fixo': None},
+    'Registering': {'comissao': 0, 'gorjeta': False, 'valor_dia': 0, 'pagamento_fixo': None},
+    'Starter': {'comissao': 0, 'gorjeta': False, 'valor_dia': 0, 'pagamento_fixo': 900.00},
+}
+
+# Pagamentos fixos disponíveis no payroll, além dos definidos nas regras
+PAGAMENTOS_FIXOS = [750.00, 900.00]
+
+# Cache persistente das planilhas já processadas (ver modules/parse_cache.py)
+PARSE_CACHE_DIR = '.parse_cache'
+PARSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Número de processos usados para processar várias planilhas em paralelo
+# (None usa todos os núcleos disponíveis; 1 desativa o paralelismo)
+INGESTION_MAX_WORKERS = None
+
+# Conjunto de dados pré-processado pela linha de comandos (ver modules/ingestion.py),
+# carregado pela aplicação quando não há planilhas do Drive nem carregadas
+INGESTION_DATASET_DIR = 'parsed_dataset'
+
+# Downloads do Google Drive: threads em paralelo (1 desativa o paralelismo),
+# tentativas extra por ficheiro em erros temporários e espera base em segundos
+DRIVE_DOWNLOAD_WORKERS = 8
+DRIVE_DOWNLOAD_RETRIES = 3
+DRIVE_RETRY_BACKOFF = 1.0
+
+# Listagem das pastas do Google Drive: pastas juntas numa só consulta e
+# resultados por página (máximo da API: 1000)
+DRIVE_PARENTS_PER_QUERY = 40
+DRIVE_PAGE_SIZE = 1000
+
+# Espelho local das pastas do Google Drive: só os ficheiros alterados são
+# descarregados em cada sincronização (None usa um diretório temporário que
+# dura apenas enquanto a aplicação corre)
+DRIVE_MIRROR_DIR = '.drive_mirror'
+# Tamanho máximo do espelho; as planilhas usadas há mais tempo são removidas
+DRIVE_MIRROR_MAX_BYTES = 512 * 1024 * 1024
+
+# Planilhas descarregadas que podem esperar pelo processamento ao mesmo tempo
+# (download e processamento em simultâneo, ver iter_processed_files)
+PIPELINE_QUEUE_SIZE = 4
+
+# Seleções dos filtros da barra lateral cujas linhas filtradas ficam
+# guardadas com o índice do conjunto de dados (ver modules/filter_index.py)
+FILTER_CACHE_SIZE = 8
+
+# Resultados derivados da página de Análises Financeiras guardados na sessão,
+# por conjunto de dados e seleção dos filtros (ver modules/derived_results.py)
+DERIVED_CACHE_SIZE = 8
+
+# PDFs dos botões de download já gerados, guardados pelo conteúdo dos dados
+# de que foram gerados (ver modules/pdf_cache.py)
+PDF_CACHE_SIZE = 16
\ No newline at end of file
@@ -1,163 +1,525 @@
+import os
+import queue
+import threading
+import multiprocessing
 import pandas as pd
-import numpy as np
 from io import BytesIO
+from itertools import repeat
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import requests
-import streamlit as st
-from .config import INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS
+from .config import INVALID_CLIENTS, INGESTION_MAX_WORKERS, PIPELINE_QUEUE_SIZE
+from openpyxl import load_workbook
+from .sheet_parser import parse_week_sheet, parse_week_sheet_loop, stream_week_sheet, RECORD_COLUMNS
+from .money import to_cents
+from .parse_cache import cache_key, sheet_cache_key, load_cached_frame, store_cached_frame
+from .xlsx_fingerprint import sheet_fingerprints, workbook_sheet_names
 
-def process_spreadsheet(file):
+# Motores disponíveis para extrair os atendimentos de cada folha WEEK
+PARSER_ENGINES = {
+    'vectorized': parse_week_sheet,
+    'loop': parse_week_sheet_loop,
+}
+
+# Motor que lê as folhas linha a linha com o openpyxl, sem pd.read_excel
+STREAMING_ENGINE = 'streaming'
+
+
+# Mensagem emitida durante o processamento: nível ('info', 'warning' ou
+# 'error'), texto e, quando se aplica, a folha a que se refere
+Diagnostic = namedtuple('Diagnostic', ['level', 'message', 'sheet'], defaults=[None])
+
+# Quando definido, as mensagens para a interface são acumuladas aqui em vez de
+# serem mostradas diretamente (ex.: processamento num processo separado)
+_collected_messages = None
+
+
+def notify(level, message, sheet=None):
+    """Mostra uma mensagem na interface (st.info/st.warning/st.error) ou acumula-a."""
+    if _collected_messages is not None:
+        _collected_messages.append(Diagnostic(level, message, sheet))
+    else:
+        # Importado só aqui para que o processamento não dependa do Streamlit
+        import streamlit as st
+        getattr(st, level)(message)
+
+
+@contextmanager
+def collect_messages():
+    """Acumula numa lista de Diagnostic as mensagens emitidas com notify dentro do bloco."""
+    global _collected_messages
+    previous = _collected_messages
+    _collected_messages = []
+    try:
+        yield _collected_messages
+    finally:
+        _collected_messages = previous
+
+
+def read_file_content(file):
+    """Lê os bytes de um caminho, BytesIO ou ficheiro carregado no Streamlit."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            return f.read()
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    file.seek(0)
+    content = file.read()
+    file.seek(0)
+    return content
+
+
+def list_week_sheets(files):
+    """
+    Primeira fase do carregamento: nomes das folhas WEEK de todas as
+    planilhas, sem repetições e pela ordem em que aparecem, sem processar
+    nenhuma folha.
+    """
+    week_sheets = {}
+    for file in files:
+        try:
+            content = read_file_content(file)
+        except Exception:
+            continue
+        sheet_names = workbook_sheet_names(content)
+        if sheet_names is None:
+            try:
+                sheet_names = pd.ExcelFile(BytesIO(content)).sheet_names
+            except Exception:
+                continue
+        for sheet_name in sheet_names:
+            if sheet_name.startswith('WEEK'):
+                week_sheets[sheet_name] = True
+    return list(week_sheets)
+
+
+def process_spreadsheet(file, engine='vectorized', use_cache=True, sheet_workers=1, weeks=None):
     """
     Processa um ficheiro de planilha Excel para extrair dados financeiros.
     Aceita um objeto de ficheiro ou uma URL direta.
+
+    O parâmetro engine escolhe o motor de extração das folhas WEEK:
+    'vectorized' (padrão), 'loop' (implementação linha a linha original) ou
+    'streaming' (leitura em fluxo com o openpyxl, menor pico de memória).
+    Com use_cache, ficheiros cujo conteúdo já foi processado são servidos
+    do cache em Parquet sem voltar a abrir o Excel; num ficheiro alterado,
+    só as folhas WEEK novas ou modificadas são processadas de novo.
+    sheet_workers controla o processamento paralelo das folhas WEEK (ver
+    parse_workbook). Com weeks, só as folhas WEEK indicadas são processadas.
     """
-    all_weeks_data = {}
-    
     # Lida com URLs e ficheiros carregados
     if isinstance(file, str) and file.startswith('http'):
         try:
             response = requests.get(file)
             file = BytesIO(response.content)
         except requests.exceptions.RequestException as e:
-            st.error(f"Erro ao carregar planilha do URL: {e}")
+            notify('error', f"Erro ao carregar planilha do URL: {e}")
             return pd.DataFrame()
-    elif isinstance(file, BytesIO):
-        file.seek(0)
-    
+
     try:
-        xls = pd.ExcelFile(file)
+        content = read_file_content(file)
     except Exception as e:
-        st.warning(f"Não foi possível ler o ficheiro Excel. Verifique se ele não está corrompido ou vazio. Erro: {e}")
+        notify('warning', f"Não foi possível ler o ficheiro Excel. Verifique se ele não está corrompido ou vazio. Erro: {e}")
         return pd.DataFrame()
 
-    for sheet_name in xls.sheet_names:
-        if sheet_name.startswith('WEEK'):
-            try:
-                df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-            except Exception as e:
-                st.warning(f"Erro ao ler a folha '{sheet_name}'. Ignorando... Erro: {e}")
-                continue
+    if use_cache:
+        cached_data = load_cached_spreadsheet(content, weeks)
+        if cached_data is not None:
+            return cached_data
 
-            # Se a planilha estiver vazia, ignora-a.
-            if df.empty:
-                st.info(f"A folha '{sheet_name}' está vazia e será ignorada.")
-                continue
+    combined_data = parse_workbook(BytesIO(content), engine, sheet_workers, use_cache, weeks)
+
+    # O cache do ficheiro inteiro só serve quando todas as semanas são pedidas;
+    # com um subconjunto, as folhas já processadas vêm do cache por folha
+    if use_cache and weeks is None and not combined_data.empty:
+        store_cached_frame(cache_key(content), combined_data)
+    return combined_data
+
+
+def load_cached_spreadsheet(content, weeks=None):
+    """
+    Resultado de process_spreadsheet servido só do cache, sem abrir o Excel:
+    a entrada do ficheiro inteiro quando todas as semanas são pedidas ou, se
+    não existir, as das folhas WEEK pedidas (nenhuma quando o ficheiro não
+    tem as semanas pedidas). Retorna None quando falta alguma folha no cache
+    (ex.: folhas novas, alteradas ou sem atendimentos).
+    """
+    if weeks is None:
+        cached_data = load_cached_frame(cache_key(content))
+        if cached_data is not None:
+            return cached_data
 
-            technician_blocks = []
-            current_block = []
-            collecting = False
-            for idx, row in df.iterrows():
-                if any('NAME:' in str(cell) for cell in row.values):
-                    if current_block:
-                        technician_blocks.append(current_block)
-                        current_block = []
-                    collecting = True
-                if collecting:
-                    current_block.append(row)
-            if current_block:
-                technician_blocks.append(current_block)
-
-            week_data = []
-            for block in technician_blocks:
-                name_row = next((row for row in block if any('NAME:' in str(cell) for cell in row.values)), None)
-
-                if name_row is None:
-                    continue
-                
-                # Procura a coluna "NAME:" para garantir que o acesso é seguro
-                name_col_idx = -1
-                for i, cell in enumerate(name_row.values):
-                    if isinstance(cell, str) and 'NAME:' in cell:
-                        name_col_idx = i
-                        break
-                
-                if name_col_idx == -1 or len(name_row) <= name_col_idx + 1:
-                    continue
-
-                technician_info = {
-                    'Semana': sheet_name,
-                    'Nome': name_row[name_col_idx + 1] if len(name_row) > name_col_idx + 1 else None,
-                    'Categoria': name_row[name_col_idx + 3] if len(name_row) > name_col_idx + 3 else None,
-                    'Origem': name_row[name_col_idx + 5] if len(name_row) > name_col_idx + 5 and 'From:' in str(
-                        name_row[name_col_idx + 4]) else None
-                }
-
-                header_row_idx = next((i for i, row in enumerate(block) if all(
-                    keyword in str(row.values) for keyword in ['Schedule', 'DATE', 'SERVICE'])), None)
-                if header_row_idx is None:
-                    continue
-
-                days_data = []
-                for i in range(header_row_idx + 1, len(block)):
-                    day_row = block[i]
-                    for day_idx, day_col in enumerate(
-                            [(1, 9), (10, 18), (19, 27), (28, 36), (37, 45), (46, 54), (55, 63)]):
-                        start_col, end_col = day_col
-                        # Garante que as colunas existem antes de aceder
-                        if len(day_row) <= end_col:
-                            continue
-                        
-                        day_data = day_row[start_col:end_col + 1].values
-                        client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
-
-                        if not client_name or client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                            continue
-                        
-                        # Verifica se a coluna de serviço e gorjeta existem
-                        if len(day_data) > 2 and pd.notna(day_data[2]) and str(day_data[2]).strip() and str(day_data[2]).strip() != 'nan':
-                            try:
-                                service_value = float(day_data[2])
-                            except (ValueError, TypeError):
-                                service_value = np.nan
-                            
-                            if not np.isnan(service_value):
-                                pagamento = day_data[5] if len(day_data) > 5 and pd.notna(day_data[5]) and str(
-                                    day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
-                                tip_value = float(day_data[3]) if len(day_data) > 3 and pd.notna(day_data[3]) else 0
-                                day_info = {
-                                    'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][
-                                        day_idx],
-                                    'Data': day_data[1],
-                                    'Cliente': client_name,
-                                    'Serviço': service_value,
-                                    'Gorjeta': tip_value,
-                                    'Pets': day_data[4] if len(day_data) > 4 and pd.notna(day_data[4]) else 0,
-                                    'Pagamento': pagamento,
-                                    'ID Pagamento': day_data[6] if len(day_data) > 6 and pd.notna(day_data[6]) else None,
-                                    'Verificado': day_data[7] if len(day_data) > 7 and pd.notna(day_data[7]) else False,
-                                    'Realizado': True
-                                }
-                                days_data.append({**technician_info, **day_info})
-                        elif pd.notna(day_data[0]):
-                            if client_name.upper() in [c.upper() for c in INVALID_CLIENTS]:
-                                continue
-                            day_info = {
-                                'Dia': ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'][day_idx],
-                                'Data': day_data[1],
-                                'Cliente': client_name,
-                                'Serviço': 0,
-                                'Gorjeta': 0,
-                                'Pets': 0,
-                                'Pagamento': None,
-                                'ID Pagamento': None,
-                                'Verificado': False,
-                                'Realizado': False
-                            }
-                            days_data.append({**technician_info, **day_info})
-
-                week_data.extend(days_data)
-            if week_data:
-                all_weeks_data[sheet_name] = pd.DataFrame(week_data)
-
-    if all_weeks_data:
-        combined_data = pd.concat(all_weeks_data.values(), ignore_index=True)
+    sheet_names = workbook_sheet_names(content)
+    if sheet_names is None:
+        return None
+    week_sheets = select_week_sheets(sheet_names, weeks)
+    cached_sheets, _ = load_cached_sheets(content, week_sheets)
+    if len(cached_sheets) < len(week_sheets):
+        return None
+    return consolidate_weeks([cached_sheets[sheet_name] for sheet_name in week_sheets])
+
+
+def read_week_sheet(xls, sheet_name, engine='vectorized'):
+    """
+    Lê e processa uma única folha WEEK de um ficheiro Excel já aberto.
+    Retorna None quando a folha é ignorada ou não tem atendimentos.
+    """
+    try:
+        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+    except Exception as e:
+        notify('warning', f"Erro ao ler a folha '{sheet_name}'. Ignorando... Erro: {e}", sheet_name)
+        return None
+
+    # Se a planilha estiver vazia, ignora-a.
+    if df.empty:
+        notify('info', f"A folha '{sheet_name}' está vazia e será ignorada.", sheet_name)
+        return None
+
+    week_data = PARSER_ENGINES[engine](df, sheet_name)
+    if week_data.empty:
+        return None
+    return week_data
+
+
+def consolidate_weeks(weeks_data):
+    """Junta os DataFrames das folhas WEEK e normaliza os tipos das colunas."""
+    if weeks_data:
+        combined_data = pd.concat(weeks_data, ignore_index=True)
         combined_data['Data'] = pd.to_datetime(combined_data['Data'], errors='coerce')
-        combined_data['Serviço'] = pd.to_numeric(combined_data['Serviço'], errors='coerce')
-        combined_data['Gorjeta'] = pd.to_numeric(combined_data['Gorjeta'], errors='coerce').fillna(0)
+        # Valores em cêntimos inteiros (ver modules/money.py)
+        combined_data['Serviço'] = to_cents(combined_data['Serviço'])
+        combined_data['Gorjeta'] = to_cents(combined_data['Gorjeta']).fillna(0)
         combined_data['Pets'] = pd.to_numeric(combined_data['Pets'], errors='coerce').fillna(0)
         combined_data = combined_data.dropna(subset=['Data'])
         combined_data = combined_data[
             ~combined_data['Cliente'].astype(str).str.strip().str.upper().isin([c.upper() for c in INVALID_CLIENTS])]
         return combined_data
     
-    st.warning("Nenhum dado válido foi encontrado nas planilhas processadas.")
+    notify('warning', "Nenhum dado válido foi encontrado nas planilhas processadas.")
     return pd.DataFrame()
+
+
+def select_week_sheets(sheet_names, weeks=None):
+    """Folhas WEEK a processar, opcionalmente restritas às semanas pedidas."""
+    return [
+        sheet_name for sheet_name in sheet_names
+        if sheet_name.startswith('WEEK') and (weeks is None or sheet_name in weeks)
+    ]
+
+
+def load_cached_sheets(content, week_sheets):
+    """
+    Procura no cache as folhas WEEK cujo conteúdo já foi processado, mesmo que
+    noutra versão do ficheiro. Retorna ({folha: DataFrame} das folhas
+    encontradas, {folha: chave do cache} de todas as folhas com fingerprint).
+    """
+    fingerprints = sheet_fingerprints(content)
+    sheet_keys = {
+        sheet_name: sheet_cache_key(sheet_name, fingerprints[sheet_name])
+        for sheet_name in week_sheets if sheet_name in fingerprints
+    }
+    cached_sheets = {}
+    for sheet_name, key in sheet_keys.items():
+        week_data = load_cached_frame(key)
+        if week_data is not None:
+            cached_sheets[sheet_name] = week_data
+    return cached_sheets, sheet_keys
+
+
+def store_parsed_sheet(sheet_keys, sheet_name, week_data):
+    """Guarda no cache o resultado de uma folha acabada de processar."""
+    if week_data is not None and sheet_name in sheet_keys:
+        store_cached_frame(sheet_keys[sheet_name], week_data)
+
+
+def parse_workbook(file, engine='vectorized', sheet_workers=1, use_cache=False, weeks=None):
+    """
+    Lê todas as folhas WEEK de um ficheiro Excel e consolida os atendimentos.
+    Com sheet_workers diferente de 1, cada folha é processada como uma tarefa
+    independente num pool de processos (None usa todos os núcleos). O motor
+    'streaming' lê sempre as folhas sequencialmente. Com use_cache, as folhas
+    cujo conteúdo não mudou são lidas do cache em vez de processadas. weeks
+    restringe as folhas WEEK lidas (None lê todas).
+    """
+    if engine == STREAMING_ENGINE:
+        return parse_workbook_streaming(file, use_cache, weeks)
+
+    try:
+        xls = pd.ExcelFile(file)
+    except Exception as e:
+        notify('warning', f"Não foi possível ler o ficheiro Excel. Verifique se ele não está corrompido ou vazio. Erro: {e}")
+        return pd.DataFrame()
+
+    week_sheets = select_week_sheets(xls.sheet_names, weeks)
+    sheet_results, sheet_keys = load_cached_sheets(read_file_content(file), week_sheets) if use_cache else ({}, {})
+    pending_sheets = [sheet_name for sheet_name in week_sheets if sheet_name not in sheet_results]
+
+    if sheet_workers != 1 and len(pending_sheets) > 1:
+        parsed_sheets = _read_week_sheets_parallel(read_file_content(file), pending_sheets, engine, sheet_workers)
+    else:
+        parsed_sheets = [read_week_sheet(xls, sheet_name, engine) for sheet_name in pending_sheets]
+
+    for sheet_name, week_data in zip(pending_sheets, parsed_sheets):
+        sheet_results[sheet_name] = week_data
+        store_parsed_sheet(sheet_keys, sheet_name, week_data)
+
+    return consolidate_weeks([sheet_results[sheet_name] for sheet_name in week_sheets
+                              if sheet_results[sheet_name] is not None])
+
+
+def parse_workbook_streaming(file, use_cache=False, weeks=None):
+    """
+    Lê as folhas WEEK em modo read_only/values_only do openpyxl. As linhas
+    passam por geradores (blocos de técnicos -> registos de dias), sem montar
+    o DataFrame de cada folha; os registos extraídos de cada folha viram logo
+    um DataFrame compacto e a consolidação é feita uma única vez, no fim.
+
+    O resultado é o mesmo de parse_workbook, exceto em colunas sem qualquer
+    texto, onde o pd.read_excel converteria os números para float.
+    """
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    except Exception as e:
+        notify('warning', f"Não foi possível ler o ficheiro Excel. Verifique se ele não está corrompido ou vazio. Erro: {e}")
+        return pd.DataFrame()
+
+    week_sheets = select_week_sheets(workbook.sheetnames, weeks)
+    cached_sheets, sheet_keys = load_cached_sheets(read_file_content(file), week_sheets) if use_cache else ({}, {})
+
+    weeks_records = []
+    try:
+        for sheet_name in week_sheets:
+            if sheet_name in cached_sheets:
+                weeks_records.append(cached_sheets[sheet_name])
+                continue
+
+            try:
+                worksheet = workbook[sheet_name]
+                worksheet.reset_dimensions()
+                records = stream_week_sheet(worksheet.iter_rows(values_only=True), sheet_name)
+            except Exception as e:
+                notify('warning', f"Erro ao ler a folha '{sheet_name}'. Ignorando... Erro: {e}", sheet_name)
+                continue
+
+            if records is None:
+                notify('info', f"A folha '{sheet_name}' está vazia e será ignorada.", sheet_name)
+            elif records:
+                week_data = pd.DataFrame(records, columns=RECORD_COLUMNS)
+                store_parsed_sheet(sheet_keys, sheet_name, week_data)
+                weeks_records.append(week_data)
+    finally:
+        workbook.close()
+
+    return consolidate_weeks(weeks_records)
+
+
+def _process_pool(max_workers, n_tasks, initializer=None, initargs=()):
+    """Cria um pool de processos com no máximo um processo por tarefa."""
+    max_workers = min(max_workers or os.cpu_count() or 1, n_tasks)
+    # 'spawn' evita copiar por fork as threads do servidor Streamlit
+    context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                               initializer=initializer, initargs=initargs)
+
+
+# Ficheiro Excel aberto uma única vez em cada processo do pool de folhas
+_worker_workbook = None
+
+
+def _init_sheet_worker(content):
+    global _worker_workbook
+    _worker_workbook = pd.ExcelFile(BytesIO(content))
+
+
+def _read_sheet_in_worker(sheet_name, engine):
+    with collect_messages() as messages:
+        week_data = read_week_sheet(_worker_workbook, sheet_name, engine)
+    return week_data, messages
+
+
+def _read_week_sheets_parallel(content, week_sheets, engine, max_workers):
+    """Processa as folhas WEEK em paralelo, mantendo a ordem das folhas no ficheiro."""
+    with _process_pool(max_workers, len(week_sheets), _init_sheet_worker, (content,)) as executor:
+        results = list(executor.map(_read_sheet_in_worker, week_sheets, repeat(engine)))
+
+    sheet_results = []
+    for week_data, messages in results:
+        for diagnostic in messages:
+            notify(*diagnostic)
+        sheet_results.append(week_data)
+    return sheet_results
+
+
+def _worker_payload(file):
+    """Caminhos vão tal como estão para o pool (cada processo lê o ficheiro); o resto vai como bytes."""
+    if isinstance(file, (str, os.PathLike)):
+        return file
+    return read_file_content(file)
+
+
+def _process_in_worker(payload, engine, weeks):
+    """Executado em cada processo do pool: devolve o DataFrame e as mensagens geradas."""
+    file = payload if isinstance(payload, (str, os.PathLike)) else BytesIO(payload)
+    with collect_messages() as messages:
+        data = process_spreadsheet(file, engine=engine, weeks=weeks)
+    return data, messages
+
+
+def _load_cached_file(file, weeks):
+    """Resultado de um ficheiro servido só do cache (ver load_cached_spreadsheet), ou None."""
+    if isinstance(file, str) and file.startswith('http'):
+        return None
+    try:
+        content = read_file_content(file)
+    except Exception:
+        return None
+    return load_cached_spreadsheet(content, weeks)
+
+
+def process_files(files, max_workers=INGESTION_MAX_WORKERS, engine='vectorized', weeks=None):
+    """
+    Processa várias planilhas sem interface, num pool de processos.
+
+    Retorna, na mesma ordem de files, um par (DataFrame, [Diagnostic]) por
+    ficheiro, com as mensagens emitidas durante o seu processamento. Os
+    ficheiros cujas semanas pedidas já estão todas no cache são servidos no
+    processo atual, e o pool só é criado para os restantes. Com max_workers=1
+    tudo corre no processo atual; com um único ficheiro por processar, são as
+    suas folhas WEEK que são processadas em paralelo. weeks restringe as
+    semanas processadas (ver process_spreadsheet).
+    """
+    results = [None] * len(files)
+    if max_workers != 1 and len(files) > 1:
+        # Criar o pool custa mais do que ler do cache os ficheiros já processados
+        for index, file in enumerate(files):
+            with collect_messages() as messages:
+                cached_data = _load_cached_file(file, weeks)
+            if cached_data is not None:
+                results[index] = (cached_data, messages)
+    pending = [index for index, result in enumerate(results) if result is None]
+
+    if max_workers == 1 or len(pending) <= 1:
+        # Com um único ficheiro, o paralelismo passa para as folhas WEEK
+        for index in pending:
+            with collect_messages() as messages:
+                data = process_spreadsheet(files[index], engine=engine, sheet_workers=max_workers, weeks=weeks)
+            results[index] = (data, messages)
+        return results
+
+    payloads = [_worker_payload(files[index]) for index in pending]
+
+    with _process_pool(max_workers, len(payloads)) as executor:
+        for index, result in zip(pending, executor.map(_process_in_worker, payloads, repeat(engine), repeat(weeks))):
+            results[index] = result
+    return results
+
+
+# Marcadores da fila entre o produtor de ficheiros e o processamento
+_STREAM_END = 'end'
+_STREAM_ERROR = 'error'
+_STREAM_FILE = 'file'
+# Intervalo (s) com que o consumidor alterna entre a fila e os resultados do pool
+_STREAM_POLL = 0.05
+
+
+def _produce_files(source, items, stop):
+    """Thread produtora: passa os pares (índice, ficheiro) de source para a fila limitada items."""
+    def put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=_STREAM_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for entry in source:
+            if not put((_STREAM_FILE, entry)):
+                return
+    except Exception as e:
+        put((_STREAM_ERROR, e))
+        return
+    put((_STREAM_END, None))
+
+
+def iter_processed_files(source, max_workers=INGESTION_MAX_WORKERS, engine='vectorized', weeks=None,
+                         queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Processa as planilhas à medida que vão chegando, sem interface.
+
+    source é um iterável de pares (índice, ficheiro) — por exemplo, os
+    downloads do Drive pela ordem em que terminam — consumido numa thread
+    produtora que os coloca numa fila com no máximo queue_size ficheiros à
+    espera: quando o processamento é mais lento, os ficheiros não se acumulam
+    em memória. Cada ficheiro é processado assim que chega, num pool de
+    processos (no processo atual com max_workers=1), e o gerador entrega
+    (índice, DataFrame, [Diagnostic]) pela ordem em que terminam. Um erro do
+    produtor é relançado aqui.
+    """
+    items = queue.Queue(maxsize=max(queue_size, 1))
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce_files, args=(source, items, stop), daemon=True)
+    producer.start()
+
+    try:
+        if max_workers == 1:
+            while True:
+                kind, entry = items.get()
+                if kind == _STREAM_END:
+                    return
+                if kind == _STREAM_ERROR:
+                    raise entry
+                index, file = entry
+                with collect_messages() as messages:
+                    data = process_spreadsheet(file, engine=engine, weeks=weeks)
+                yield index, data, messages
+
+        n_workers = max_workers or os.cpu_count() or 1
+        with _process_pool(n_workers, n_workers) as executor:
+            pending = {}
+            finished = False
+            try:
+                while not finished or pending:
+                    accepting = not finished and len(pending) < n_workers
+                    if accepting:
+                        try:
+                            kind, entry = items.get(timeout=_STREAM_POLL if pending else None)
+                        except queue.Empty:
+                            kind = None
+                        if kind == _STREAM_END:
+                            finished = True
+                        elif kind == _STREAM_ERROR:
+                            raise entry
+                        elif kind == _STREAM_FILE:
+                            index, file = entry
+                            future = executor.submit(_process_in_worker, _worker_payload(file), engine, weeks)
+                            pending[future] = index
+
+                    if pending:
+                        done, _ = wait(pending, timeout=0 if accepting else None, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            data, messages = future.result()
+                            yield pending.pop(future), data, messages
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        stop.set()
+
+
+def process_spreadsheets(files, max_workers=INGESTION_MAX_WORKERS, engine='vectorized', weeks=None):
+    """
+    Processa várias planilhas em paralelo (ver process_files).
+
+    Retorna a lista dos DataFrames não vazios na mesma ordem de files. As
+    mensagens emitidas no processamento de cada ficheiro são mostradas na
+    interface por essa mesma ordem.
+    """
+    all_dataframes = []
+    for data, messages in process_files(files, max_workers, engine, weeks):
+        for diagnostic in messages:
+            notify(*diagnostic)
+        if not data.empty:
+            all_dataframes.append(data)
+    return all_dataframes
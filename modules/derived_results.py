@@ -0,0 +1,117 @@
+"""
+Resultados derivados que a página de Análises Financeiras mostra (totais
+semanais com os pagamentos, repartição pelas células do cubo, resumos e
+gráficos), calculados de uma vez a partir dos dados filtrados. A aplicação
+guarda-os na sessão por conjunto de dados e seleção dos filtros (ver
+cached_result), pelo que as interações que não mudam os filtros não os
+voltam a calcular.
+"""
+from collections import namedtuple
+from modules.calculations import calcular_pagamentos_semanais, calcular_pagamentos_individuais
+from modules.config import FORMAS_PAGAMENTO_VALIDAS, DERIVED_CACHE_SIZE
+from modules.service_cube import cube_weekly_totals
+from modules.money import format_cents, to_dollars
+from modules.visualization import (
+    plot_weekly_evolution,
+    plot_weekly_payments,
+    plot_payment_methods_total,
+    plot_payment_methods_usage
+)
+
+# payment_summary e os gráficos das formas de pagamento ficam a None quando
+# não há pagamentos válidos
+FinancialSummary = namedtuple('FinancialSummary', [
+    'completed_services', 'not_completed', 'cube', 'weekly_totals',
+    'quantidade_pets', 'total_lucro', 'tech_summary', 'payment_summary',
+    'evolution_chart', 'payments_chart', 'payment_total_chart', 'payment_usage_chart',
+])
+
+
+def summarize_financials(data, cube):
+    """Calcula tudo o que a página de Análises Financeiras mostra de data e do seu cubo."""
+    completed_services = data[data['Realizado']]
+    not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
+
+    if 'Pets' in cube.columns:
+        quantidade_pets = cube['Pets'].sum()
+    else:
+        quantidade_pets = 0
+
+    weekly_totals = cube_weekly_totals(cube)
+    weekly_totals[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_semanais(weekly_totals)
+
+    # O pagamento semanal é repartido pelas células do cubo na proporção do valor dos serviços
+    cube = cube.copy()
+    cube[['Pagamento Tecnico', 'Lucro Empresa']] = calcular_pagamentos_individuais(cube, weekly_totals)
+    total_lucro = cube['Lucro Empresa'].sum()
+
+    tech_summary = weekly_totals.groupby(['Nome', 'Categoria'], observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Pagamento Tecnico': 'sum',
+        'Lucro Empresa': 'sum',
+        'Dia': 'sum',
+        'Dias Trabalhados': 'sum'
+    }).reset_index()
+
+    tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços',
+                            'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa',
+                            'Atendimentos', 'Dias Trabalhados']
+
+    tech_summary['Média Atendimento'] = tech_summary['Total Serviços'] / tech_summary['Atendimentos']
+    tech_summary['Gorjeta Média'] = tech_summary['Total Gorjetas'] / tech_summary['Atendimentos']
+
+    for col in ['Total Serviços', 'Total Gorjetas', 'Total Pagamento', 'Lucro Empresa',
+                'Média Atendimento', 'Gorjeta Média']:
+        tech_summary[col] = format_cents(tech_summary[col])
+
+    tech_summary = tech_summary.sort_values('Atendimentos', ascending=False)
+
+    payment_summary = payment_total_chart = payment_usage_chart = None
+    valid_payments = cube[cube['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
+
+    if not valid_payments.empty:
+        payment_summary = valid_payments.groupby('Pagamento', observed=True).agg({
+            'Serviço': 'sum',
+            'Gorjeta': 'sum',
+            'Clientes': 'sum'
+        }).reset_index().rename(columns={'Clientes': 'Qtd Usos'})
+
+        payment_summary['Total'] = payment_summary['Serviço'] + payment_summary['Gorjeta']
+        # A tabela e os gráficos mostram os valores em dólares
+        for col in ['Serviço', 'Gorjeta', 'Total']:
+            payment_summary[col] = to_dollars(payment_summary[col])
+        payment_summary['Percentual Uso'] = (payment_summary['Qtd Usos'] / payment_summary['Qtd Usos'].sum() * 100).round(2)
+
+        payment_total_chart = plot_payment_methods_total(payment_summary)
+        payment_usage_chart = plot_payment_methods_usage(payment_summary)
+
+    weekly_chart_data = weekly_totals.assign(**{
+        col: to_dollars(weekly_totals[col]) for col in ['Serviço', 'Pagamento Tecnico']
+    })
+
+    return FinancialSummary(
+        completed_services, not_completed, cube, weekly_totals,
+        quantidade_pets, total_lucro, tech_summary, payment_summary,
+        plot_weekly_evolution(weekly_chart_data), plot_weekly_payments(weekly_chart_data),
+        payment_total_chart, payment_usage_chart,
+    )
+
+
+def cached_result(store, key, compute, max_entries=DERIVED_CACHE_SIZE):
+    """
+    Valor guardado em store (um OrderedDict, ex.: na sessão do Streamlit)
+    para key, ou o resultado de compute(), que fica guardado. Ficam no
+    máximo max_entries valores; os usados há mais tempo saem primeiro.
+    Os valores guardados são partilhados entre execuções e não devem ser
+    alterados por quem os usa.
+    """
+    if key in store:
+        store.move_to_end(key)
+        return store[key]
+
+    value = compute()
+    store[key] = value
+    if len(store) > max_entries:
+        store.popitem(last=False)
+    return value
@@ -1,23 +1,96 @@
 import os
 import io
+import atexit
+import shutil
+import tempfile
+import time
+import random
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httplib2
 import streamlit as st
 import json
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
+from .config import (
+    DRIVE_DOWNLOAD_WORKERS,
+    DRIVE_DOWNLOAD_RETRIES,
+    DRIVE_RETRY_BACKOFF,
+    DRIVE_PARENTS_PER_QUERY,
+    DRIVE_PAGE_SIZE,
+    DRIVE_MIRROR_DIR,
+    DRIVE_MIRROR_MAX_BYTES,
+)
+from .drive_transport import build_drive_service
 
 # Se modificar os SCOPES, exclua o arquivo token.json.
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+GOOGLE_SHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Respostas da API que justificam repetir o download (limite de pedidos e erros do servidor)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Resultado da travessia de uma pasta: planilhas encontradas (itens da API),
+# número de pastas visitadas e de pedidos files().list feitos
+DriveCrawl = namedtuple('DriveCrawl', ['items', 'folders', 'api_calls'])
+
+# Resultado de fetch_drive_folder: pares (nome, BytesIO) e a travessia que os encontrou
+DriveFolder = namedtuple('DriveFolder', ['files', 'crawl'])
+
+# Resultado de stream_drive_folder: nomes das planilhas (ordem da travessia),
+# gerador de pares (índice, ficheiro) pela ordem em que ficam disponíveis, ids
+# a descarregar, ids removidos do espelho e a travessia
+DriveStream = namedtuple('DriveStream', ['names', 'files', 'downloads', 'removed', 'crawl'])
+
+# Campos que identificam a versão de um ficheiro no Drive (md5Checksum e
+# headRevisionId só existem para ficheiros binários, não para Google Sheets)
+VERSION_FIELDS = ('modifiedTime', 'md5Checksum', 'headRevisionId')
+MIRROR_MANIFEST = 'manifest.json'
+
+# Cliente da API partilhado por todo o processo (sessões do Streamlit e
+# threads de download), criado na primeira utilização
+_shared_service = None
+_shared_service_lock = threading.Lock()
+_services_built = 0
+
 
 def get_drive_service():
     """
-    Cria e retorna um objeto de serviço da API do Google Drive usando credenciais
-    de uma conta de serviço.
+    Retorna o objeto de serviço da API do Google Drive partilhado pelo processo,
+    criando-o na primeira chamada com as credenciais de uma conta de serviço.
+    As credenciais são lidas uma vez e o cliente usa o documento de descoberta
+    local e um transporte HTTP com ligações reutilizáveis, seguro entre
+    threads (ver modules/drive_transport.py).
     
     A conta de serviço deve ter permissão para visualizar os ficheiros e pastas.
     """
+    global _shared_service, _services_built
+    if _shared_service is not None:
+        return _shared_service
+
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = _load_drive_service()
+            if _shared_service is not None:
+                _services_built += 1
+    return _shared_service
+
+
+def drive_service_stats():
+    """Contadores do cliente partilhado: ligações abertas, pedidos, renovações de token e clientes criados."""
+    stats = {'services_built': _services_built, 'connections': 0, 'requests': 0, 'token_refreshes': 0}
+    if _shared_service is not None:
+        stats.update(_shared_service._http.stats())
+    return stats
+
+
+def _load_drive_service():
+    """Lê as credenciais da conta de serviço e constrói o cliente da API; None em caso de erro."""
     # Obtém o caminho da pasta raiz do projeto de forma absoluta e segura.
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     credentials_path = os.path.join(script_dir, 'service_account.json')
@@ -34,75 +107,325 @@ def get_drive_service():
         )
         
         # Constrói e retorna o serviço da API do Drive.
-        return build('drive', 'v3', credentials=creds)
+        return build_drive_service(creds)
 
     except Exception as e:
         st.error(f"Erro ao carregar credenciais da conta de serviço: {e}")
         return None
 
-@st.cache_data(show_spinner=False)
-def get_files_from_drive_folder(folder_id):
+
+def _children_query(parent_ids):
+    """Expressão q que lista subpastas e planilhas de várias pastas de uma só vez."""
+    parents = ' or '.join(f"'{parent_id}' in parents" for parent_id in parent_ids)
+    mime_types = ' or '.join(
+        f"mimeType='{mime_type}'" for mime_type in (FOLDER_MIME_TYPE, GOOGLE_SHEET_MIME_TYPE, XLSX_MIME_TYPE)
+    )
+    return f"({parents}) and ({mime_types}) and trashed=false"
+
+
+def crawl_drive_folder(drive_service, folder_id, parents_per_query=DRIVE_PARENTS_PER_QUERY, page_size=DRIVE_PAGE_SIZE):
     """
-    Procura recursivamente por arquivos Google Sheets e .xlsx numa pasta e suas subpastas.
-    
-    Parâmetros:
-    - folder_id (str): O ID da pasta do Google Drive a ser procurada.
+    Percorre a árvore de pastas em largura: cada nível é listado com pedidos
+    que juntam até parents_per_query pastas numa só expressão q e trazem as
+    subpastas e as planilhas juntas, seguindo nextPageToken. Uma árvore de N
+    níveis custa cerca de N pedidos em vez de dois por pasta.
 
-    Retorna:
-    - list: Uma lista de objetos BytesIO, cada um contendo o conteúdo de uma planilha.
+    As planilhas são retornadas na mesma ordem da travessia recursiva: as das
+    subpastas primeiro, depois as da própria pasta.
     """
-    drive_service = get_drive_service()
-    if not drive_service:
-        return []
-    
+    subfolders = {folder_id: []}
+    spreadsheets = {folder_id: []}
+    api_calls = 0
+    level = [folder_id]
+    while level:
+        next_level = []
+        for i in range(0, len(level), parents_per_query):
+            batch = level[i:i + parents_per_query]
+            batch_ids = set(batch)
+            page_token = None
+            while True:
+                response = drive_service.files().list(
+                    q=_children_query(batch),
+                    fields=f"nextPageToken, files(id, name, mimeType, parents, {', '.join(VERSION_FIELDS)})",
+                    pageSize=page_size,
+                    pageToken=page_token,
+                ).execute()
+                api_calls += 1
+                for item in response.get('files', []):
+                    for parent_id in item.get('parents', []):
+                        if parent_id not in batch_ids:
+                            continue
+                        if item['mimeType'] == FOLDER_MIME_TYPE:
+                            subfolders[parent_id].append(item['id'])
+                            # Uma pasta com vários pais só é visitada uma vez
+                            if item['id'] not in subfolders:
+                                subfolders[item['id']] = []
+                                spreadsheets[item['id']] = []
+                                next_level.append(item['id'])
+                        else:
+                            spreadsheets[parent_id].append(item)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        level = next_level
+
+    items = []
+    visited = set()
+
+    def collect(current_id):
+        visited.add(current_id)
+        for subfolder_id in subfolders[current_id]:
+            if subfolder_id not in visited:
+                collect(subfolder_id)
+        items.extend(spreadsheets[current_id])
+
+    collect(folder_id)
+    return DriveCrawl(items, len(subfolders), api_calls)
+
+
+def download_file(drive_service, item):
+    """Descarrega uma planilha (Google Sheets é exportado como .xlsx) para um BytesIO."""
+    file_bytes = io.BytesIO()
+    if item['mimeType'] == GOOGLE_SHEET_MIME_TYPE:
+        request = drive_service.files().export_media(fileId=item['id'], mimeType=XLSX_MIME_TYPE)
+    else:
+        request = drive_service.files().get_media(fileId=item['id'])
+
+    downloader = MediaIoBaseDownload(file_bytes, request)
+    done = False
+    while not done:
+        status, done = downloader.next_chunk()
+
+    file_bytes.seek(0)
+    return file_bytes
+
+
+def _is_retryable(error):
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUS
+    return isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+
+def download_with_retry(drive_service, item, retries=DRIVE_DOWNLOAD_RETRIES, backoff=DRIVE_RETRY_BACKOFF):
+    """
+    Descarrega um ficheiro, repetindo até retries vezes em erros temporários
+    (rede, 429, 5xx) com espera exponencial e um pouco de aleatoriedade.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return download_file(drive_service, item)
+        except Exception as e:
+            if attempt == retries or not _is_retryable(e):
+                raise
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+
+def iter_downloads(items, service_factory=get_drive_service, max_workers=DRIVE_DOWNLOAD_WORKERS,
+                   retries=DRIVE_DOWNLOAD_RETRIES, backoff=DRIVE_RETRY_BACKOFF):
+    """
+    Descarrega os ficheiros num pool de no máximo max_workers threads e gera
+    pares (índice em items, BytesIO) à medida que cada download termina.
+    Cada thread obtém o seu cliente com service_factory uma vez:
+    get_drive_service devolve sempre o cliente partilhado, enquanto uma
+    fábrica de clientes httplib2 (que não podem ser partilhados entre threads)
+    cria um por thread. Com max_workers=1 os downloads são feitos um a um na
+    thread atual, pela ordem de items.
+    """
+    if max_workers == 1 or len(items) <= 1:
+        drive_service = service_factory() if items else None
+        for index, item in enumerate(items):
+            yield index, download_with_retry(drive_service, item, retries, backoff)
+        return
+
+    local = threading.local()
+
+    def download(item):
+        if getattr(local, 'drive_service', None) is None:
+            local.drive_service = service_factory()
+            if local.drive_service is None:
+                raise RuntimeError("Não foi possível criar o cliente da API do Google Drive.")
+        return download_with_retry(local.drive_service, item, retries, backoff)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {executor.submit(download, item): index for index, item in enumerate(items)}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Se o consumidor desistir, os downloads ainda não iniciados são cancelados
+            for future in futures:
+                future.cancel()
+
+
+def fetch_drive_folder(folder_id, service_factory=get_drive_service, max_workers=DRIVE_DOWNLOAD_WORKERS):
+    """
+    Lista e descarrega as planilhas de uma pasta do Drive sem mostrar nada na
+    interface. Retorna um DriveFolder com os pares (nome do ficheiro, BytesIO),
+    na ordem de crawl_drive_folder, e os dados da travessia; ou None se o
+    serviço não puder ser criado.
+    """
+    stream = stream_drive_folder(folder_id, None, service_factory, max_workers)
+    if stream is None:
+        return None
+
+    contents = dict(stream.files)
+    return DriveFolder([(name, contents[index]) for index, name in enumerate(stream.names)], stream.crawl)
+
+
+def _file_name(item):
+    """Nome da planilha; os Google Sheets são exportados como .xlsx."""
+    return item['name'] + '.xlsx' if item['mimeType'] == GOOGLE_SHEET_MIME_TYPE else item['name']
+
+
+# Diretório temporário usado como espelho quando DRIVE_MIRROR_DIR é None
+_temp_mirror_dir = None
+
+
+def get_mirror_dir():
+    """
+    Retorna o diretório do espelho local, relativo à raiz do projeto quando
+    não for absoluto. Sem DRIVE_MIRROR_DIR, os ficheiros vão para um
+    diretório temporário apagado no fim do processo, para nunca ficarem em
+    memória.
+    """
+    global _temp_mirror_dir
+    if not DRIVE_MIRROR_DIR:
+        if _temp_mirror_dir is None:
+            _temp_mirror_dir = tempfile.mkdtemp(prefix='drive-mirror-')
+            atexit.register(shutil.rmtree, _temp_mirror_dir, True)
+        return _temp_mirror_dir
+    if os.path.isabs(DRIVE_MIRROR_DIR):
+        return DRIVE_MIRROR_DIR
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_dir, DRIVE_MIRROR_DIR)
+
+
+def _mirror_entries(mirror_dir):
+    """Lista (caminho, tamanho, último acesso) das planilhas de todas as pastas do espelho."""
+    entries = []
+    if not os.path.isdir(mirror_dir):
+        return entries
+    for folder_id in os.listdir(mirror_dir):
+        files_dir = os.path.join(mirror_dir, folder_id, 'files')
+        if not os.path.isdir(files_dir):
+            continue
+        for name in os.listdir(files_dir):
+            if not name.endswith('.xlsx'):
+                continue
+            path = os.path.join(files_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict_mirror(mirror_dir, max_bytes=DRIVE_MIRROR_MAX_BYTES, keep=()):
+    """
+    Remove as planilhas do espelho usadas há mais tempo até o espelho caber
+    em max_bytes, sem tocar nos caminhos em keep (a pasta que está a ser
+    carregada). Uma planilha removida continua no manifest.json da sua pasta
+    e volta a ser descarregada na próxima sincronização.
+    """
+    keep = set(keep)
+    entries = sorted(_mirror_entries(mirror_dir), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def _read_mirror_manifest(folder_dir):
     try:
-        file_contents = []
-        
-        # Consulta a API para encontrar todas as pastas dentro da pasta atual
-        query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        folders_response = drive_service.files().list(q=query, fields="files(id, name)").execute()
-
-        # Chama recursivamente a função para cada subpasta encontrada
-        for folder in folders_response.get('files', []):
-            sub_folder_files = get_files_from_drive_folder(folder['id'])
-            file_contents.extend(sub_folder_files)
-        
-        # Consulta a API para encontrar arquivos Google Sheets e .xlsx na pasta atual
-        query = f"'{folder_id}' in parents and (mimeType='application/vnd.google-apps.spreadsheet' or mimeType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet') and trashed=false"
-        results = drive_service.files().list(q=query, fields="files(id, name, mimeType)").execute()
-
-        # Baixa o conteúdo de cada arquivo de planilha encontrado
-        for item in results.get('files', []):
-            file_id = item['id']
-            file_name = item['name']
-            mime_type = item['mimeType']
-
-            file_bytes = io.BytesIO()
-            if mime_type == 'application/vnd.google-apps.spreadsheet':
-                # Exporta o Google Sheet como um arquivo .xlsx
-                request = drive_service.files().export_media(fileId=file_id, mimeType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-                file_name += '.xlsx'
-            else:
-                # Baixa o arquivo .xlsx diretamente
-                request = drive_service.files().get_media(fileId=file_id)
-
-            downloader = MediaIoBaseDownload(file_bytes, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-
-            file_bytes.seek(0)
-            file_contents.append(file_bytes)
-            st.success(f"Planilha '{file_name}' processada.")
-
-        return file_contents
-    
-    except HttpError as e:
-        if e.resp.status == 404:
-            st.error("ID da pasta não encontrado ou inválido. Por favor, verifique o ID e as permissões de acesso da conta de serviço.")
-        else:
-            st.error(f"Ocorreu um erro ao aceder à API do Google Drive: {e}")
-        return []
-    except Exception as e:
-        st.error(f"Ocorreu um erro: {e}")
-        return []
+        with open(os.path.join(folder_dir, MIRROR_MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def stream_drive_folder(folder_id, mirror_dir=None, service_factory=get_drive_service, max_workers=DRIVE_DOWNLOAD_WORKERS):
+    """
+    Lista uma pasta do Drive e retorna um DriveStream cujo gerador files
+    entrega cada planilha assim que fica disponível, para que o processamento
+    comece antes de terminarem todos os downloads.
+
+    Com mirror_dir, a pasta é sincronizada com um espelho local (um diretório
+    por pasta com um ficheiro por id e um manifest.json com as versões): só
+    são descarregados os ficheiros novos ou cuja versão (VERSION_FIELDS)
+    mudou, e os que deixaram de aparecer na pasta (apagados, movidos ou no
+    lixo) são removidos do espelho. Os ficheiros sem alterações são
+    entregues primeiro, como caminhos, sem serem lidos; o manifest.json só é
+    atualizado depois de o gerador chegar ao fim, e o espelho é então
+    reduzido a DRIVE_MIRROR_MAX_BYTES (ver evict_mirror). Sem mirror_dir,
+    todos os ficheiros são descarregados para BytesIO.
+
+    Retorna None se o serviço não puder ser criado.
+    """
+    drive_service = service_factory()
+    if not drive_service:
+        return None
+
+    crawl = crawl_drive_folder(drive_service, folder_id)
+    names = [_file_name(item) for item in crawl.items]
+
+    if not mirror_dir:
+        files = iter_downloads(crawl.items, service_factory, max_workers)
+        return DriveStream(names, files, [item['id'] for item in crawl.items], [], crawl)
+
+    folder_dir = os.path.join(mirror_dir, folder_id)
+    files_dir = os.path.join(folder_dir, 'files')
+    os.makedirs(files_dir, exist_ok=True)
+    manifest = _read_mirror_manifest(folder_dir)
+    paths = [os.path.join(files_dir, f"{item['id']}.xlsx") for item in crawl.items]
+
+    def version(item):
+        return {field: item.get(field) for field in VERSION_FIELDS}
+
+    changed = [
+        index for index, item in enumerate(crawl.items)
+        if manifest.get(item['id'], {}).get('version') != version(item) or not os.path.exists(paths[index])
+    ]
+    current_ids = {item['id'] for item in crawl.items}
+    removed = [file_id for file_id in manifest if file_id not in current_ids]
+
+    def sync():
+        changed_set = set(changed)
+        for index, path in enumerate(paths):
+            if index not in changed_set:
+                # Atualiza a data do ficheiro para a política LRU do espelho
+                os.utime(path)
+                yield index, path
+
+        changed_items = [crawl.items[index] for index in changed]
+        for position, content in iter_downloads(changed_items, service_factory, max_workers):
+            index = changed[position]
+            _write_atomic(paths[index], content.getvalue())
+            yield index, paths[index]
+
+        for file_id in removed:
+            try:
+                os.remove(os.path.join(files_dir, f"{file_id}.xlsx"))
+            except FileNotFoundError:
+                pass
+
+        new_manifest = {item['id']: {'name': name, 'version': version(item)} for item, name in zip(crawl.items, names)}
+        _write_atomic(os.path.join(folder_dir, MIRROR_MANIFEST),
+                      json.dumps(new_manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        evict_mirror(mirror_dir, keep=paths)
+
+    return DriveStream(names, sync(), [crawl.items[index]['id'] for index in changed], removed, crawl)
@@ -0,0 +1,91 @@
+import threading
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import Request as AuthRequest
+from googleapiclient.discovery import build
+from .config import DRIVE_DOWNLOAD_WORKERS
+
+# Respostas que levam a renovar o token e repetir o pedido uma vez
+REFRESH_STATUS = {401}
+DEFAULT_TIMEOUT = 60
+
+
+class PooledHttp:
+    """
+    Transporte HTTP com a interface de httplib2.Http usada pelo cliente da API
+    (request(uri, method, body, headers) -> (Response, bytes)), mas assente num
+    requests.Session partilhado: as ligações ficam abertas (keep-alive) num
+    pool do urllib3 e o objeto pode ser usado por várias threads ao mesmo
+    tempo, ao contrário do httplib2.Http.
+
+    Com credentials, cada pedido leva o token de acesso, renovado sob um lock
+    quando expira ou quando o servidor responde 401.
+    """
+
+    def __init__(self, credentials=None, pool_maxsize=DRIVE_DOWNLOAD_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.credentials = credentials
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_maxsize or 1, 1))
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        self._auth_request = AuthRequest(self.session)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.token_refreshes = 0
+
+    def _refresh_token(self, force=False):
+        with self._lock:
+            if force or not self.credentials.valid:
+                self.credentials.refresh(self._auth_request)
+                self.token_refreshes += 1
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        headers = dict(headers or {})
+        if self.credentials is not None:
+            if not self.credentials.valid:
+                self._refresh_token()
+            self.credentials.apply(headers)
+
+        response = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+        if response.status_code in REFRESH_STATUS and self.credentials is not None:
+            self._refresh_token(force=True)
+            self.credentials.apply(headers)
+            response = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+
+        with self._lock:
+            self.requests += 1
+
+        # O requests já descomprime o conteúdo, tal como o httplib2
+        info = {key.lower(): value for key, value in response.headers.items() if key.lower() != 'content-encoding'}
+        info['status'] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+    def connections(self):
+        """Número de ligações TCP abertas até agora por todos os pools."""
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def stats(self):
+        return {
+            'connections': self.connections(),
+            'requests': self.requests,
+            'token_refreshes': self.token_refreshes,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def build_drive_service(credentials=None, api_endpoint=None, pool_maxsize=DRIVE_DOWNLOAD_WORKERS):
+    """
+    Constrói um cliente da API do Drive v3 sobre um PooledHttp, a partir do
+    documento de descoberta incluído no pacote (sem pedido de descoberta).
+    api_endpoint permite apontar o cliente para outro servidor (ex.: testes).
+    """
+    http = PooledHttp(credentials, pool_maxsize)
+    client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+    service = build('drive', 'v3', http=http, static_discovery=True, cache_discovery=False,
+                    client_options=client_options)
+    return service
@@ -0,0 +1,112 @@
+"""
+Índice dos filtros da barra lateral (semanas, técnicos e categorias): para
+cada valor de cada coluna, as posições das linhas que o têm, construído uma
+vez por conjunto de dados. Filtrar passa a ser juntar as posições dos valores
+selecionados em cada coluna e intersetá-las, sem copiar o DataFrame inteiro
+nem voltar a comparar todas as linhas.
+"""
+from collections import OrderedDict, namedtuple
+import numpy as np
+import pandas as pd
+from modules.config import FILTER_CACHE_SIZE
+
+# Colunas dos filtros da barra lateral
+FILTER_COLUMNS = ['Semana', 'Nome', 'Categoria']
+
+# n_rows: linhas do conjunto de dados; positions: {coluna: {valor: posições
+# ordenadas}}; selections: linhas já filtradas por seleção (LRU)
+FilterIndex = namedtuple('FilterIndex', ['n_rows', 'positions', 'selections'])
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+# Chave das linhas com o valor em falta (NaN/None/<NA>), que o seletor
+# mostra como uma opção (nenhum valor real é None); como no isin, qualquer valor em falta selecionado
+# corresponde a essas linhas
+MISSING = None
+
+
+def _index_key(value):
+    """Chave do índice de um valor selecionado: MISSING para os valores em falta."""
+    return MISSING if pd.isna(value) else value
+
+
+def _value_positions(values):
+    """{valor: posições ordenadas das linhas com esse valor}; os valores em falta ficam em MISSING."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        uniques = values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    # Ordenação estável: dentro de cada valor as posições ficam por ordem
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    n_missing = np.count_nonzero(codes < 0)
+    bounds = n_missing + np.concatenate(([0], np.cumsum(counts)))
+    positions = {
+        uniques[code]: order[bounds[code]:bounds[code + 1]]
+        for code in np.flatnonzero(counts)
+    }
+    if n_missing:
+        # Os códigos -1 (em falta) ficam no início da ordenação
+        positions[MISSING] = order[:n_missing]
+    return positions
+
+
+def build_filter_index(data, columns=FILTER_COLUMNS):
+    """Constrói o índice das colunas de filtro de data."""
+    positions = {column: _value_positions(data[column]) for column in columns}
+    return FilterIndex(len(data), positions, OrderedDict())
+
+
+def filter_positions(index, selections):
+    """
+    Posições das linhas que têm, em cada coluna de selections ({coluna:
+    valores}), um dos valores selecionados; uma seleção vazia não filtra
+    essa coluna, como nos filtros da barra lateral. Retorna None quando
+    nenhuma seleção exclui linhas.
+    """
+    mask = None
+    for column, values in selections.items():
+        if not values:
+            continue
+        by_value = index.positions[column]
+        keys = dict.fromkeys(_index_key(value) for value in values)
+        selected = [by_value.get(key, _NO_ROWS) for key in keys]
+        if sum(len(rows) for rows in selected) == index.n_rows:
+            continue
+        column_mask = np.zeros(index.n_rows, dtype=bool)
+        for rows in selected:
+            column_mask[rows] = True
+        mask = column_mask if mask is None else mask & column_mask
+
+    return None if mask is None else np.flatnonzero(mask)
+
+
+def apply_filters(data, index, selections):
+    """
+    Linhas de data (o conjunto de dados do índice) que passam nos filtros
+    (ver filter_positions). Sem linhas excluídas retorna o próprio data;
+    quando as linhas selecionadas são contíguas (ex.: uma só semana)
+    retorna uma fatia, sem cópia.
+
+    O resultado fica guardado no índice para a mesma seleção, até
+    FILTER_CACHE_SIZE seleções (as usadas há mais tempo saem primeiro).
+    """
+    key = tuple((column, tuple(values)) for column, values in selections.items())
+    if key in index.selections:
+        index.selections.move_to_end(key)
+        return index.selections[key]
+
+    positions = filter_positions(index, selections)
+    if positions is None:
+        filtered_data = data
+    elif len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        filtered_data = data.iloc[positions[0]:positions[-1] + 1]
+    else:
+        filtered_data = data.take(positions)
+
+    index.selections[key] = filtered_data
+    if len(index.selections) > FILTER_CACHE_SIZE:
+        index.selections.popitem(last=False)
+    return filtered_data
@@ -0,0 +1,74 @@
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Colunas de texto com poucos valores distintos: guardadas como categorias
+CATEGORY_COLUMNS = ['Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Pagamento', 'Cliente']
+
+# Colunas numéricas que cabem em inteiros mais pequenos quando não têm decimais
+INTEGER_COLUMNS = ['Pets']
+
+BOOL_COLUMNS = ['Verificado', 'Realizado']
+
+# Textos da coluna VERIFIED lidos como verdadeiro
+TRUE_STRINGS = {'TRUE', 'YES', 'Y', 'SIM', 'S', 'X', 'OK', 'V', '✓', '✔', '1'}
+
+
+def _to_bool(value):
+    """Interpreta o conteúdo de uma célula de verificação como bool."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, str):
+        return value.strip().upper() in TRUE_STRINGS
+    if pd.isna(value):
+        return False
+    if isinstance(value, (int, float, np.number)):
+        return value != 0
+    return False
+
+
+def normalize_schema(data):
+    """
+    Converte o DataFrame consolidado para tipos compactos: texto repetido em
+    categorias, contagens em inteiros do menor tamanho possível e as colunas
+    de verificação em bool. Os valores não mudam, só a representação.
+    """
+    data = data.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+    for column in INTEGER_COLUMNS:
+        if column in data.columns:
+            values = pd.to_numeric(data[column], errors='coerce')
+            if values.notna().all() and (values % 1 == 0).all():
+                data[column] = pd.to_numeric(values.astype('int64'), downcast='integer')
+    for column in BOOL_COLUMNS:
+        if column in data.columns and data[column].dtype != bool:
+            data[column] = data[column].map(_to_bool).astype(bool)
+    return data
+
+
+def memory_report(before, after):
+    """Bytes ocupados por coluna antes e depois da normalização."""
+    report = pd.DataFrame({
+        'Antes': before.memory_usage(deep=True, index=False),
+        'Depois': after.memory_usage(deep=True, index=False),
+    })
+    report['Tipo'] = after.dtypes.astype(str)
+    report.loc['Total'] = [report['Antes'].sum(), report['Depois'].sum(), '']
+    report.index.name = 'Coluna'
+    return report
+
+
+def log_memory_report(before, after):
+    """Regista o relatório de memória (uma linha por coluna) no logger do módulo."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    report = memory_report(before, after)
+    for column, row in report.iterrows():
+        logger.info(
+            "%-14s %12s -> %12s bytes %s",
+            column, f"{row['Antes']:,}", f"{row['Depois']:,}", row['Tipo']
+        )
@@ -1,31 +1,49 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import date
 from .utils import format_currency
+from .money import CENTS_DTYPE, to_cents, dollars_to_cents, format_cents
 
-def calculate_service_value(row):
+# Valor cheio (em dólares) de cada tipo de serviço, pelas descrições que o
+# identificam; a primeira entrada cuja descrição aparece é a que se aplica
+VALORES_CHEIOS = [
+    (["01- Dog Cleaning - Small - Under 30 Lbs", "Dental Under 40 LBS"], 180),
+    (["02- Dog Cleaning - Medium - 31 to 70 Lbs"], 210),
+    (["03- Dog Cleaning - Max - 71 to 1000 Lbs", "03- Dog Cleaning - Max - 71 to 100 Lbs"], 240),
+    (["04- Dog Cleaning - Ultra - Above 101 Lbs"], 270),
+    (["05- Cat Cleaning"], 210),
+]
+# Serviços com um valor fixo, seja qual for o valor cobrado
+VALORES_FIXOS = [(["Nail Clipping"], 10)]
+# Diferença a partir da qual um valor abaixo do valor cheio é ajustado
+TOLERANCIA_VALOR_CHEIO = 10
+
+
+def calculate_service_values(data):
     """
-    Calcula o valor do serviço com base na descrição e no valor atual do serviço.
-    Se o valor do serviço for mais de $10 abaixo do valor cheio, ele é ajustado para o valor cheio.
-    A coluna a ser verificada é 'Total'.
+    Calcula o valor de cada serviço com base na descrição e no valor atual
+    do serviço, em cêntimos. Se o valor do serviço for mais de $10 abaixo
+    do valor cheio, ele é ajustado para o valor cheio. A coluna a ser
+    verificada é 'Total' (em cêntimos, ver modules/money.py).
     """
-    description = str(row.get('Description', ''))
-    current_service_value = row.get('Total', 0)
+    description = data['Description'].astype(str)
+    total = data['Total'].to_numpy(dtype=np.int64)
+    tolerancia = dollars_to_cents(TOLERANCIA_VALOR_CHEIO)
+
+    def contains_any(descriptions):
+        return np.logical_or.reduce([description.str.contains(d, regex=False).to_numpy() for d in descriptions])
+
+    conditions, choices = [], []
+    for descriptions, valor_cheio in VALORES_CHEIOS:
+        valor_cheio = dollars_to_cents(valor_cheio)
+        conditions.append(contains_any(descriptions))
+        choices.append(np.where(total < valor_cheio - tolerancia, valor_cheio, total))
+    for descriptions, valor_fixo in VALORES_FIXOS:
+        conditions.append(contains_any(descriptions))
+        choices.append(dollars_to_cents(valor_fixo))
 
-    if "01- Dog Cleaning - Small - Under 30 Lbs" in description or "Dental Under 40 LBS" in description:
-        return 180 if current_service_value < 170 else current_service_value
-    elif "02- Dog Cleaning - Medium - 31 to 70 Lbs" in description:
-        return 210 if current_service_value < 200 else current_service_value
-    elif "03- Dog Cleaning - Max - 71 to 1000 Lbs" in description or "03- Dog Cleaning - Max - 71 to 100 Lbs" in description:
-        return 240 if current_service_value < 230 else current_service_value
-    elif "04- Dog Cleaning - Ultra - Above 101 Lbs" in description:
-        return 270 if current_service_value < 260 else current_service_value
-    elif "05- Cat Cleaning" in description:
-        return 210 if current_service_value < 200 else current_service_value
-    elif "Nail Clipping" in description:
-        return 10
-    else:
-        return current_service_value
+    return pd.Series(np.select(conditions, choices, default=total), index=data.index).astype(CENTS_DTYPE)
 
 def franchises_page():
     """Conteúdo da nova página 'Franchises'."""
@@ -201,19 +219,19 @@ def franchises_page():
                         # Filtra a linha 'Grand Total' para não ser contabilizada
                         combined_df = combined_df[combined_df['Ticket ID'] != 'Grand Total']
 
-                        # Limpa a coluna 'Total' e a converte para numérica
-                        combined_df['Total'] = pd.to_numeric(
-                            combined_df['Total'].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False),
-                            errors='coerce'
+                        # Limpa a coluna 'Total' e a converte para cêntimos
+                        combined_df['Total'] = to_cents(
+                            combined_df['Total'].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
                         ).fillna(0)
 
                         # Aplica a lógica de cálculo
-                        combined_df['Total_Calculado'] = combined_df.apply(calculate_service_value, axis=1)
+                        combined_df['Total_Calculado'] = calculate_service_values(combined_df)
 
                         total_pets = len(combined_df)
                         total_servicos_count = len(combined_df)
                         total_servicos_valor = combined_df['Total_Calculado'].sum()
-                        franchise_data['total_servicos_valor'] = total_servicos_valor
+                        # A tabela de cálculo usa o valor total em dólares
+                        franchise_data['total_servicos_valor'] = total_servicos_valor / 100
 
                         # Exibição das métricas
                         st.markdown("<br>", unsafe_allow_html=True)
@@ -223,7 +241,7 @@ def franchises_page():
                         with cols_metrics[1]:
                             st.markdown(f"<div class='franchise-metric-box'>Serviços Realizados<p class='franchise-metric-value'>{total_servicos_count}</p></div>", unsafe_allow_html=True)
                         with cols_metrics[2]:
-                            st.markdown(f"<div class='franchise-metric-box'>Valor Total<p class='franchise-metric-value'>{format_currency(total_servicos_valor)}</p></div>", unsafe_allow_html=True)
+                            st.markdown(f"<div class='franchise-metric-box'>Valor Total<p class='franchise-metric-value'>{format_cents(total_servicos_valor)}</p></div>", unsafe_allow_html=True)
                         
                         # Calcula a soma dos valores da coluna Amount
                         total_amount = sum(row['Amount'] for row in franchise_data['calculation_rows'])
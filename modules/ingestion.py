@@ -0,0 +1,182 @@
+"""
+Ingestão das planilhas sem interface: processa uma pasta de ficheiros .xlsx e
+grava um conjunto de dados Parquet particionado por semana, que a aplicação
+carrega diretamente em vez de voltar a ler o Excel.
+
+Uso: python -m modules.ingestion PASTA [--output DIR] [--workers N] [--engine vectorized]
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+from datetime import datetime
+from urllib.parse import quote
+from collections import namedtuple
+import pandas as pd
+from .config import INGESTION_DATASET_DIR, INGESTION_MAX_WORKERS
+from .data_processor import process_files, PARSER_ENGINES, STREAMING_ENGINE
+from .frame_schema import normalize_schema
+from .money import MONEY_COLUMNS, to_cents
+from .sheet_parser import PARSER_VERSION, RECORD_COLUMNS
+
+MANIFEST_FILE = '_manifest.json'
+PARTITION_COLUMN = 'Semana'
+
+# Resultado da ingestão: DataFrame consolidado, ficheiros lidos e mensagens
+# (dicionários com file, level, message e sheet)
+IngestionResult = namedtuple('IngestionResult', ['data', 'files', 'diagnostics'])
+
+
+def get_dataset_dir():
+    """Retorna o diretório do conjunto de dados, relativo à raiz do projeto quando não for absoluto."""
+    if os.path.isabs(INGESTION_DATASET_DIR):
+        return INGESTION_DATASET_DIR
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_dir, INGESTION_DATASET_DIR)
+
+
+def find_workbooks(directory):
+    """Ficheiros .xlsx da pasta e subpastas, por ordem de caminho, ignorando ficheiros de bloqueio do Excel."""
+    workbooks = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.xlsx') and not name.startswith('~$'):
+                workbooks.append(os.path.join(root, name))
+    return workbooks
+
+
+def ingest_directory(directory, max_workers=INGESTION_MAX_WORKERS, engine='vectorized'):
+    """Processa todas as planilhas de uma pasta e retorna um IngestionResult."""
+    files = find_workbooks(directory)
+    frames = []
+    diagnostics = []
+    for file, (data, messages) in zip(files, process_files(files, max_workers, engine)):
+        source = os.path.relpath(file, directory)
+        diagnostics.extend({'file': source, **diagnostic._asdict()} for diagnostic in messages)
+        if not data.empty:
+            frames.append(data)
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RECORD_COLUMNS)
+    return IngestionResult(data, files, diagnostics)
+
+
+def _arrow_compatible(data):
+    """
+    Converte para texto os valores não textuais das colunas object que
+    misturam tipos (ex.: 'ID Pagamento' com números e texto), que o Parquet não
+    representa numa única coluna.
+    """
+    data = data.copy()
+    for column in data.columns[data.dtypes == object]:
+        data[column] = data[column].map(lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v))
+    return data
+
+
+def write_dataset(data, output_dir, sources=(), diagnostics=()):
+    """
+    Grava data como um conjunto de dados Parquet particionado por semana
+    (Semana=<nome>/part-0.parquet) com um _manifest.json que guarda a ordem
+    das semanas, as planilhas de origem e as mensagens da ingestão. O
+    conjunto anterior só é substituído depois de o novo estar completo.
+    """
+    frame = _arrow_compatible(normalize_schema(data))
+    weeks = [str(week) for week in pd.unique(frame[PARTITION_COLUMN].astype(object))]
+
+    parent_dir = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = f"{os.path.abspath(output_dir)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    partitions = {}
+    week_column = frame[PARTITION_COLUMN].astype(object)
+    for week in weeks:
+        partition = f"{PARTITION_COLUMN}={quote(week, safe='')}"
+        os.makedirs(os.path.join(tmp_dir, partition))
+        week_frame = frame[week_column == week].drop(columns=PARTITION_COLUMN)
+        week_frame.to_parquet(os.path.join(tmp_dir, partition, 'part-0.parquet'), index=False)
+        partitions[week] = partition
+
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'parser_version': PARSER_VERSION,
+        'rows': len(frame),
+        'weeks': weeks,
+        'partitions': partitions,
+        'sources': list(sources),
+        'diagnostics': list(diagnostics),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    old_dir = f"{os.path.abspath(output_dir)}.old-{os.getpid()}"
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(dataset_dir):
+    """Manifesto do conjunto de dados, ou None se não existir ou estiver ilegível."""
+    try:
+        with open(os.path.join(dataset_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_dataset(dataset_dir, weeks=None):
+    """
+    Carrega o conjunto de dados gravado por write_dataset, lendo apenas as
+    partições das semanas pedidas (None carrega todas). Retorna um DataFrame
+    vazio se o conjunto não existir.
+    """
+    manifest = read_manifest(dataset_dir)
+    if not manifest:
+        return pd.DataFrame()
+
+    frames = []
+    for week in manifest['weeks']:
+        if weeks is not None and week not in weeks:
+            continue
+        week_frame = pd.read_parquet(os.path.join(dataset_dir, manifest['partitions'][week]))
+        week_frame.insert(0, PARTITION_COLUMN, week)
+        frames.append(week_frame)
+    if not frames:
+        return pd.DataFrame()
+    data = pd.concat(frames, ignore_index=True)[RECORD_COLUMNS]
+
+    # Conjuntos gravados antes dos valores em cêntimos têm os valores em dólares
+    for column in MONEY_COLUMNS:
+        if pd.api.types.is_float_dtype(data[column]):
+            data[column] = to_cents(data[column])
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help="Pasta com as planilhas .xlsx (inclui subpastas)")
+    parser.add_argument('--output', default=get_dataset_dir(), help="Diretório do conjunto de dados")
+    parser.add_argument('--workers', type=int, default=INGESTION_MAX_WORKERS)
+    parser.add_argument('--engine', default='vectorized', choices=list(PARSER_ENGINES) + [STREAMING_ENGINE])
+    args = parser.parse_args(argv)
+
+    result = ingest_directory(args.directory, args.workers, args.engine)
+    for diagnostic in result.diagnostics:
+        print(f"[{diagnostic['level']}] {diagnostic['file']}: {diagnostic['message']}", file=sys.stderr)
+
+    if result.data.empty:
+        print(f"Nenhum atendimento encontrado em {len(result.files)} planilha(s) de {args.directory}.", file=sys.stderr)
+        return 1
+
+    sources = [os.path.relpath(file, args.directory) for file in result.files]
+    manifest = write_dataset(result.data, args.output, sources, result.diagnostics)
+    print(f"{manifest['rows']} atendimentos de {len(result.files)} planilha(s), "
+          f"{len(manifest['weeks'])} semana(s), gravados em {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
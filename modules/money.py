@@ -0,0 +1,60 @@
+"""
+Valores monetários em cêntimos inteiros. As colunas 'Serviço' e 'Gorjeta'
+dos atendimentos são convertidas para cêntimos na ingestão
+(consolidate_weeks), tal como o 'Total' das franquias ao carregar os CSV, e
+somadas, repartidas e formatadas em cêntimos, para que
+os totais sejam exatos em qualquer ordem de soma; só os gráficos, as tabelas
+numéricas e as exportações voltam a usar dólares (ver to_dollars).
+"""
+import numpy as np
+import pandas as pd
+
+# Colunas de valores dos atendimentos guardadas em cêntimos
+MONEY_COLUMNS = ['Serviço', 'Gorjeta']
+
+# Inteiros com valores em falta (ex.: serviço sem valor numérico)
+CENTS_DTYPE = 'Int64'
+
+
+def round_cents(values):
+    """Arredonda cêntimos fracionários ao cêntimo, com meio cêntimo para cima; NaN fica NaN."""
+    return np.floor(np.asarray(values, dtype=float) + 0.5)
+
+
+def to_cents(values):
+    """
+    Converte uma coluna de valores em dólares (números ou texto numérico)
+    para cêntimos inteiros; valores não numéricos ficam em falta (<NA>).
+    """
+    dollars = pd.to_numeric(pd.Series(values), errors='coerce')
+    cents = round_cents(dollars.to_numpy(dtype=float, na_value=np.nan) * 100)
+    return pd.Series(cents, index=dollars.index).astype(CENTS_DTYPE)
+
+
+def dollars_to_cents(value):
+    """Converte um único valor em dólares para cêntimos inteiros."""
+    return int(round_cents(float(value) * 100))
+
+
+def to_dollars(cents):
+    """Coluna de cêntimos em dólares (float, NaN nos valores em falta), para gráficos e exportações."""
+    return pd.Series(cents).astype('Float64').astype(float) / 100
+
+
+def format_cents(cents):
+    """
+    Formata cêntimos como moeda USD ($1,234.56), como format_currency em
+    dólares. Aceita um valor (retorna o texto, ou None se estiver em falta
+    ou não for finito) ou uma Series (retorna uma Series de textos).
+    Cêntimos fracionários (ex.: médias) são arredondados ao cêntimo; um
+    número inteiro de cêntimos a dividir por 100 formata-se sempre exato.
+    """
+    if not isinstance(cents, pd.Series):
+        if pd.isna(cents) or not np.isfinite(cents):
+            return None
+        return f"${float(round_cents(cents)) / 100 + 0.0:,.2f}"
+
+    # + 0.0 evita o '-0.00' dos valores arredondados para zero negativo
+    values = round_cents(cents.astype('Float64').to_numpy(dtype=float, na_value=np.nan)) / 100 + 0.0
+    text = pd.Series([f"${value:,.2f}" for value in values.tolist()], index=cents.index, dtype=object)
+    return text.where(np.isfinite(values), None)
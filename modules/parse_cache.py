@@ -0,0 +1,231 @@
+import os
+import json
+import hashlib
+from datetime import date, datetime, time, timedelta
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from .config import (
+    INVALID_CLIENTS,
+    FORMAS_PAGAMENTO_VALIDAS,
+    PARSE_CACHE_DIR,
+    PARSE_CACHE_MAX_BYTES,
+)
+from .sheet_parser import PARSER_VERSION
+
+# Versão do formato das entradas; faz parte da tag do cache (ver cache_version_tag)
+CACHE_FORMAT = '2'
+
+# Colunas object do DataFrame guardadas como texto no Parquet: {coluna: 'text'}
+# quando só têm texto, {coluna: 'typed'} quando misturam tipos (ex.:
+# 'Verificado' com bool, números e texto), com o tipo de cada valor à frente
+# ("b:1", "i:3", "s:texto"); assim voltam exatamente aos mesmos valores
+OBJECT_COLUMNS_KEY = b'readersheets.object_columns'
+
+# Tipos dos valores das colunas mistas: prefixo e conversão para texto
+_VALUE_ENCODERS = {
+    str: ('s', str),
+    bool: ('b', lambda value: '1' if value else '0'),
+    int: ('i', str),
+    float: ('f', repr),
+    pd.Timestamp: ('ts', pd.Timestamp.isoformat),
+    datetime: ('dt', datetime.isoformat),
+    date: ('da', date.isoformat),
+    time: ('tm', time.isoformat),
+    timedelta: ('td', lambda value: f"{value.days},{value.seconds},{value.microseconds}"),
+    np.bool_: ('nb', lambda value: '1' if value else '0'),
+    np.int64: ('ni', str),
+    np.float64: ('nf', lambda value: repr(float(value))),
+    type(pd.NaT): ('nat', lambda value: ''),
+    type(pd.NA): ('na', lambda value: ''),
+}
+
+# Conversão de volta de cada prefixo; só constrói estes tipos
+_VALUE_DECODERS = {
+    's': str,
+    'b': lambda text: text == '1',
+    'i': int,
+    'f': float,
+    'ts': pd.Timestamp,
+    'dt': datetime.fromisoformat,
+    'da': date.fromisoformat,
+    'tm': time.fromisoformat,
+    'td': lambda text: timedelta(*map(int, text.split(','))),
+    'nb': lambda text: np.bool_(text == '1'),
+    'ni': np.int64,
+    'nf': np.float64,
+    'nat': lambda text: pd.NaT,
+    'na': lambda text: pd.NA,
+}
+
+
+def get_cache_dir():
+    """Retorna o diretório do cache, relativo à raiz do projeto quando não for absoluto."""
+    if os.path.isabs(PARSE_CACHE_DIR):
+        return PARSE_CACHE_DIR
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_dir, PARSE_CACHE_DIR)
+
+
+def cache_version_tag():
+    """
+    Identifica a versão do parser e da configuração que influencia o resultado.
+    Alterar INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS, PARSER_VERSION ou
+    CACHE_FORMAT gera uma nova tag e invalida todas as entradas anteriores.
+    """
+    payload = json.dumps([PARSER_VERSION, CACHE_FORMAT, INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_key(content):
+    """Chave do cache: hash do conteúdo do ficheiro mais a tag de versão."""
+    return f"{hashlib.sha256(content).hexdigest()}-{cache_version_tag()}"
+
+
+def sheet_cache_key(sheet_name, fingerprint):
+    """Chave do cache de uma única folha WEEK (o nome da folha faz parte do resultado)."""
+    digest = hashlib.sha256(f"{sheet_name}\x00{fingerprint}".encode('utf-8')).hexdigest()
+    return f"sheet-{digest}-{cache_version_tag()}"
+
+
+def _entry_path(key):
+    return os.path.join(get_cache_dir(), f"{key}.parquet")
+
+
+def _cache_entries():
+    """Lista (caminho, tamanho, último acesso) das entradas existentes no cache."""
+    cache_dir = get_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.parquet'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _encode_value(value):
+    """Texto com o tipo à frente de um valor de uma coluna mista (None fica nulo)."""
+    if value is None:
+        return None
+    prefix, encode = _VALUE_ENCODERS[type(value)]
+    return f"{prefix}:{encode(value)}"
+
+
+def _decode_value(text):
+    """Valor de uma coluna mista a partir do texto de _encode_value."""
+    if text is None:
+        return None
+    prefix, _, payload = text.partition(':')
+    return _VALUE_DECODERS[prefix](payload)
+
+
+def _encode_object_columns(frame):
+    """
+    Cópia de frame com as colunas object em texto, que o Arrow guarda como
+    texto nativo, e o {coluna: forma} de OBJECT_COLUMNS_KEY. Um valor de um
+    tipo sem codificação (KeyError) impede a entrada de ser guardada.
+    """
+    encoded = frame.copy()
+    object_columns = {}
+    for column in encoded.columns[encoded.dtypes == object]:
+        values = encoded[column].tolist()
+        if all(value is None or type(value) is str for value in values):
+            object_columns[column] = 'text'
+        else:
+            object_columns[column] = 'typed'
+            encoded[column] = pd.Series([_encode_value(value) for value in values],
+                                        index=encoded.index, dtype=object)
+    return encoded, object_columns
+
+
+def load_cached_frame(key):
+    """
+    Retorna o DataFrame guardado para a chave, ou None se não existir.
+    Um acesso bem-sucedido atualiza a data da entrada para a política LRU.
+    """
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        object_columns = json.loads(metadata.get(OBJECT_COLUMNS_KEY, b'{}'))
+        frame = table.to_pandas()
+        for column, form in object_columns.items():
+            values = table.column(column).to_pylist()
+            if form == 'typed':
+                values = [_decode_value(value) for value in values]
+            frame[column] = pd.Series(values, index=frame.index, dtype=object)
+        os.utime(path)
+    except Exception:
+        # Entrada corrompida ou incompleta: descarta e volta a processar o ficheiro
+        _remove(path)
+        return None
+
+    return frame
+
+
+def store_cached_frame(key, frame):
+    """Guarda o DataFrame processado em Parquet e aplica o limite de tamanho do cache."""
+    path = _entry_path(key)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(get_cache_dir(), exist_ok=True)
+
+        encoded, object_columns = _encode_object_columns(frame)
+
+        table = pa.Table.from_pandas(encoded)
+        metadata = dict(table.schema.metadata or {})
+        metadata[OBJECT_COLUMNS_KEY] = json.dumps(object_columns).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+
+        # Escrita atómica: outro processo nunca lê um ficheiro a meio
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+    except Exception:
+        _remove(temp_path)
+        return
+
+    purge_stale_entries()
+    evict_lru()
+
+
+def purge_stale_entries():
+    """Remove as entradas geradas com outra versão do parser ou da configuração."""
+    suffix = f"-{cache_version_tag()}.parquet"
+    for path, _, _ in _cache_entries():
+        if not path.endswith(suffix):
+            _remove(path)
+
+
+def evict_lru(max_bytes=PARSE_CACHE_MAX_BYTES):
+    """Remove as entradas menos usadas recentemente até o cache caber em max_bytes."""
+    entries = sorted(_cache_entries(), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def clear_parse_cache():
+    """Apaga todas as entradas do cache."""
+    for path, _, _ in _cache_entries():
+        _remove(path)
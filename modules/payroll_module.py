@@ -2,10 +2,17 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-from modules.utils import format_currency
+from modules.money import format_cents, dollars_to_cents, round_cents, to_dollars
+from modules.calculations import regras_das_categorias
+from modules.service_cube import build_service_cube
+from modules.config import REGRAS_COMISSAO, PAGAMENTOS_FIXOS
 from modules.payroll_pdf_generator import create_payroll_summary_with_vars_pdf
+from modules.pdf_cache import lazy_pdf
 from modules.pdf_generator import create_pdf, create_tech_payment_receipt, create_technician_of_the_week_receipt
 
+# Valores do payroll guardados em cêntimos; a tabela e o CSV mostram-nos em dólares
+PAYROLL_MONEY_COLUMNS = ['Valor Produzido', 'Pagamento Base', 'Pagamento Fixo', 'Variáveis', 'Pagamento Final', 'Support Value']
+
 # Nome do arquivo para salvar as configurações
 SETTINGS_FILE = "payroll_settings.json"
 
@@ -34,9 +41,11 @@ def load_payroll_settings():
 def delete_variable_row(index):
     del st.session_state.custom_variables[index]
 
-def payroll_page(data):
+def payroll_page(data, cube=None):
     """
     Função que renderiza a página de Payroll.
+    O resumo por técnico é agregado do cubo de atendimentos (ver
+    modules/service_cube.py); se cube não for indicado, é construído de data.
     """
     st.title("Payroll dos Técnicos")
 
@@ -94,22 +103,29 @@ def payroll_page(data):
         else:
             st.session_state.custom_variables = [{'description': '', 'valor_da_parcela': 0.0, 'total_de_parcelas': 0, 'parcela_atual': 0, 'tech': ''}]
 
-    # Filtra apenas os serviços realizados
-    completed_services = data[data['Realizado']]
+    # Cubo dos serviços realizados
+    if cube is None:
+        cube = build_service_cube(data)
     
-    if completed_services.empty:
+    if cube.empty:
         st.info("Nenhum serviço realizado encontrado para o período selecionado.")
         return
 
-    # Calcula o Valor Produzido (Serviços + Gorjetas) por técnico
-    payroll_summary = completed_services.groupby(['Nome', 'Categoria']).agg(
+    # Calcula o Valor Produzido (Serviços + Gorjetas) por técnico; os valores
+    # da página estão em cêntimos e a exportação (PDF e CSV) em dólares
+    payroll_summary = cube.groupby(['Nome', 'Categoria'], observed=True).agg(
         Total_Servicos=('Serviço', 'sum'),
         Total_Gorjetas=('Gorjeta', 'sum'),
         Total_Pets=('Pets', 'sum'),
-        Total_Atendimentos=('Cliente', 'count')
+        Total_Atendimentos=('Clientes', 'sum')
     ).reset_index()
 
     payroll_summary['Valor_Produzido'] = payroll_summary['Total_Servicos'] + payroll_summary['Total_Gorjetas']
+
+    # Comissão e pagamento fixo sugeridos pelas regras da categoria de cada técnico (REGRAS_COMISSAO)
+    regras = regras_das_categorias(payroll_summary['Categoria'])
+    payroll_summary['Comissao_Padrao'] = regras['comissao']
+    payroll_summary['Fixo_Padrao'] = regras['pagamento_fixo']
     
     st.subheader("Resumo do Payroll por Técnico")
     
@@ -131,8 +147,10 @@ def payroll_page(data):
 
     # Valores pré-definidos para a selectbox de pagamento fixo
     PAYMENT_OPTIONS = ["Selecionar ou digitar", 750.00, 900.00]
-    COMMISSION_OPTIONS = [20, 25]
-    FIXED_PAYMENT_OPTIONS = ["Selecionar", 750.00, 900.00]
+    COMMISSION_OPTIONS = sorted({regra['comissao'] for regra in REGRAS_COMISSAO.values() if regra['comissao']})
+    FIXED_PAYMENT_OPTIONS = ["Selecionar"] + sorted(
+        set(PAGAMENTOS_FIXOS) | {regra['pagamento_fixo'] for regra in REGRAS_COMISSAO.values() if regra['pagamento_fixo']}
+    )
 
     # Variaveis para totalização
     total_pets_sum = 0
@@ -146,7 +164,6 @@ def payroll_page(data):
     # Itera sobre cada técnico para criar os campos personalizados
     for index, row in payroll_summary.iterrows():
         tech_name = row['Nome']
-        categoria = row['Categoria']
         valor_produzido = row['Valor_Produzido']
         total_servicos = row['Total_Servicos']
         total_gorjetas = row['Total_Gorjetas']
@@ -169,17 +186,14 @@ def payroll_page(data):
             total_atendimentos_sum += total_atendimentos
             
         with cols[3]:
-            st.markdown(f'<div class="data-row">{format_currency(valor_produzido)}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-row">{format_cents(valor_produzido)}</div>', unsafe_allow_html=True)
             total_produzido_sum += valor_produzido
         
         with cols[4]:
             # Lógica para definir o padrão da comissão
             default_commission_index = 0
-            if categoria == "Coordinator":
-                try:
-                    default_commission_index = COMMISSION_OPTIONS.index(25)
-                except ValueError:
-                    default_commission_index = 0
+            if row['Comissao_Padrao'] in COMMISSION_OPTIONS:
+                default_commission_index = COMMISSION_OPTIONS.index(row['Comissao_Padrao'])
             
             # Tenta carregar o valor salvo, se existir
             saved_commission = saved_settings.get(tech_name, {}).get('comissao')
@@ -198,22 +212,19 @@ def payroll_page(data):
             )
 
         # Cálculo do pagamento base
-        pagamento_base = total_servicos * (comissao_porcentagem / 100) + total_gorjetas
+        pagamento_base = int(round_cents(total_servicos * comissao_porcentagem / 100)) + total_gorjetas
         
         with cols[5]:
             # Regra para deixar a linha vermelha se o pagamento base for menor que 900
-            base_style = "color: red !important;" if pagamento_base < 900 else ""
-            st.markdown(f'<div class="data-row" style="{base_style}">{format_currency(pagamento_base)}</div>', unsafe_allow_html=True)
+            base_style = "color: red !important;" if pagamento_base < dollars_to_cents(900) else ""
+            st.markdown(f'<div class="data-row" style="{base_style}">{format_cents(pagamento_base)}</div>', unsafe_allow_html=True)
             total_pagamento_base_sum += pagamento_base
             
         with cols[6]:
             # Lógica para definir o padrão do pagamento fixo
             default_fixed_index = 0
-            if categoria == "Starter":
-                try:
-                    default_fixed_index = FIXED_PAYMENT_OPTIONS.index(900.00)
-                except ValueError:
-                    default_fixed_index = 0
+            if row['Fixo_Padrao'] in FIXED_PAYMENT_OPTIONS:
+                default_fixed_index = FIXED_PAYMENT_OPTIONS.index(row['Fixo_Padrao'])
             
             # Tenta carregar o valor salvo, se existir
             saved_fixed_payment = saved_settings.get(tech_name, {}).get('pagamento_fixo')
@@ -233,16 +244,16 @@ def payroll_page(data):
             )
             
             # Lógica para usar o pagamento fixo ou o pagamento base
-            pagamento_para_calculo = pagamento_fixo if pagamento_fixo != "Selecionar" else pagamento_base
+            pagamento_para_calculo = dollars_to_cents(pagamento_fixo) if pagamento_fixo != "Selecionar" else pagamento_base
         
         # Encontra as variáveis personalizadas para o técnico atual
         custom_vars_value = sum(
-            v['valor_da_parcela'] for v in st.session_state.custom_variables if v['tech'] == tech_name
+            dollars_to_cents(v['valor_da_parcela']) for v in st.session_state.custom_variables if v['tech'] == tech_name
         )
         
         with cols[7]:
             vars_style = "color: green !important;" if custom_vars_value > 0 else "color: red !important;" if custom_vars_value < 0 else ""
-            st.markdown(f'<div class="data-row" style="{vars_style}">{format_currency(custom_vars_value)}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-row" style="{vars_style}">{format_cents(custom_vars_value)}</div>', unsafe_allow_html=True)
             total_variaveis_sum += custom_vars_value
 
         # Cálculo do pagamento final
@@ -250,20 +261,20 @@ def payroll_page(data):
 
         with cols[8]:
             # Aplica a cor vermelha se o pagamento final for menor que 900
-            final_style = "color: red !important;" if pagamento_final < 900 else ""
-            st.markdown(f'<div class="data-row" style="{final_style}"><b>{format_currency(pagamento_final)}</b></div>', unsafe_allow_html=True)
+            final_style = "color: red !important;" if pagamento_final < dollars_to_cents(900) else ""
+            st.markdown(f'<div class="data-row" style="{final_style}"><b>{format_cents(pagamento_final)}</b></div>', unsafe_allow_html=True)
             total_pagamento_final_sum += pagamento_final
         
         with cols[9]:
             # Lógica para o campo 'Support Value'
-            support_value = 0.0
+            support_value = 0
             if pagamento_final > pagamento_base:
                 support_value = pagamento_final - pagamento_base
             
-            st.markdown(f'<div class="data-row">{format_currency(support_value)}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-row">{format_cents(support_value)}</div>', unsafe_allow_html=True)
             total_support_value_sum += support_value
 
-        # Adiciona os dados para exportação e para salvar configurações
+        # Adiciona os dados para exportação e para salvar configurações (valores em cêntimos)
         payroll_data.append({
             "Técnico": tech_name,
             "Total de Pets": total_pets,
@@ -271,10 +282,10 @@ def payroll_page(data):
             "Valor Produzido": valor_produzido,
             "Comissao (%)": comissao_porcentagem,
             "Pagamento Base": pagamento_base,
-            "Pagamento Fixo": pagamento_fixo if pagamento_fixo != "Selecionar" else pagamento_base,
+            "Pagamento Fixo": pagamento_para_calculo,
             "Variáveis": custom_vars_value,
             "Pagamento Final": pagamento_final,
-            "Support Value": (pagamento_final - pagamento_base) if pagamento_final > pagamento_base else 0
+            "Support Value": support_value
         })
 
         # Salva as configurações atuais para uso futuro
@@ -293,20 +304,20 @@ def payroll_page(data):
     with cols_total[2]:
         st.markdown(f'<div class="data-row"><b>{total_atendimentos_sum}</b></div>', unsafe_allow_html=True)
     with cols_total[3]:
-        st.markdown(f'<div class="data-row"><b>{format_currency(total_produzido_sum)}</b></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="data-row"><b>{format_cents(total_produzido_sum)}</b></div>', unsafe_allow_html=True)
     with cols_total[4]:
         st.markdown(f'<div class="data-row"></div>', unsafe_allow_html=True)
     with cols_total[5]:
-        st.markdown(f'<div class="data-row"><b>{format_currency(total_pagamento_base_sum)}</b></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="data-row"><b>{format_cents(total_pagamento_base_sum)}</b></div>', unsafe_allow_html=True)
     with cols_total[6]:
         st.markdown(f'<div class="data-row"></div>', unsafe_allow_html=True)
     with cols_total[7]:
         vars_style = "color: green !important;" if total_variaveis_sum > 0 else "color: red !important;" if total_variaveis_sum < 0 else ""
-        st.markdown(f'<div class="data-row" style="{vars_style}"><b>{format_currency(total_variaveis_sum)}</b></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="data-row" style="{vars_style}"><b>{format_cents(total_variaveis_sum)}</b></div>', unsafe_allow_html=True)
     with cols_total[8]:
-        st.markdown(f'<div class="data-row"><b>{format_currency(total_pagamento_final_sum)}</b></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="data-row"><b>{format_cents(total_pagamento_final_sum)}</b></div>', unsafe_allow_html=True)
     with cols_total[9]:
-        st.markdown(f'<div class="data-row"><b>{format_currency(total_support_value_sum)}</b></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="data-row"><b>{format_cents(total_support_value_sum)}</b></div>', unsafe_allow_html=True)
 
     st.markdown("---")
 
@@ -395,11 +406,11 @@ def payroll_page(data):
                 label_visibility="collapsed"
             )
         with cols[5]:
-            total_debt = st.session_state.custom_variables[i]['valor_da_parcela'] * st.session_state.custom_variables[i]['total_de_parcelas']
-            st.markdown(f'<div class="data-row">{format_currency(total_debt)}</div>', unsafe_allow_html=True)
+            total_debt = dollars_to_cents(st.session_state.custom_variables[i]['valor_da_parcela']) * st.session_state.custom_variables[i]['total_de_parcelas']
+            st.markdown(f'<div class="data-row">{format_cents(total_debt)}</div>', unsafe_allow_html=True)
         with cols[6]:
-            paid_debt = st.session_state.custom_variables[i]['valor_da_parcela'] * st.session_state.custom_variables[i]['parcela_atual']
-            st.markdown(f'<div class="data-row">{format_currency(paid_debt)}</div>', unsafe_allow_html=True)
+            paid_debt = dollars_to_cents(st.session_state.custom_variables[i]['valor_da_parcela']) * st.session_state.custom_variables[i]['parcela_atual']
+            st.markdown(f'<div class="data-row">{format_cents(paid_debt)}</div>', unsafe_allow_html=True)
         
         with cols[7]:
             st.button("🗑️", key=f"delete_{i}", on_click=delete_variable_row, args=(i,))
@@ -425,11 +436,12 @@ def payroll_page(data):
         end_date = st.date_input("Data final", value=None)
     with col_pdf_buttons[2]:
         st.markdown("<br>", unsafe_allow_html=True) # Espaçamento para alinhar o botão com os campos de data
-        # Lógica para gerar o PDF
-        pdf_data = create_payroll_summary_with_vars_pdf(payroll_data, st.session_state.custom_variables, start_date, end_date)
+        # O PDF só é gerado quando o download é pedido (ver modules/pdf_cache.py); as
+        # variáveis são copiadas porque a sessão as altera nas execuções seguintes
+        custom_variables = [dict(variable) for variable in st.session_state.custom_variables]
         st.download_button(
             label="📥 Baixar PDF do Payroll",
-            data=pdf_data.output(dest='S').encode('latin-1'),
+            data=lazy_pdf(create_payroll_summary_with_vars_pdf, payroll_data, custom_variables, start_date, end_date),
             file_name="payroll_report.pdf",
             mime="application/pdf"
         )
@@ -438,6 +450,8 @@ def payroll_page(data):
     st.markdown("---")
     st.subheader("Tabela de Payroll para Download")
     final_payroll_df = pd.DataFrame(payroll_data)
+    if not final_payroll_df.empty:
+        final_payroll_df[PAYROLL_MONEY_COLUMNS] = final_payroll_df[PAYROLL_MONEY_COLUMNS].apply(to_dollars)
     
     # Exibe o DataFrame para visualização antes do download
     st.dataframe(final_payroll_df)
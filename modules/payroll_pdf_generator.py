@@ -1,6 +1,6 @@
 from fpdf import FPDF
 from datetime import datetime
-from .utils import format_currency
+from .money import format_cents, dollars_to_cents
 import math
 
 def create_payroll_summary_with_vars_pdf(payroll_data, custom_variables, start_date, end_date):
@@ -57,21 +57,21 @@ def create_payroll_summary_with_vars_pdf(payroll_data, custom_variables, start_d
             pdf.set_x(x_pos)
             pdf.cell(col_width, line_height, txt=f"Atendimentos: {tech_data['Total de Atendimentos']}", ln=1)
             pdf.set_x(x_pos)
-            pdf.cell(col_width, line_height, txt=f"Valor Produzido: {format_currency(tech_data['Valor Produzido'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Valor Produzido: {format_cents(tech_data['Valor Produzido'])}", ln=1)
             pdf.set_x(x_pos)
             pdf.cell(col_width, line_height, txt=f"Comissão (%): {tech_data['Comissao (%)']}%", ln=1)
             pdf.set_x(x_pos)
 
-            if tech_data['Pagamento Base'] < 900:
+            if tech_data['Pagamento Base'] < dollars_to_cents(900):
                 pdf.set_font("Arial", 'U', 10)
                 pdf.set_text_color(255, 0, 0)
             
-            pdf.cell(col_width, line_height, txt=f"Pagamento Base: {format_currency(tech_data['Pagamento Base'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Pagamento Base: {format_cents(tech_data['Pagamento Base'])}", ln=1)
             pdf.set_font("Arial", '', 10)
             pdf.set_text_color(0, 0, 0)
             
             pdf.set_x(x_pos)
-            pdf.cell(col_width, line_height, txt=f"Pagamento Fixo: {format_currency(tech_data['Pagamento Fixo'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Pagamento Fixo: {format_cents(tech_data['Pagamento Fixo'])}", ln=1)
             pdf.set_x(x_pos)
             
             if tech_data['Variáveis'] > 0:
@@ -79,13 +79,13 @@ def create_payroll_summary_with_vars_pdf(payroll_data, custom_variables, start_d
             elif tech_data['Variáveis'] < 0:
                 pdf.set_text_color(255, 0, 0)
             
-            pdf.cell(col_width, line_height, txt=f"Variáveis: {format_currency(tech_data['Variáveis'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Variáveis: {format_cents(tech_data['Variáveis'])}", ln=1)
             pdf.set_text_color(0, 0, 0)
             
             pdf.set_x(x_pos)
-            pdf.cell(col_width, line_height, txt=f"Pagamento Final: {format_currency(tech_data['Pagamento Final'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Pagamento Final: {format_cents(tech_data['Pagamento Final'])}", ln=1)
             pdf.set_x(x_pos)
-            pdf.cell(col_width, line_height, txt=f"Support Value: {format_currency(tech_data['Support Value'])}", ln=1)
+            pdf.cell(col_width, line_height, txt=f"Support Value: {format_cents(tech_data['Support Value'])}", ln=1)
 
         pdf.set_y(y_start + block_height_tech + 5)
         pdf.set_text_color(0, 0, 0)
@@ -114,8 +114,8 @@ def create_payroll_summary_with_vars_pdf(payroll_data, custom_variables, start_d
             for j, var_data in enumerate(var_group):
                 x_pos = 10 + j * col_width
                 
-                total_debt = var_data['valor_da_parcela'] * var_data['total_de_parcelas']
-                paid_debt = var_data['valor_da_parcela'] * var_data['parcela_atual']
+                total_debt = dollars_to_cents(var_data['valor_da_parcela']) * var_data['total_de_parcelas']
+                paid_debt = dollars_to_cents(var_data['valor_da_parcela']) * var_data['parcela_atual']
                 total_value = var_data['valor_da_parcela']
                 
                 if total_value > 0:
@@ -138,15 +138,15 @@ def create_payroll_summary_with_vars_pdf(payroll_data, custom_variables, start_d
                 pdf.set_x(x_pos)
                 pdf.cell(col_width, line_height, txt=f"Descrição: {var_data['description']}", ln=1)
                 pdf.set_x(x_pos)
-                pdf.cell(col_width, line_height, txt=f"Valor da Parcela: {format_currency(var_data['valor_da_parcela'])}", ln=1)
+                pdf.cell(col_width, line_height, txt=f"Valor da Parcela: {format_cents(dollars_to_cents(var_data['valor_da_parcela']))}", ln=1)
                 pdf.set_x(x_pos)
                 pdf.cell(col_width, line_height, txt=f"Total de Parcelas: {var_data['total_de_parcelas']}", ln=1)
                 pdf.set_x(x_pos)
                 pdf.cell(col_width, line_height, txt=f"Parcela Atual: {var_data['parcela_atual']}", ln=1)
                 pdf.set_x(x_pos)
-                pdf.cell(col_width, line_height, txt=f"Dívida Total: {format_currency(total_debt)}", ln=1)
+                pdf.cell(col_width, line_height, txt=f"Dívida Total: {format_cents(total_debt)}", ln=1)
                 pdf.set_x(x_pos)
-                pdf.cell(col_width, line_height, txt=f"Dívida Paga: {format_currency(paid_debt)}", ln=1)
+                pdf.cell(col_width, line_height, txt=f"Dívida Paga: {format_cents(paid_debt)}", ln=1)
                 
             pdf.set_y(y_start + block_height_vars + 5)
             pdf.set_text_color(0, 0, 0)
@@ -0,0 +1,70 @@
+"""
+PDFs dos botões de download gerados a pedido. Em vez de montar cada PDF com
+o FPDF em todas as execuções do script, as páginas passam ao
+st.download_button uma função (ver lazy_pdf) que só é chamada quando o
+utilizador clica no botão. O PDF gerado fica guardado pelo hash do
+conteúdo dos dados de que foi gerado, pelo que pedir de novo o mesmo
+relatório não volta a fazer a paginação.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from .config import PDF_CACHE_SIZE
+
+# PDFs gerados (bytes), pela chave de pdf_cache_key; as funções do
+# st.download_button correm numa thread à parte, daí o lock
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def _update_digest(digest, value):
+    """Junta ao hash o conteúdo de value: DataFrames pelos valores, índice, colunas e tipos; o resto pelo repr."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes])).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    else:
+        digest.update(repr(value).encode('utf-8'))
+    digest.update(b'\x00')
+
+
+def pdf_cache_key(create, *args):
+    """Chave do cache: função que gera o PDF mais o hash do conteúdo dos argumentos."""
+    digest = hashlib.sha256()
+    for value in args:
+        _update_digest(digest, value)
+    return f"{create.__module__}.{create.__qualname__}-{digest.hexdigest()}"
+
+
+def pdf_bytes(create, *args):
+    """Gera o PDF create(*args) e retorna-o em bytes, como o st.download_button espera."""
+    return create(*args).output(dest='S').encode('latin-1')
+
+
+def cached_pdf(create, *args):
+    """
+    Bytes do PDF create(*args), do cache quando o mesmo PDF já foi gerado
+    com os mesmos dados. Ficam no máximo PDF_CACHE_SIZE PDFs; os usados há
+    mais tempo saem primeiro.
+    """
+    key = pdf_cache_key(create, *args)
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            return _pdf_cache[key]
+
+    content = pdf_bytes(create, *args)
+    with _pdf_cache_lock:
+        _pdf_cache[key] = content
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+    return content
+
+
+def lazy_pdf(create, *args):
+    """
+    Função sem argumentos para o data do st.download_button: gera (ou lê do
+    cache) o PDF create(*args) só quando o download é pedido. Os argumentos
+    não devem ser alterados depois de passados.
+    """
+    return lambda: cached_pdf(create, *args)
@@ -1,10 +1,18 @@
 from fpdf import FPDF
 from datetime import datetime
 import pandas as pd
-from .utils import format_currency
+from .money import format_cents
 from .config import FORMAS_PAGAMENTO_VALIDAS, INVALID_CLIENTS
 
-def create_pdf(data):
+def create_pdf(cube, not_completed=None):
+    """
+    Relatório geral a partir do cubo de atendimentos realizados (ver
+    modules/service_cube.py), já com as colunas 'Pagamento Tecnico' e
+    'Lucro Empresa'. A secção de não realizados só é incluída se
+    not_completed for indicado.
+    """
+    if not_completed is None:
+        not_completed = cube.iloc[0:0]
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -24,15 +32,12 @@ def create_pdf(data):
     pdf.cell(page_width, 10, txt=f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=1, align='R')
     pdf.ln(10)
 
-    completed_services = data[data['Realizado']]
-    not_completed = data[(data['Realizado'] == False) & (data['Cliente'].notna())]
-
     metrics = [
-        ("Atendimentos Realizados", len(completed_services)),
+        ("Atendimentos Realizados", cube['Atendimentos'].sum()),
         ("Atendimentos Não Realizados", len(not_completed)),
-        ("Total em Serviços", format_currency(completed_services['Serviço'].sum())),
-        ("Total em Gorjetas", format_currency(completed_services['Gorjeta'].sum())),
-        ("Total de Entrada", format_currency(completed_services['Lucro Empresa'].sum()))
+        ("Total em Serviços", format_cents(cube['Serviço'].sum())),
+        ("Total em Gorjetas", format_cents(cube['Gorjeta'].sum())),
+        ("Total de Entrada", format_cents(cube['Lucro Empresa'].sum()))
     ]
 
     for metric, value in metrics:
@@ -45,12 +50,13 @@ def create_pdf(data):
     pdf.set_font("Arial", 'B', 14)
     pdf.cell(page_width, 10, txt="Resumo por Técnico", ln=1)
 
-    tech_summary = completed_services.groupby(['Nome', 'Categoria']).agg({
+    # O mesmo resumo serve as duas secções por técnico
+    tech_summary = cube.groupby(['Nome', 'Categoria'], observed=True).agg({
         'Serviço': 'sum',
         'Gorjeta': 'sum',
         'Pagamento Tecnico': 'sum',
         'Lucro Empresa': 'sum',
-        'Cliente': 'count'
+        'Clientes': 'sum'
     }).reset_index()
 
     tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços', 'Total Gorjetas',
@@ -67,10 +73,10 @@ def create_pdf(data):
     for _, row in tech_summary.iterrows():
         pdf.cell(col_widths[0], 10, txt=str(row['Técnico'])[:15], border=1)
         pdf.cell(col_widths[1], 10, txt=str(row['Categoria'])[:10], border=1)
-        pdf.cell(col_widths[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-        pdf.cell(col_widths[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-        pdf.cell(col_widths[4], 10, txt=format_currency(row['Total Pagamento']), border=1, align='R')
-        pdf.cell(col_widths[5], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
+        pdf.cell(col_widths[2], 10, txt=format_cents(row['Total Serviços']), border=1, align='R')
+        pdf.cell(col_widths[3], 10, txt=format_cents(row['Total Gorjetas']), border=1, align='R')
+        pdf.cell(col_widths[4], 10, txt=format_cents(row['Total Pagamento']), border=1, align='R')
+        pdf.cell(col_widths[5], 10, txt=format_cents(row['Lucro Empresa']), border=1, align='R')
         pdf.ln()
 
     pdf.ln(10)
@@ -79,17 +85,6 @@ def create_pdf(data):
     pdf.set_font("Arial", 'B', 14)
     pdf.cell(page_width, 10, txt="2. Resumo por Técnico", ln=1)
 
-    tech_summary = completed_services.groupby(['Nome', 'Categoria']).agg({
-        'Serviço': 'sum',
-        'Gorjeta': 'sum',
-        'Pagamento Tecnico': 'sum',
-        'Lucro Empresa': 'sum',
-        'Cliente': 'count'
-    }).reset_index()
-
-    tech_summary.columns = ['Técnico', 'Categoria', 'Total Serviços', 'Total Gorjetas',
-                            'Total Pagamento', 'Lucro Empresa', 'Atendimentos']
-
     pdf.set_font("Arial", size=8)
     col_widths = [30, 25, 25, 25, 25, 25]
 
@@ -102,10 +97,10 @@ def create_pdf(data):
         tech_name = str(row['Técnico'])[:15] + '...' if len(str(row['Técnico'])) > 15 else str(row['Técnico'])
         pdf.cell(col_widths[0], 10, txt=tech_name, border=1)
         pdf.cell(col_widths[1], 10, txt=str(row['Categoria'])[:10], border=1)
-        pdf.cell(col_widths[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-        pdf.cell(col_widths[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-        pdf.cell(col_widths[4], 10, txt=format_currency(row['Total Pagamento']), border=1, align='R')
-        pdf.cell(col_widths[5], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
+        pdf.cell(col_widths[2], 10, txt=format_cents(row['Total Serviços']), border=1, align='R')
+        pdf.cell(col_widths[3], 10, txt=format_cents(row['Total Gorjetas']), border=1, align='R')
+        pdf.cell(col_widths[4], 10, txt=format_cents(row['Total Pagamento']), border=1, align='R')
+        pdf.cell(col_widths[5], 10, txt=format_cents(row['Lucro Empresa']), border=1, align='R')
         pdf.ln()
 
     pdf.ln(10)
@@ -115,11 +110,12 @@ def create_pdf(data):
     pdf.cell(page_width, 10, txt="3. Métodos de Pagamento", ln=1)
     pdf.set_font("Arial", size=10)
 
-    valid_payments = completed_services[completed_services['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
+    valid_payments = cube[cube['Pagamento'].isin(FORMAS_PAGAMENTO_VALIDAS)]
 
     if not valid_payments.empty:
-        payment_methods = valid_payments.groupby('Pagamento').agg({
-            'Serviço': ['sum', 'count'],
+        payment_methods = valid_payments.groupby('Pagamento', observed=True).agg({
+            'Serviço': 'sum',
+            'Serviços': 'sum',
             'Gorjeta': 'sum',
             'Lucro Empresa': 'sum'
         }).reset_index()
@@ -141,10 +137,10 @@ def create_pdf(data):
         for _, row in payment_methods.iterrows():
             pdf.cell(col_widths_payments[0], 10, txt=str(row['Método'])[:12], border=1)
             pdf.cell(col_widths_payments[1], 10, txt=str(row['Qtd Usos']), border=1, align='C')
-            pdf.cell(col_widths_payments[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-            pdf.cell(col_widths_payments[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-            pdf.cell(col_widths_payments[4], 10, txt=format_currency(row['Total Geral']), border=1, align='R')
-            pdf.cell(col_widths_payments[5], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
+            pdf.cell(col_widths_payments[2], 10, txt=format_cents(row['Total Serviços']), border=1, align='R')
+            pdf.cell(col_widths_payments[3], 10, txt=format_cents(row['Total Gorjetas']), border=1, align='R')
+            pdf.cell(col_widths_payments[4], 10, txt=format_cents(row['Total Geral']), border=1, align='R')
+            pdf.cell(col_widths_payments[5], 10, txt=format_cents(row['Lucro Empresa']), border=1, align='R')
             pdf.ln()
 
         pdf.ln(5)
@@ -165,8 +161,9 @@ def create_pdf(data):
     pdf.cell(page_width, 10, txt="4. Atendimentos por Dia da Semana", ln=1)
     pdf.set_font("Arial", size=10)
 
-    day_summary = completed_services.groupby('Dia').agg({
-        'Serviço': ['count', 'sum'],
+    day_summary = cube.groupby('Dia', observed=True).agg({
+        'Serviços': 'sum',
+        'Serviço': 'sum',
         'Gorjeta': 'sum',
         'Lucro Empresa': 'sum'
     }).reset_index()
@@ -188,9 +185,9 @@ def create_pdf(data):
     for _, row in day_summary.iterrows():
         pdf.cell(col_widths_days[0], 10, txt=str(row['Dia']), border=1)
         pdf.cell(col_widths_days[1], 10, txt=str(row['Atendimentos']), border=1, align='C')
-        pdf.cell(col_widths_days[2], 10, txt=format_currency(row['Total Serviços']), border=1, align='R')
-        pdf.cell(col_widths_days[3], 10, txt=format_currency(row['Total Gorjetas']), border=1, align='R')
-        pdf.cell(col_widths_days[4], 10, txt=format_currency(row['Lucro Empresa']), border=1, align='R')
+        pdf.cell(col_widths_days[2], 10, txt=format_cents(row['Total Serviços']), border=1, align='R')
+        pdf.cell(col_widths_days[3], 10, txt=format_cents(row['Total Gorjetas']), border=1, align='R')
+        pdf.cell(col_widths_days[4], 10, txt=format_cents(row['Lucro Empresa']), border=1, align='R')
         pdf.ln()
 
     pdf.ln(10)
@@ -212,8 +209,12 @@ def create_pdf(data):
     return pdf
 
 
-def create_tech_payment_receipt(tech_data, tech_name, week):
-    """Cria um PDF com o recibo de pagamento detalhado para o técnico com papel timbrado"""
+def create_tech_payment_receipt(tech_data, tech_name, week, tech_cube):
+    """
+    Cria um PDF com o recibo de pagamento detalhado para o técnico com papel timbrado.
+    Os totais e o detalhe por dia vêm das células do cubo do técnico na
+    semana (tech_cube); tech_data tem os atendimentos listados no detalhe.
+    """
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
 
@@ -242,27 +243,25 @@ def create_tech_payment_receipt(tech_data, tech_name, week):
     pdf.cell(page_width, 10, txt="SUMMARY OF SERVICES", ln=1)
     pdf.set_font("Arial", size=10)
 
-    total_services = tech_data['Serviço'].sum()
-    total_tips = tech_data['Gorjeta'].sum()
-    total_payment = tech_data['Pagamento Tecnico'].sum()
-
-    def format_value(value):
-        return f"${value:,.2f}" if isinstance(value, (int, float)) else str(value)
+    total_services = tech_cube['Serviço'].sum()
+    total_tips = tech_cube['Gorjeta'].sum()
+    total_payment = tech_cube['Pagamento Tecnico'].sum()
+    total_schedules = tech_cube['Atendimentos'].sum()
 
     col_widths = [page_width / 2, page_width / 2]
 
     pdf.cell(col_widths[0], 10, txt="Total Schedules:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=str(len(tech_data)), border='B', ln=1, align='R')
+    pdf.cell(col_widths[1], 10, txt=str(total_schedules), border='B', ln=1, align='R')
 
     pdf.cell(col_widths[0], 10, txt="Total in Services:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_services), border='B', ln=1, align='R')
+    pdf.cell(col_widths[1], 10, txt=format_cents(total_services), border='B', ln=1, align='R')
 
     pdf.cell(col_widths[0], 10, txt="Total in Tips:", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_tips), border='B', ln=1, align='R')
+    pdf.cell(col_widths[1], 10, txt=format_cents(total_tips), border='B', ln=1, align='R')
 
     pdf.set_font("Arial", 'B', 12)
     pdf.cell(col_widths[0], 10, txt="Total Payment", border='B', ln=0)
-    pdf.cell(col_widths[1], 10, txt=format_value(total_payment), border='B', ln=1, align='R')
+    pdf.cell(col_widths[1], 10, txt=format_cents(total_payment), border='B', ln=1, align='R')
     pdf.set_font("Arial", size=10)
 
     pdf.ln(15)
@@ -271,12 +270,12 @@ def create_tech_payment_receipt(tech_data, tech_name, week):
     pdf.cell(page_width, 10, txt="DETAILS BY DAY", ln=1)
     pdf.set_font("Arial", size=8)
 
-    day_details = tech_data.groupby('Dia').agg({
+    day_details = tech_cube.groupby('Dia', observed=True).agg({
         'Serviço': 'sum',
         'Gorjeta': 'sum',
-        'Cliente': 'count',
+        'Clientes': 'sum',
         'Pagamento': lambda x: ', '.join([str(p) for p in x.unique() if pd.notna(p)])
-    }).reset_index()
+    }).reset_index().rename(columns={'Clientes': 'Cliente'})
 
     day_mapping = {
         'Domingo': 'Sun',
@@ -305,8 +304,8 @@ def create_tech_payment_receipt(tech_data, tech_name, week):
     for _, row in day_details.iterrows():
         pdf.cell(col_widths[0], 6, txt=str(row['Dia']), border=1)
         pdf.cell(col_widths[1], 6, txt=str(row['Cliente']), border=1, align='C')
-        pdf.cell(col_widths[2], 6, txt=format_value(row['Serviço']), border=1, align='R')
-        pdf.cell(col_widths[3], 6, txt=format_value(row['Gorjeta']), border=1, align='R')
+        pdf.cell(col_widths[2], 6, txt=format_cents(row['Serviço']), border=1, align='R')
+        pdf.cell(col_widths[3], 6, txt=format_cents(row['Gorjeta']), border=1, align='R')
         pdf.ln()
 
     pdf.ln(10)
@@ -342,8 +341,8 @@ def create_tech_payment_receipt(tech_data, tech_name, week):
             pdf.cell(col_widths_detailed[1], 6, txt=day_english, border=1)
             client_name = str(row['Cliente'])[:20] + '...' if len(str(row['Cliente'])) > 20 else str(row['Cliente'])
             pdf.cell(col_widths_detailed[2], 6, txt=client_name, border=1)
-            pdf.cell(col_widths_detailed[3], 6, txt=format_value(row['Serviço']), border=1, align='R')
-            pdf.cell(col_widths_detailed[4], 6, txt=format_value(row['Gorjeta']), border=1, align='R')
+            pdf.cell(col_widths_detailed[3], 6, txt=format_cents(row['Serviço']), border=1, align='R')
+            pdf.cell(col_widths_detailed[4], 6, txt=format_cents(row['Gorjeta']), border=1, align='R')
             payment = str(row['Pagamento']) if pd.notna(row['Pagamento']) else "-"
             pdf.cell(col_widths_detailed[5], 6, txt=payment[:12], border=1)
             pdf.ln()
@@ -354,8 +353,11 @@ def create_tech_payment_receipt(tech_data, tech_name, week):
 
     return pdf
 
-def create_technician_of_the_week_receipt(tech_data, tech_name, week):
-    """Cria um recibo personalizado para o 'Technician of the Week' sem preenchimento de fundo."""
+def create_technician_of_the_week_receipt(tech_data, tech_name, week, tech_cube):
+    """
+    Cria um recibo personalizado para o 'Technician of the Week' sem preenchimento de fundo.
+    Os totais e o detalhe por dia vêm de tech_cube, como em create_tech_payment_receipt.
+    """
     pdf = FPDF(orientation='P', unit='mm', format='A4')
     pdf.add_page()
 
@@ -392,9 +394,10 @@ def create_technician_of_the_week_receipt(tech_data, tech_name, week):
     pdf.ln(8)
 
     # Resumo
-    total_services = tech_data['Serviço'].sum()
-    total_tips = tech_data['Gorjeta'].sum()
-    total_payment = tech_data['Pagamento Tecnico'].sum()
+    total_services = tech_cube['Serviço'].sum()
+    total_tips = tech_cube['Gorjeta'].sum()
+    total_payment = tech_cube['Pagamento Tecnico'].sum()
+    total_schedules = tech_cube['Atendimentos'].sum()
 
     pdf.set_font("Arial", 'B', 14)
     pdf.set_text_color(0, 102, 204)
@@ -403,17 +406,17 @@ def create_technician_of_the_week_receipt(tech_data, tech_name, week):
     pdf.set_font("Arial", '', 11)
     pdf.set_text_color(0, 0, 0)
     pdf.cell(page_width / 2, 8, txt="Total Appointments:", ln=0)
-    pdf.cell(page_width / 2, 8, txt=str(len(tech_data)), ln=1, align='R')
+    pdf.cell(page_width / 2, 8, txt=str(total_schedules), ln=1, align='R')
 
     pdf.cell(page_width / 2, 8, txt="Total Services:", ln=0)
-    pdf.cell(page_width / 2, 8, txt=f"${total_services:,.2f}", ln=1, align='R')
+    pdf.cell(page_width / 2, 8, txt=format_cents(total_services), ln=1, align='R')
 
     pdf.cell(page_width / 2, 8, txt="Total Tips:", ln=0)
-    pdf.cell(page_width / 2, 8, txt=f"${total_tips:,.2f}", ln=1, align='R')
+    pdf.cell(page_width / 2, 8, txt=format_cents(total_tips), ln=1, align='R')
 
     pdf.set_font("Arial", 'B', 12)
     pdf.cell(page_width / 2, 8, txt="Total Payment:", ln=0)
-    pdf.cell(page_width / 2, 8, txt=f"${total_payment:,.2f}", ln=1, align='R')
+    pdf.cell(page_width / 2, 8, txt=format_cents(total_payment), ln=1, align='R')
 
     pdf.ln(10)
 
@@ -425,11 +428,11 @@ def create_technician_of_the_week_receipt(tech_data, tech_name, week):
     pdf.set_text_color(0, 0, 0)
     pdf.set_font("Arial", size=9)
 
-    day_details = tech_data.groupby('Dia').agg({
+    day_details = tech_cube.groupby('Dia', observed=True).agg({
         'Serviço': 'sum',
         'Gorjeta': 'sum',
-        'Cliente': 'count'
-    }).reset_index()
+        'Clientes': 'sum'
+    }).reset_index().rename(columns={'Clientes': 'Cliente'})
 
     day_mapping = {
         'Domingo': 'Sun',
@@ -458,8 +461,8 @@ def create_technician_of_the_week_receipt(tech_data, tech_name, week):
     for _, row in day_details.iterrows():
         pdf.cell(col_widths[0], 8, txt=str(row['Dia']), border=1)
         pdf.cell(col_widths[1], 8, txt=str(row['Cliente']), border=1, align='C')
-        pdf.cell(col_widths[2], 8, txt=f"${row['Serviço']:,.2f}", border=1, align='R')
-        pdf.cell(col_widths[3], 8, txt=f"${row['Gorjeta']:,.2f}", border=1, align='R')
+        pdf.cell(col_widths[2], 8, txt=format_cents(row['Serviço']), border=1, align='R')
+        pdf.cell(col_widths[3], 8, txt=format_cents(row['Gorjeta']), border=1, align='R')
         pdf.ln()
 
     pdf.ln(10)
@@ -497,8 +500,8 @@ def create_technician_of_the_week_receipt(tech_data, tech_name, week):
         pdf.cell(col_widths_detailed[1], 6, txt=day_mapping.get(row['Dia'], row['Dia']), border=1)
         client_name = str(row['Cliente'])[:20] + '...' if len(str(row['Cliente'])) > 20 else str(row['Cliente'])
         pdf.cell(col_widths_detailed[2], 6, txt=client_name, border=1)
-        pdf.cell(col_widths_detailed[3], 6, txt=f"${row['Serviço']:,.2f}", border=1, align='R')
-        pdf.cell(col_widths_detailed[4], 6, txt=f"${row['Gorjeta']:,.2f}", border=1, align='R')
+        pdf.cell(col_widths_detailed[3], 6, txt=format_cents(row['Serviço']), border=1, align='R')
+        pdf.cell(col_widths_detailed[4], 6, txt=format_cents(row['Gorjeta']), border=1, align='R')
         payment = str(row['Pagamento']) if pd.notna(row['Pagamento']) else "-"
         pdf.cell(col_widths_detailed[5], 6, txt=payment[:12], border=1)
         pdf.ln()
@@ -0,0 +1,64 @@
+"""
+Cubo de agregação dos atendimentos realizados: uma linha por combinação de
+técnico, semana, categoria, data, dia e forma de pagamento, com as somas e
+contagens de que as páginas, os gráficos e os PDFs precisam. Os resumos são
+agregações do cubo, em vez de percorrerem de novo todos os atendimentos.
+"""
+import pandas as pd
+
+# Granularidade do cubo
+CUBE_KEYS = ['Nome', 'Semana', 'Categoria', 'Data', 'Dia', 'Pagamento']
+
+# Medidas somadas diretamente dos atendimentos
+SUM_MEASURES = ['Serviço', 'Gorjeta', 'Pets']
+
+# Contagens: todos os atendimentos, clientes preenchidos e serviços preenchidos
+COUNT_MEASURES = ['Atendimentos', 'Clientes', 'Serviços']
+
+
+def build_service_cube(data):
+    """
+    Agrega os atendimentos realizados de data ao nível de CUBE_KEYS.
+
+    As linhas com alguma chave em falta (ex.: sem forma de pagamento) também
+    ficam no cubo, para que os totais gerais sejam os mesmos dos
+    atendimentos; os resumos por uma chave ignoram-nas, como o groupby.
+    As células seguem a ordem em que as combinações aparecem nos dados.
+    """
+    completed = data[data['Realizado'] == True]
+    sums = [column for column in SUM_MEASURES if column in completed.columns]
+
+    aggregations = {column: (column, 'sum') for column in sums}
+    aggregations['Atendimentos'] = ('Realizado', 'size')
+    aggregations['Clientes'] = ('Cliente', 'count')
+    aggregations['Serviços'] = ('Serviço', 'count')
+
+    cube = completed.groupby(CUBE_KEYS, observed=True, dropna=False, sort=False).agg(**aggregations)
+    return cube.reset_index()
+
+
+def cube_weekly_totals(cube):
+    """
+    Totais semanais por técnico e categoria (Serviço, Gorjeta, Dia com o
+    número de atendimentos com dia e Dias Trabalhados com o número de datas
+    distintas do técnico na semana), agregados a partir do cubo.
+    """
+    dias_trabalhados = cube.groupby(['Nome', 'Semana', 'Data'], observed=True).size().reset_index()
+    dias_trabalhados = dias_trabalhados.groupby(['Nome', 'Semana'], observed=True).size().reset_index(name='Dias Trabalhados')
+
+    with_day = cube.assign(Dia=cube['Atendimentos'].where(cube['Dia'].notna(), 0))
+    weekly_totals = with_day.groupby(['Nome', 'Semana', 'Categoria'], observed=True).agg({
+        'Serviço': 'sum',
+        'Gorjeta': 'sum',
+        'Dia': 'sum'
+    }).reset_index()
+
+    return pd.merge(weekly_totals, dias_trabalhados, on=['Nome', 'Semana'], how='left')
+
+
+def cube_slice(cube, **keys):
+    """Células do cubo com os valores indicados nas chaves (ex.: cube_slice(cube, Nome=..., Semana=...))."""
+    mask = pd.Series(True, index=cube.index)
+    for column, value in keys.items():
+        mask &= cube[column] == value
+    return cube[mask]
@@ -0,0 +1,487 @@
+from functools import lru_cache
+from collections import namedtuple
+import pandas as pd
+import numpy as np
+from openpyxl.cell.cell import ERROR_CODES
+from .config import INVALID_CLIENTS, FORMAS_PAGAMENTO_VALIDAS
+
+# Incrementar sempre que uma alteração no parser mudar o DataFrame produzido
+PARSER_VERSION = '4'
+
+# Faixas de colunas (início, fim) de cada dia da semana no modelo padrão das
+# folhas WEEK; usadas quando o cabeçalho não permite detetar a geometria
+DAY_COLUMNS = [(1, 9), (10, 18), (19, 27), (28, 36), (37, 45), (46, 54), (55, 63)]
+# Cada faixa tem 9 colunas a partir do cliente; a coluna DATE é a segunda
+BAND_WIDTH = 9
+DATE_LABEL = 'DATE'
+DIAS_SEMANA = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+HEADER_KEYWORDS = ['Schedule', 'DATE', 'SERVICE']
+
+RECORD_COLUMNS = [
+    'Semana', 'Nome', 'Categoria', 'Origem', 'Dia', 'Data', 'Cliente', 'Serviço',
+    'Gorjeta', 'Pets', 'Pagamento', 'ID Pagamento', 'Verificado', 'Realizado'
+]
+
+# Textos que o pd.read_excel converte em NaN por omissão
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+
+def _to_float_or_nan(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+# Versões vetorizadas (ufuncs de objetos) das operações feitas célula a célula
+_as_text = np.frompyfunc(str, 1, 1)
+_strip = np.frompyfunc(str.strip, 1, 1)
+_upper = np.frompyfunc(str.upper, 1, 1)
+_is_str = np.frompyfunc(lambda cell: isinstance(cell, str), 1, 1)
+_to_float = np.frompyfunc(float, 1, 1)
+_to_float_or_nan = np.frompyfunc(_to_float_or_nan, 1, 1)
+
+
+_INVALID_CLIENTS_UPPER = frozenset(c.upper() for c in INVALID_CLIENTS)
+_INVALID_CLIENTS_ARRAY = np.array(sorted(_INVALID_CLIENTS_UPPER), dtype=object)
+
+# Geometria de uma folha: faixas (início, fim) por dia e, para o motor
+# vetorizado, a matriz (dias, BAND_WIDTH) com os índices das colunas de cada faixa
+ExtractionPlan = namedtuple('ExtractionPlan', ['bands', 'columns'])
+
+
+def header_fingerprint(header_row):
+    """Textos normalizados da linha 'Schedule/DATE/SERVICE': identificam o modelo da folha."""
+    return tuple(cell.strip().upper() if isinstance(cell, str) else '' for cell in header_row)
+
+
+@lru_cache(maxsize=128)
+def compile_extraction_plan(fingerprint):
+    """
+    Calcula as faixas dos dias a partir das colunas 'DATE' do cabeçalho (o
+    cliente fica na coluna anterior). Os dias sem 'DATE' no cabeçalho seguem o
+    espaçamento das faixas detetadas; sem nenhuma, usa DAY_COLUMNS. O
+    resultado fica em cache por modelo de cabeçalho.
+    """
+    starts = []
+    for col, label in enumerate(fingerprint):
+        if label == DATE_LABEL and col >= 1 and (not starts or col - 1 >= starts[-1] + BAND_WIDTH):
+            starts.append(col - 1)
+    if not starts:
+        starts = [start for start, _ in DAY_COLUMNS]
+
+    spacing = starts[-1] - starts[-2] if len(starts) > 1 else BAND_WIDTH
+    while len(starts) < len(DIAS_SEMANA):
+        starts.append(starts[-1] + spacing)
+    starts = starts[:len(DIAS_SEMANA)]
+
+    columns = np.array([np.arange(start, start + BAND_WIDTH) for start in starts])
+    columns.flags.writeable = False
+    return ExtractionPlan(tuple((start, start + BAND_WIDTH - 1) for start in starts), columns)
+
+
+def detect_layout(header_row):
+    """Plano de extração da folha a partir da sua linha de cabeçalho."""
+    return compile_extraction_plan(header_fingerprint(header_row))
+
+
+def _contains(text, keyword):
+    """Máscara booleana das células de texto que contêm a palavra-chave."""
+    return np.frompyfunc(lambda cell: keyword in cell, 1, 1)(text).astype(bool)
+
+
+def _find_header_row(block):
+    """Índice da linha 'Schedule/DATE/SERVICE' dentro de um bloco de técnico, ou None."""
+    return next((i for i, row in enumerate(block) if all(
+        keyword in str(row.values) for keyword in HEADER_KEYWORDS)), None)
+
+
+def parse_week_sheet_loop(df, sheet_name):
+    """
+    Extrai os atendimentos de uma folha WEEK percorrendo-a linha a linha.
+    Implementação de referência do motor vetorizado (parse_week_sheet).
+    """
+    technician_blocks = []
+    current_block = []
+    collecting = False
+    for idx, row in df.iterrows():
+        if any('NAME:' in str(cell) for cell in row.values):
+            if current_block:
+                technician_blocks.append(current_block)
+                current_block = []
+            collecting = True
+        if collecting:
+            current_block.append(row)
+    if current_block:
+        technician_blocks.append(current_block)
+
+    # A geometria das faixas é detetada uma vez, no primeiro cabeçalho da folha
+    header_rows = [_find_header_row(block) for block in technician_blocks]
+    first_header = next(((block, idx) for block, idx in zip(technician_blocks, header_rows) if idx is not None), None)
+    if first_header is None:
+        return pd.DataFrame()
+    header_block, header_idx = first_header
+    n_cols = len(df.columns)
+    day_bands = [
+        (day_idx, start_col, end_col)
+        for day_idx, (start_col, end_col) in enumerate(detect_layout(header_block[header_idx].values).bands)
+        if n_cols > end_col
+    ]
+
+    week_data = []
+    for block, header_row_idx in zip(technician_blocks, header_rows):
+        name_row = next((row for row in block if any('NAME:' in str(cell) for cell in row.values)), None)
+
+        if name_row is None:
+            continue
+
+        # Procura a coluna "NAME:" para garantir que o acesso é seguro
+        name_col_idx = -1
+        for i, cell in enumerate(name_row.values):
+            if isinstance(cell, str) and 'NAME:' in cell:
+                name_col_idx = i
+                break
+
+        if name_col_idx == -1 or len(name_row) <= name_col_idx + 1:
+            continue
+
+        technician_info = {
+            'Semana': sheet_name,
+            'Nome': name_row[name_col_idx + 1] if len(name_row) > name_col_idx + 1 else None,
+            'Categoria': name_row[name_col_idx + 3] if len(name_row) > name_col_idx + 3 else None,
+            'Origem': name_row[name_col_idx + 5] if len(name_row) > name_col_idx + 5 and 'From:' in str(
+                name_row[name_col_idx + 4]) else None
+        }
+
+        if header_row_idx is None:
+            continue
+
+        days_data = []
+        for i in range(header_row_idx + 1, len(block)):
+            row_values = block[i].values
+            for day_idx, start_col, end_col in day_bands:
+                day_data = row_values[start_col:end_col + 1]
+                client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
+
+                if not client_name or client_name.upper() in _INVALID_CLIENTS_UPPER:
+                    continue
+
+                # Verifica se a coluna de serviço e gorjeta existem
+                if len(day_data) > 2 and pd.notna(day_data[2]) and str(day_data[2]).strip() and str(day_data[2]).strip() != 'nan':
+                    service_value = _to_float_or_nan(day_data[2])
+
+                    if not np.isnan(service_value):
+                        pagamento = day_data[5] if len(day_data) > 5 and pd.notna(day_data[5]) and str(
+                            day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
+                        tip_value = float(day_data[3]) if len(day_data) > 3 and pd.notna(day_data[3]) else 0
+                        day_info = {
+                            'Dia': DIAS_SEMANA[day_idx],
+                            'Data': day_data[1],
+                            'Cliente': client_name,
+                            'Serviço': service_value,
+                            'Gorjeta': tip_value,
+                            'Pets': day_data[4] if len(day_data) > 4 and pd.notna(day_data[4]) else 0,
+                            'Pagamento': pagamento,
+                            'ID Pagamento': day_data[6] if len(day_data) > 6 and pd.notna(day_data[6]) else None,
+                            'Verificado': day_data[7] if len(day_data) > 7 and pd.notna(day_data[7]) else False,
+                            'Realizado': True
+                        }
+                        days_data.append({**technician_info, **day_info})
+                elif pd.notna(day_data[0]):
+                    day_info = {
+                        'Dia': DIAS_SEMANA[day_idx],
+                        'Data': day_data[1],
+                        'Cliente': client_name,
+                        'Serviço': 0,
+                        'Gorjeta': 0,
+                        'Pets': 0,
+                        'Pagamento': None,
+                        'ID Pagamento': None,
+                        'Verificado': False,
+                        'Realizado': False
+                    }
+                    days_data.append({**technician_info, **day_info})
+
+        week_data.extend(days_data)
+
+    return pd.DataFrame(week_data)
+
+
+def parse_week_sheet(df, sheet_name):
+    """
+    Extrai os atendimentos de uma folha WEEK trabalhando sobre a folha inteira
+    como um array NumPy de objetos.
+
+    As linhas 'NAME:' e os cabeçalhos 'Schedule/DATE/SERVICE' são localizados
+    com máscaras vetorizadas e as sete faixas de dias são recortadas com
+    slicing/reshape. O resultado é idêntico ao de parse_week_sheet_loop.
+    """
+    # Mesma representação das linhas entregues por df.iterrows()
+    values = np.asarray(df.values, dtype=object)
+    n_rows, n_cols = values.shape
+    if n_rows == 0:
+        return pd.DataFrame()
+
+    text = _as_text(values)
+    name_cells = _contains(text, 'NAME:')
+    name_rows = np.flatnonzero(name_cells.any(axis=1))
+    if len(name_rows) == 0:
+        return pd.DataFrame()
+
+    # Cada bloco vai de uma linha 'NAME:' até à seguinte (exclusive)
+    block_ends = np.append(name_rows[1:], n_rows)
+
+    # A coluna 'NAME:' tem de ser uma célula de texto
+    name_text_cells = name_cells[name_rows] & _is_str(values[name_rows]).astype(bool)
+    has_name_col = name_text_cells.any(axis=1)
+    name_cols = name_text_cells.argmax(axis=1)
+
+    header_mask = np.ones(n_rows, dtype=bool)
+    for keyword in HEADER_KEYWORDS:
+        header_mask &= _contains(text, keyword).any(axis=1)
+    header_rows = np.flatnonzero(header_mask)
+
+    # Primeira linha de cabeçalho dentro de cada bloco (a própria linha 'NAME:' incluída);
+    # n_rows funciona como sentinela para "cabeçalho não encontrado"
+    header_rows = np.append(header_rows, n_rows)
+    block_headers = header_rows[np.searchsorted(header_rows, name_rows)]
+    has_header = block_headers < block_ends
+
+    valid_blocks = has_name_col & (n_cols > name_cols + 1) & has_header
+    if not valid_blocks.any():
+        return pd.DataFrame()
+
+    # Linhas de dados de todos os blocos válidos, com o índice do bloco de origem
+    starts = block_headers[valid_blocks] + 1
+    lengths = block_ends[valid_blocks] - starts
+    block_ids = np.repeat(np.flatnonzero(valid_blocks), lengths)
+    offsets = starts - (np.cumsum(lengths) - lengths)
+    data_rows = np.repeat(offsets, lengths) + np.arange(lengths.sum())
+
+    # Geometria das faixas detetada no primeiro cabeçalho da folha
+    plan = detect_layout(values[block_headers[has_header][0]])
+    n_days = sum(1 for _, end_col in plan.bands if n_cols > end_col)
+    if len(data_rows) == 0 or n_days == 0:
+        return pd.DataFrame()
+
+    # (linhas, dias, 9 colunas) -> uma linha por célula de dia, na ordem linha/dia
+    band_columns = plan.columns[:n_days].ravel()
+    cells = values[np.ix_(data_rows, band_columns)].reshape(-1, BAND_WIDTH)
+    cells_text = text[np.ix_(data_rows, band_columns)].reshape(-1, BAND_WIDTH)
+    cell_blocks = np.repeat(block_ids, n_days)
+    day_idx = np.tile(np.arange(n_days), len(data_rows))
+
+    notna = pd.notna(cells)
+    clients = np.where(notna[:, 0], _strip(cells_text[:, 0]), '')
+    is_client = (clients != '') & ~np.isin(_upper(clients), _INVALID_CLIENTS_ARRAY)
+
+    service_text = _strip(cells_text[:, 2])
+    has_service = notna[:, 2] & (service_text != '') & (service_text != 'nan')
+    service_values = np.full(len(cells), np.nan, dtype=object)
+    service_values[has_service] = _to_float_or_nan(cells[has_service, 2])
+    completed = has_service & ~pd.isna(service_values)
+
+    keep = is_client & (completed | ~has_service)
+    completed = completed[keep]
+    cells, notna, cells_text = cells[keep], notna[keep], cells_text[keep]
+    if len(cells) == 0:
+        return pd.DataFrame()
+
+    def completed_or(values_if_completed, default):
+        column = np.full(len(cells), default, dtype=object)
+        column[completed] = values_if_completed[completed]
+        return column
+
+    def value_or(col, default):
+        return np.where(notna[:, col], cells[:, col], default)
+
+    tips = np.full(len(cells), 0, dtype=object)
+    has_tip = completed & notna[:, 3]
+    tips[has_tip] = _to_float(cells[has_tip, 3])
+
+    valid_payment = notna[:, 5] & np.isin(_strip(cells_text[:, 5]), np.array(FORMAS_PAGAMENTO_VALIDAS, dtype=object))
+
+    name_values = values[name_rows]
+    block_rows = np.arange(len(name_rows))
+    nomes = name_values[block_rows, np.minimum(name_cols + 1, n_cols - 1)]
+    categorias = np.where(n_cols > name_cols + 3, name_values[block_rows, np.minimum(name_cols + 3, n_cols - 1)], None)
+    has_origin = (n_cols > name_cols + 5) & _contains(
+        text[name_rows, np.minimum(name_cols + 4, n_cols - 1)], 'From:')
+    origens = np.where(has_origin, name_values[block_rows, np.minimum(name_cols + 5, n_cols - 1)], None)
+
+    cell_blocks = cell_blocks[keep]
+    columns = {
+        'Semana': np.full(len(cells), sheet_name, dtype=object),
+        'Nome': nomes[cell_blocks],
+        'Categoria': categorias[cell_blocks],
+        'Origem': origens[cell_blocks],
+        'Dia': np.array(DIAS_SEMANA, dtype=object)[day_idx[keep]],
+        'Data': cells[:, 1],
+        'Cliente': clients[keep],
+        'Serviço': completed_or(service_values[keep], 0),
+        'Gorjeta': tips,
+        'Pets': completed_or(value_or(4, 0), 0),
+        'Pagamento': completed_or(np.where(valid_payment, cells[:, 5], None), None),
+        'ID Pagamento': completed_or(value_or(6, None), None),
+        'Verificado': completed_or(value_or(7, False), False),
+        'Realizado': completed.astype(object),
+    }
+
+    # Linhas como tuplos: mesma inferência de tipos do DataFrame construído a partir de dicts
+    return pd.DataFrame(list(zip(*(columns[c] for c in RECORD_COLUMNS))), columns=RECORD_COLUMNS)
+
+
+def convert_cell_value(value):
+    """Converte um valor lido pelo openpyxl (values_only) tal como o pd.read_excel faz."""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return np.nan if value in NA_STRINGS or value in ERROR_CODES else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+def iter_sheet_rows(raw_rows, width):
+    """
+    Converte as linhas cruas do openpyxl, sem as células vazias no fim.
+    width é uma lista de um elemento atualizada com a largura máxima vista,
+    que equivale ao número de colunas do DataFrame do pd.read_excel.
+
+    Nas colunas com texto (ex.: cliente e data, que têm o cabeçalho), o
+    pd.read_excel troca cada valor pelo primeiro valor igual da coluna:
+    True, 1 e 1.0 passam todos a ser o que aparece primeiro. Os valores que
+    não são texto passam pelo mesmo memo, por coluna, para que o motor
+    'streaming' produza os mesmos registos.
+    """
+    memos = []
+    for raw_row in raw_rows:
+        row_length = len(raw_row)
+        while row_length and (raw_row[row_length - 1] is None or raw_row[row_length - 1] == ''):
+            row_length -= 1
+        width[0] = max(width[0], row_length)
+        while len(memos) < row_length:
+            memos.append({})
+        row = [convert_cell_value(value) for value in raw_row[:row_length]]
+        for col, value in enumerate(row):
+            if not isinstance(value, str):
+                row[col] = memos[col].setdefault(value, value)
+        yield row
+
+
+def iter_technician_blocks(rows):
+    """Agrupa as linhas em blocos que começam numa linha 'NAME:'; as linhas anteriores são ignoradas."""
+    block = None
+    for row in rows:
+        if any('NAME:' in str(cell) for cell in row):
+            if block:
+                yield block
+            block = [row]
+        elif block is not None:
+            block.append(row)
+    if block:
+        yield block
+
+
+def iter_day_records(blocks):
+    """
+    Produz (número do bloco, última coluna da faixa, dados do dia) para cada
+    célula de cliente encontrada depois do cabeçalho 'Schedule/DATE/SERVICE'
+    de cada bloco. As faixas dos dias são detetadas no primeiro cabeçalho da
+    folha. Os dados do dia ainda não dependem da largura da folha.
+    """
+    bands = None
+    for block_number, block in enumerate(blocks):
+        header_row_idx = next((i for i, row in enumerate(block) if all(
+            any(keyword in str(cell) for cell in row) for keyword in HEADER_KEYWORDS)), None)
+        if header_row_idx is None:
+            continue
+        if bands is None:
+            bands = detect_layout(block[header_row_idx]).bands
+
+        for day_row in block[header_row_idx + 1:]:
+            for day_idx, (start_col, end_col) in enumerate(bands):
+                day_data = day_row[start_col:end_col + 1]
+                if not day_data:
+                    break
+                day_data = day_data + [np.nan] * (end_col + 1 - start_col - len(day_data))
+
+                client_name = str(day_data[0]).strip() if pd.notna(day_data[0]) else ''
+                if not client_name or client_name.upper() in _INVALID_CLIENTS_UPPER:
+                    continue
+
+                service_text = str(day_data[2]).strip()
+                if pd.notna(day_data[2]) and service_text and service_text != 'nan':
+                    service_value = _to_float_or_nan(day_data[2])
+                    if np.isnan(service_value):
+                        continue
+                    pagamento = day_data[5] if pd.notna(day_data[5]) and str(
+                        day_data[5]).strip() in FORMAS_PAGAMENTO_VALIDAS else None
+                    yield block_number, end_col, (
+                        DIAS_SEMANA[day_idx],
+                        day_data[1],
+                        client_name,
+                        service_value,
+                        float(day_data[3]) if pd.notna(day_data[3]) else 0,
+                        day_data[4] if pd.notna(day_data[4]) else 0,
+                        pagamento,
+                        day_data[6] if pd.notna(day_data[6]) else None,
+                        day_data[7] if pd.notna(day_data[7]) else False,
+                        True,
+                    )
+                else:
+                    yield block_number, end_col, (
+                        DIAS_SEMANA[day_idx], day_data[1], client_name, 0, 0, 0, None, None, False, False
+                    )
+
+
+def _technician_info(name_row, sheet_name, width):
+    """Dados do técnico da linha 'NAME:'; células além da linha são NaN até à largura da folha."""
+    def cell(col):
+        if col < len(name_row):
+            return name_row[col]
+        return np.nan if col < width else None
+
+    name_col_idx = next((i for i, c in enumerate(name_row) if isinstance(c, str) and 'NAME:' in c), -1)
+    if name_col_idx == -1 or width <= name_col_idx + 1:
+        return None
+
+    return (
+        sheet_name,
+        cell(name_col_idx + 1),
+        cell(name_col_idx + 3),
+        cell(name_col_idx + 5) if width > name_col_idx + 5 and 'From:' in str(cell(name_col_idx + 4)) else None,
+    )
+
+
+def stream_week_sheet(raw_rows, sheet_name):
+    """
+    Extrai os atendimentos de uma folha WEEK a partir das linhas cruas do
+    openpyxl (read_only, values_only), sem montar o DataFrame da folha.
+
+    Retorna a lista de registos (tuplos na ordem de RECORD_COLUMNS), ou None se
+    a folha estiver vazia. Só as linhas 'NAME:' e os registos encontrados são
+    guardados; o que depende da largura da folha é resolvido no fim da leitura.
+    """
+    width = [0]
+    name_rows = []
+
+    def blocks_with_names():
+        for block in iter_technician_blocks(iter_sheet_rows(raw_rows, width)):
+            name_rows.append(block[0])
+            yield block
+
+    day_records = list(iter_day_records(blocks_with_names()))
+    if width[0] == 0:
+        return None
+
+    technicians = [_technician_info(name_row, sheet_name, width[0]) for name_row in name_rows]
+    return [
+        technicians[block_number] + day_info
+        for block_number, end_col, day_info in day_records
+        if technicians[block_number] is not None and width[0] > end_col
+    ]
@@ -0,0 +1,109 @@
+import re
+import hashlib
+import zipfile
+import posixpath
+from io import BytesIO
+from xml.etree import ElementTree as ET
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# Células de texto partilhado (t="s") e estilos (s="N") dentro do XML de uma folha
+SHARED_STRING_CELL = re.compile(rb'<(?:\w+:)?c\b[^>]*\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)</')
+STYLED_CELL = re.compile(rb'<(?:\w+:)?c\b[^>]*\bs="(\d+)"')
+
+
+def _read_shared_strings(archive):
+    """Lista dos textos partilhados do ficheiro (vazia se a planilha usa só texto inline)."""
+    try:
+        root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+    except KeyError:
+        return []
+    return [''.join(t.text or '' for t in si.iter(f'{MAIN_NS}t')) for si in root.iter(f'{MAIN_NS}si')]
+
+
+def _read_style_formats(archive):
+    """Formato numérico (id e código) de cada estilo de célula; decide o que é lido como data."""
+    try:
+        root = ET.fromstring(archive.read('xl/styles.xml'))
+    except KeyError:
+        return []
+    custom_formats = {
+        numfmt.get('numFmtId'): numfmt.get('formatCode')
+        for numfmt in root.iter(f'{MAIN_NS}numFmt')
+    }
+    cell_xfs = root.find(f'{MAIN_NS}cellXfs')
+    if cell_xfs is None:
+        return []
+    return [
+        (xf.get('numFmtId'), custom_formats.get(xf.get('numFmtId')))
+        for xf in cell_xfs.findall(f'{MAIN_NS}xf')
+    ]
+
+
+def _sheet_fingerprint(sheet_xml, shared_strings, style_formats, workbook_flags):
+    """
+    Hash do XML da folha mais os textos partilhados e formatos que ela usa.
+    Assim, acrescentar uma nova folha (que altera sharedStrings.xml e
+    styles.xml) não muda a impressão digital das folhas existentes.
+    """
+    digest = hashlib.sha256(sheet_xml)
+    digest.update(workbook_flags)
+    for index in SHARED_STRING_CELL.findall(sheet_xml):
+        position = int(index)
+        text = shared_strings[position] if position < len(shared_strings) else ''
+        digest.update(b'\x00' + text.encode('utf-8'))
+    for style in sorted({int(s) for s in STYLED_CELL.findall(sheet_xml)}):
+        style_format = style_formats[style] if style < len(style_formats) else None
+        digest.update(repr((style, style_format)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def workbook_sheet_names(content):
+    """
+    Nomes das folhas de um .xlsx, na ordem do ficheiro, lidos apenas do
+    xl/workbook.xml. Retorna None se o conteúdo não for um .xlsx válido.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return None
+    sheets = workbook.find(f'{MAIN_NS}sheets')
+    return [sheet.get('name') for sheet in (sheets if sheets is not None else [])]
+
+
+def sheet_fingerprints(content):
+    """
+    Calcula uma impressão digital para cada folha de um .xlsx sem o processar,
+    lendo apenas as partes XML do ficheiro zip.
+
+    Retorna {nome da folha: fingerprint}, ou um dicionário vazio se o conteúdo
+    não for um .xlsx válido.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+            relationships = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+            targets = {rel.get('Id'): rel.get('Target') for rel in relationships}
+
+            shared_strings = _read_shared_strings(archive)
+            style_formats = _read_style_formats(archive)
+            workbook_pr = workbook.find(f'{MAIN_NS}workbookPr')
+            date1904 = workbook_pr.get('date1904', '') if workbook_pr is not None else ''
+            workbook_flags = f"date1904={date1904}".encode('utf-8')
+
+            fingerprints = {}
+            sheets = workbook.find(f'{MAIN_NS}sheets')
+            for sheet in (sheets if sheets is not None else []):
+                target = targets[sheet.get(f'{REL_NS}id')]
+                if target.startswith('/'):
+                    part_name = target.lstrip('/')
+                else:
+                    part_name = posixpath.normpath(posixpath.join('xl', target))
+                fingerprints[sheet.get('name')] = _sheet_fingerprint(
+                    archive.read(part_name), shared_strings, style_formats, workbook_flags
+                )
+            return fingerprints
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, ValueError):
+        return {}
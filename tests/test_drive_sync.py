@@ -0,0 +1,102 @@
+"""
+Listagem, downloads e espelho local do Drive contra o servidor local de
+benchmarks/fake_drive.py: paginação da listagem, repetição depois de um 429
+e sincronização com ficheiros alterados, novos e apagados.
+"""
+import json
+import os
+import pytest
+from benchmarks.fake_drive import FakeDrive, FakeDriveServer
+from modules.drive_access import crawl_drive_folder, iter_downloads, stream_drive_folder, MIRROR_MANIFEST
+
+
+def content(name, revision=1):
+    return f"{name} v{revision}".encode('utf-8')
+
+
+def drive_tree():
+    """Pasta raiz com duas planilhas e uma subpasta com outras três."""
+    drive = FakeDrive()
+    subfolder = drive.add_folder('2024')
+    ids = {name: drive.add_file(name, content(name), parent=subfolder) for name in ('a.xlsx', 'b.xlsx', 'c.xlsx')}
+    ids.update({name: drive.add_file(name, content(name)) for name in ('d.xlsx', 'e.xlsx')})
+    return drive, ids
+
+
+def downloaded(drive):
+    """Ids dos ficheiros pedidos ao servidor, sem contar as listagens."""
+    return sorted(path.split('/')[1] for path in drive.requests if path != 'files')
+
+
+def test_crawl_follows_next_page_token():
+    drive, _ = drive_tree()
+    with FakeDriveServer(drive) as server:
+        service = server.service_factory()
+        single_page = crawl_drive_folder(service, 'root')
+        paged = crawl_drive_folder(service, 'root', page_size=2)
+
+    # As subpastas vêm primeiro, depois as planilhas da própria pasta
+    assert [item['name'] for item in paged.items] == ['a.xlsx', 'b.xlsx', 'c.xlsx', 'd.xlsx', 'e.xlsx']
+    assert paged.items == single_page.items
+    assert (single_page.api_calls, paged.api_calls) == (2, 4)
+
+
+def test_download_is_retried_after_429():
+    drive = FakeDrive(failure_status=429)
+    file_id = drive.add_file('a.xlsx', content('a.xlsx'), failures=2)
+    drive.add_file('b.xlsx', content('b.xlsx'))
+    with FakeDriveServer(drive) as server:
+        items = crawl_drive_folder(server.service_factory(), 'root').items
+        drive.requests.clear()
+        files = dict(iter_downloads(items, server.service_factory, max_workers=2, backoff=0))
+
+    assert [files[index].getvalue() for index in range(2)] == [content('a.xlsx'), content('b.xlsx')]
+    assert downloaded(drive).count(file_id) == 3
+
+
+def test_download_gives_up_after_the_retries():
+    drive = FakeDrive(failure_status=429)
+    drive.add_file('a.xlsx', content('a.xlsx'), failures=3)
+    with FakeDriveServer(drive) as server:
+        items = crawl_drive_folder(server.service_factory(), 'root').items
+        with pytest.raises(Exception):
+            dict(iter_downloads(items, server.service_factory, max_workers=1, retries=2, backoff=0))
+
+
+def sync(server, mirror_dir):
+    """Sincroniza o espelho e retorna o DriveStream e o conteúdo de cada planilha por nome."""
+    stream = stream_drive_folder('root', str(mirror_dir), server.service_factory, max_workers=2)
+    files = {}
+    for index, path in stream.files:
+        with open(path, 'rb') as f:
+            files[stream.names[index]] = f.read()
+    return stream, files
+
+
+def test_mirror_downloads_only_changed_files_and_drops_deleted(tmp_path):
+    drive, ids = drive_tree()
+    with FakeDriveServer(drive) as server:
+        stream, files = sync(server, tmp_path)
+        assert sorted(stream.downloads) == sorted(ids.values())
+        assert files == {name: content(name) for name in ids}
+
+        drive.update_file(ids['b.xlsx'], content('b.xlsx', 2))
+        drive.remove(ids['d.xlsx'])
+        ids['f.xlsx'] = drive.add_file('f.xlsx', content('f.xlsx'))
+        drive.requests.clear()
+        stream, files = sync(server, tmp_path)
+
+        assert sorted(stream.downloads) == downloaded(drive) == sorted([ids['b.xlsx'], ids['f.xlsx']])
+        assert stream.removed == [ids['d.xlsx']]
+        assert files == {'a.xlsx': content('a.xlsx'), 'b.xlsx': content('b.xlsx', 2), 'c.xlsx': content('c.xlsx'),
+                         'e.xlsx': content('e.xlsx'), 'f.xlsx': content('f.xlsx')}
+
+        folder_dir = tmp_path / 'root'
+        assert not (folder_dir / 'files' / f"{ids['d.xlsx']}.xlsx").exists()
+        manifest = json.loads((folder_dir / MIRROR_MANIFEST).read_text(encoding='utf-8'))
+        assert sorted(entry['name'] for entry in manifest.values()) == sorted(files)
+
+        drive.requests.clear()
+        stream, _ = sync(server, tmp_path)
+        assert stream.downloads == [] and stream.removed == []
+        assert downloaded(drive) == []
@@ -0,0 +1,59 @@
+"""
+Os filtros da barra lateral pelo índice (apply_filters) dão as mesmas linhas
+que o isin de cada coluna, incluindo as linhas com Nome ou Categoria em
+falta quando a opção em falta está selecionada.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from modules.filter_index import build_filter_index, apply_filters
+
+
+def services(categorical):
+    data = pd.DataFrame({
+        'Semana': ['WEEK 1', 'WEEK 1', 'WEEK 2', 'WEEK 2', 'WEEK 2', 'WEEK 3'],
+        'Nome': ['Ana', None, 'Bruno', 'Ana', 'Bruno', np.nan],
+        'Categoria': ['Technician', np.nan, 'Training', None, 'Technician', 'Training'],
+        'Serviço': [100, 200, 300, 400, 500, 600],
+    })
+    if categorical:
+        data = data.astype({'Semana': 'category', 'Nome': 'category', 'Categoria': 'category'})
+    return data
+
+
+def expected_rows(data, selections):
+    mask = np.ones(len(data), dtype=bool)
+    for column, values in selections.items():
+        if values:
+            mask &= data[column].isin(values).to_numpy()
+    return data[mask]
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_missing_values_kept_when_selected(categorical):
+    data = services(categorical)
+    index = build_filter_index(data)
+    # Seleções por omissão da barra lateral: todas as opções, incluindo a em falta
+    selections = {
+        'Semana': [],
+        'Nome': list(data['Nome'].unique()),
+        'Categoria': list(data['Categoria'].unique()),
+    }
+    result = apply_filters(data, index, selections)
+    assert len(result) == len(data)
+    pd.testing.assert_frame_equal(result, expected_rows(data, selections))
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+@pytest.mark.parametrize('selections', [
+    {'Categoria': [np.nan]},
+    {'Categoria': [None, 'Training']},
+    {'Nome': ['Ana'], 'Categoria': ['Technician', np.nan]},
+    {'Nome': [np.nan], 'Semana': ['WEEK 1']},
+    {'Nome': ['Bruno'], 'Categoria': ['Training']},
+])
+def test_matches_isin(categorical, selections):
+    data = services(categorical)
+    result = apply_filters(data, build_filter_index(data), selections)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True),
+                                  expected_rows(data, selections).reset_index(drop=True))
@@ -0,0 +1,63 @@
+"""
+O cache de parsing devolve exatamente o DataFrame guardado (valores e tipos,
+mesmo nas colunas que misturam texto, números e booleanos) sem pickle: as
+colunas ficam em texto nativo do Parquet.
+"""
+from datetime import date, datetime, time, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from modules import parse_cache
+
+MIXED_VALUES = [True, False, 1, 2.5, 'sim', None, datetime(2024, 1, 3, 5, 6),
+                pd.Timestamp('2024-02-01 10:00'), date(2024, 3, 4), time(8, 30),
+                timedelta(days=1, seconds=5), np.int64(7), np.float64(0.1),
+                np.bool_(True), pd.NaT]
+
+
+KEY = parse_cache.cache_key(b'planilha')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'PARSE_CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def sample_frame():
+    n = len(MIXED_VALUES)
+    return pd.DataFrame({
+        'Técnico': [f"Técnico {i % 3}" for i in range(n)],
+        'Cliente': pd.Series([f"Cliente {i}" for i in range(n)], dtype=object),
+        'Verificado': pd.Series(MIXED_VALUES, dtype=object),
+        'Valor': pd.array(range(n), dtype='Int64'),
+    })
+
+
+def test_round_trip_keeps_values_and_types():
+    frame = sample_frame()
+    parse_cache.store_cached_frame(KEY, frame)
+    loaded = parse_cache.load_cached_frame(KEY)
+
+    pd.testing.assert_frame_equal(loaded, frame)
+    for expected, actual in zip(frame['Verificado'], loaded['Verificado']):
+        assert type(actual) is type(expected)
+        assert actual is expected or actual == expected or (pd.isna(actual) and pd.isna(expected))
+
+
+def test_text_is_stored_natively_without_pickle(cache_dir):
+    parse_cache.store_cached_frame(KEY, sample_frame())
+    schema = pq.read_schema(cache_dir / f"{KEY}.parquet")
+
+    for column in ('Técnico', 'Cliente', 'Verificado'):
+        assert schema.field(column).type in ('string', 'large_string')
+    assert b'readersheets.pickled_columns' not in schema.metadata
+
+
+def test_unknown_value_type_is_not_cached(cache_dir):
+    frame = sample_frame()
+    frame['Verificado'] = pd.Series([object()] * len(frame), dtype=object)
+    parse_cache.store_cached_frame(KEY, frame)
+
+    assert parse_cache.load_cached_frame(KEY) is None
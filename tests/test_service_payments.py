@@ -0,0 +1,73 @@
+"""
+Equivalência da repartição vetorizada do pagamento semanal pelos
+atendimentos (calcular_pagamentos_individuais, em cêntimos) com a referência
+linha a linha (calcular_pagamento_individual, em dólares). Cada atendimento
+fica a menos de um cêntimo da parte exata, e as partes de cada técnico e
+semana somam exatamente o pagamento semanal.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from modules.calculations import calcular_pagamento_individual, calcular_pagamentos_individuais
+
+
+def services():
+    """Atendimentos em cêntimos; o Bruno não tem linha semanal e a Carla não tem serviços na semana."""
+    return pd.DataFrame({
+        'Nome': ['Ana', 'Ana', 'Bruno', 'Ana', 'Ana', 'Ana', 'Carla', 'Ana'],
+        'Semana': ['WEEK 1', 'WEEK 1', 'WEEK 1', 'WEEK 1', 'WEEK 2', 'WEEK 2', 'WEEK 1', 'WEEK 2'],
+        'Serviço': [3333, 3333, 12000, 3334, 2500, 2500, 0, 2500],
+        'Gorjeta': [500, 0, 250, 0, 0, 1000, 300, 0],
+    }, index=[10, 11, 12, 13, 14, 15, 16, 17]).astype({'Serviço': 'Int64', 'Gorjeta': 'Int64'})
+
+
+def weekly_data():
+    """Totais semanais em cêntimos; a Ana tem duas categorias na WEEK 2 e o pagamento está na primeira linha."""
+    return pd.DataFrame({
+        'Nome': ['Ana', 'Ana', 'Ana', 'Carla'],
+        'Semana': ['WEEK 1', 'WEEK 2', 'WEEK 2', 'WEEK 1'],
+        'Categoria': ['Technician', 'Technician', 'Training', 'Technician'],
+        'Serviço': [10000, 5000, 2500, 0],
+        'Pagamento Tecnico': [1001, 1667, 1667, 300],
+    }).astype({'Serviço': 'Int64', 'Pagamento Tecnico': 'Int64'})
+
+
+def in_dollars(data, columns):
+    return data.assign(**{column: data[column].astype(float) / 100 for column in columns})
+
+
+@pytest.fixture
+def result():
+    return calcular_pagamentos_individuais(services(), weekly_data())
+
+
+def test_differs_from_reference_by_less_than_a_cent(result):
+    weekly_dollars = in_dollars(weekly_data(), ['Serviço', 'Pagamento Tecnico'])
+    expected = in_dollars(services(), ['Serviço', 'Gorjeta']).apply(
+        calcular_pagamento_individual, axis=1, weekly_data=weekly_dollars)
+    expected.columns = ['Pagamento Tecnico', 'Lucro Empresa']
+
+    assert result.index.equals(services().index)
+    # A referência dá a parte exata; em cêntimos cada parte é ela arredondada
+    # para baixo ou para cima, consoante o arredondamento acumulado
+    exact = (expected * 100).round(6)
+    cents = result.astype(float)
+    assert ((cents == np.floor(exact)) | (cents == np.ceil(exact))).all().all()
+
+
+def test_cumulative_rounding_sums_to_weekly_payment(result):
+    data = services().join(result)
+    paid = data.groupby(['Nome', 'Semana'])['Pagamento Tecnico'].sum()
+    assert paid[('Ana', 'WEEK 1')] == 1001
+    assert paid[('Ana', 'WEEK 2')] == 1667
+    # As partes exatas (333.63..., 333.63..., 333.73... cêntimos) arredondadas uma a uma somariam 1002
+    assert result.loc[[10, 11, 13], 'Pagamento Tecnico'].tolist() == [334, 333, 334]
+    assert (result['Pagamento Tecnico'] + result['Lucro Empresa']).equals(data['Serviço'] + data['Gorjeta'])
+
+
+def test_technician_week_without_weekly_row(result):
+    assert result.loc[12].tolist() == [0, 12000 + 250]
+
+
+def test_week_without_services(result):
+    assert result.loc[16].tolist() == [0, 300]
@@ -0,0 +1,47 @@
+"""
+O motor 'streaming' (openpyxl em read_only) produz o mesmo DataFrame dos
+motores baseados no pd.read_excel, mesmo com números e booleanos nas
+células de texto (cliente, data, verificado).
+"""
+from io import BytesIO
+from datetime import datetime
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from benchmarks.synthetic_workbook import write_week_workbook
+from modules.data_processor import parse_workbook, collect_messages
+from modules.sheet_parser import DAY_COLUMNS
+
+# Valores que o pd.read_excel troca pelo primeiro valor igual da coluna (True, 1 e 1.0)
+MIXED_VALUES = [True, 1, 1.0, False, 0, 7, 2.5, datetime(2024, 1, 3, 5, 6)]
+
+
+def mixed_workbook():
+    """Planilha sintética com valores que não são texto nas colunas de cliente, data e verificado."""
+    source = BytesIO()
+    write_week_workbook(source, n_technicians=4, n_weeks=2, seed=5)
+    workbook = load_workbook(BytesIO(source.getvalue()))
+    position = 0
+    for worksheet in workbook.worksheets:
+        for row in worksheet.iter_rows(min_row=3):
+            for start_col, _ in DAY_COLUMNS:
+                for col in (start_col, start_col + 1, start_col + 7):
+                    cell = row[col]
+                    if cell.value is None or (isinstance(cell.value, str) and cell.value.isupper()):
+                        continue
+                    position += 1
+                    if position % 4 == 0:
+                        cell.value = MIXED_VALUES[position // 4 % len(MIXED_VALUES)]
+    content = BytesIO()
+    workbook.save(content)
+    return content.getvalue()
+
+
+@pytest.mark.parametrize('engine', ['loop', 'streaming'])
+def test_engines_match_vectorized_with_mixed_cells(engine):
+    content = mixed_workbook()
+    with collect_messages():
+        expected = parse_workbook(BytesIO(content), 'vectorized')
+        result = parse_workbook(BytesIO(content), engine)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(expected, result)
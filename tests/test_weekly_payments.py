@@ -0,0 +1,107 @@
+"""
+Equivalência do pagamento semanal vetorizado (calcular_pagamentos_semanais,
+em cêntimos) com a referência linha a linha original (a cópia de
+calcular_pagamento_semanal abaixo, em dólares, anterior às regras de
+REGRAS_COMISSAO). A comissão é arredondada ao cêntimo, pelo que os dois
+diferem no máximo meio cêntimo.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from modules.config import REGRAS_COMISSAO
+from modules.calculations import calcular_pagamentos_semanais
+from modules.money import MONEY_COLUMNS, to_cents
+
+
+# Cópia sem alterações da versão original de modules/calculations.py, para
+# que a referência não mude quando a implementação muda
+def calcular_pagamento_semanal(row):
+    """Calcula o pagamento semanal baseado na categoria"""
+    categoria = row['Categoria']
+    servico = row['Serviço']
+    gorjeta = row['Gorjeta']
+    dias_trabalhados = row['Dias Trabalhados']
+
+    if categoria == 'Registering':
+        pagamento = 0.00
+        lucro = servico + gorjeta
+    elif categoria in ['Technician', 'Started']:
+        pagamento = servico * 0.20 + gorjeta
+        lucro = servico * 0.80
+    elif categoria == 'Training':
+        pagamento = 80 * dias_trabalhados  # $80 por dia trabalhado
+        lucro = servico + gorjeta - pagamento
+    elif categoria == 'Coordinator':
+        pagamento = servico * 0.25 + gorjeta
+        lucro = servico * 0.75
+    else:
+        pagamento = 0
+        lucro = servico + gorjeta
+
+    return pd.Series([pagamento, lucro])
+
+
+def weekly_totals(categorias, servico=1234.57, gorjeta=45.10, dias=4):
+    """Totais semanais em dólares, uma linha por categoria."""
+    n = len(categorias)
+    return pd.DataFrame({
+        'Nome': [f"Técnico {i}" for i in range(n)],
+        'Semana': ['WEEK 1'] * n,
+        'Categoria': pd.Series(categorias, dtype=object),
+        'Serviço': [servico] * n,
+        'Gorjeta': [gorjeta] * n,
+        'Dias Trabalhados': [dias] * n,
+    })
+
+
+def compare_with_reference(totals):
+    """Calcula as duas versões, verifica a equivalência e retorna o resultado em cêntimos."""
+    expected = totals.assign(Gorjeta=pd.to_numeric(totals['Gorjeta'], errors='coerce'))
+    expected = expected.apply(calcular_pagamento_semanal, axis=1, result_type='expand')
+    expected.columns = ['Pagamento Tecnico', 'Lucro Empresa']
+
+    totals_cents = totals.assign(**{column: to_cents(totals[column]) for column in MONEY_COLUMNS})
+    result = calcular_pagamentos_semanais(totals_cents)
+
+    expected_cents = expected.astype(float) * 100
+    result_cents = result.astype('Float64').astype(float)
+    pd.testing.assert_frame_equal(expected_cents.isna(), result_cents.isna())
+    assert ((expected_cents - result_cents).abs().fillna(0) <= 0.5 + 1e-6).all().all()
+    return result
+
+
+@pytest.mark.parametrize('categoria', list(REGRAS_COMISSAO))
+def test_each_category_matches_reference(categoria):
+    result = compare_with_reference(weekly_totals([categoria]))
+    assert (result['Pagamento Tecnico'] + result['Lucro Empresa']).tolist() == [123457 + 4510]
+
+
+def test_commission_and_day_rates():
+    result = compare_with_reference(weekly_totals(['Technician', 'Coordinator', 'Training']))
+    # 20% e 25% de $1,234.57 arredondados ao cêntimo, com a gorjeta; 4 dias a $80
+    assert result['Pagamento Tecnico'].tolist() == [24691 + 4510, 30864 + 4510, 32000]
+    assert result['Lucro Empresa'].tolist() == [98766, 92593, 123457 + 4510 - 32000]
+
+
+@pytest.mark.parametrize('categoria', ['Outro', None])
+def test_unknown_category_falls_back_to_no_payment(categoria):
+    result = compare_with_reference(weekly_totals([categoria]))
+    assert result['Pagamento Tecnico'].tolist() == [0]
+    assert result['Lucro Empresa'].tolist() == [123457 + 4510]
+
+
+def test_zero_days_worked():
+    result = compare_with_reference(weekly_totals(list(REGRAS_COMISSAO), dias=0))
+    training = list(REGRAS_COMISSAO).index('Training')
+    assert result['Pagamento Tecnico'].iloc[training] == 0
+    assert result['Lucro Empresa'].iloc[training] == 123457 + 4510
+
+
+@pytest.mark.parametrize('gorjeta', [np.nan, ''])
+def test_missing_tip(gorjeta):
+    categorias = list(REGRAS_COMISSAO) + ['Outro']
+    result = compare_with_reference(weekly_totals(categorias, gorjeta=gorjeta))
+    # A gorjeta em falta só torna em falta a parte (pagamento ou lucro) que a recebe
+    repassa_gorjeta = [REGRAS_COMISSAO.get(categoria, {}).get('gorjeta', False) for categoria in categorias]
+    assert result['Pagamento Tecnico'].isna().tolist() == repassa_gorjeta
+    assert result['Lucro Empresa'].isna().tolist() == [not repassa for repassa in repassa_gorjeta]